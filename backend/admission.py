@@ -0,0 +1,144 @@
+"""
+アドミッション制御（過負荷時に新しい処理を早めに断る）
+
+- ルーム数・WebSocket接続数の上限と、新しい接続の受付レート（トークンバケット）で制限する
+- 進行中のゲーム（ロビー以外のルーム）を優先する。新しいロビー（ルーム作成・ロビーへの参加・ロビーへの接続）は
+  接続数の lobby_share までしか使えず、受付レートのバケットも (1 - lobby_share) を進行中のゲームのために残す
+- ドレイン中（シャットダウン前）は新しいルーム・参加・接続を全て断る
+- 断る場合は再試行までの秒数を返す。クライアントが一斉に再試行しないよう、秒数にはランダムな揺らぎを加える
+判定はイベントループ上で呼ぶ前提で、ロックは取らない
+"""
+import random
+import time
+from typing import Optional, Tuple
+
+from metrics import Counter
+
+# 再試行までの秒数の上限
+MAX_RETRY_AFTER = 60.0
+
+
+class TokenBucket:
+    """rate 個/秒で補充され、最大 burst 個まで溜まるバケット"""
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, reserve: float = 0.0) -> bool:
+        """reserve 個を残した上で1個取れる場合は取る"""
+        self._refill(time.monotonic())
+        if self.tokens >= 1 + reserve:
+            self.tokens -= 1
+            return True
+        return False
+
+    def available(self) -> float:
+        self._refill(time.monotonic())
+        return self.tokens
+
+    def wait_time(self, reserve: float = 0.0) -> float:
+        """reserve 個を残した上で1個取れるようになるまでの秒数"""
+        self._refill(time.monotonic())
+        return max(0.0, (1 + reserve - self.tokens) / self.rate)
+
+
+class AdmissionController:
+    """
+    0 の上限は無制限。判定メソッドは受け付ける場合は None、断る場合は再試行までの秒数（揺らぎ込み）を返す
+
+    rejected_counter には kind（room / join / connection）と reason（rooms / connections / rate / draining）のラベルで断った件数を数える
+    """
+    def __init__(
+        self,
+        max_rooms: int,
+        max_connections: int,
+        connect_rate: float,
+        connect_burst: float,
+        lobby_share: float,
+        retry_after: float,
+        retry_jitter: float,
+        rejected_counter: Counter
+    ):
+        self.max_rooms = max_rooms
+        self.max_connections = max_connections
+        self.lobby_share = lobby_share
+        self.retry_after = retry_after
+        self.retry_jitter = retry_jitter
+        self.rejected_counter = rejected_counter
+        self.connect_bucket = TokenBucket(connect_rate, connect_burst) if connect_rate > 0 else None
+        # ロビー向けに使えない（進行中のゲームのために残す）トークン数
+        self.lobby_reserve = connect_burst * (1 - lobby_share)
+        # ドレイン中の再試行までの秒数（ドレイン中でなければ None）
+        self.draining_retry_after: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_rooms or self.max_connections or self.connect_bucket)
+
+    @property
+    def draining(self) -> bool:
+        return self.draining_retry_after is not None
+
+    def start_draining(self, retry_after: float):
+        """以降の全ての判定で断る（再試行までの秒数は次のプロセスが起動するまでの目安）"""
+        self.draining_retry_after = retry_after
+
+    def _lobby_connections_full(self, connection_count: int) -> bool:
+        return bool(self.max_connections) and connection_count >= self.max_connections * self.lobby_share
+
+    def _reject(self, kind: str, reason: str, wait: float = 0.0) -> float:
+        self.rejected_counter.inc(kind=kind, reason=reason)
+        base = max(self.retry_after, wait)
+        return min(MAX_RETRY_AFTER, base * (1 + random.random() * self.retry_jitter))
+
+    def admit_room(self, room_count: int, connection_count: int) -> Optional[float]:
+        """新しいルーム（ロビー）の作成"""
+        if self.draining:
+            return self._reject("room", "draining", self.draining_retry_after)
+        if self.max_rooms and room_count >= self.max_rooms:
+            return self._reject("room", "rooms")
+        if self._lobby_connections_full(connection_count):
+            return self._reject("room", "connections")
+        return None
+
+    def admit_join(self, connection_count: int, in_progress: bool) -> Optional[float]:
+        """ルームへの参加（進行中のゲームへの参加は既存プレイヤーの再参加なので、ドレイン中以外は断らない）"""
+        if self.draining:
+            return self._reject("join", "draining", self.draining_retry_after)
+        if not in_progress and self._lobby_connections_full(connection_count):
+            return self._reject("join", "connections")
+        return None
+
+    def admit_connection(self, connection_count: int, in_progress: bool, replaces: bool = False) -> Optional[float]:
+        """
+        WebSocket接続
+
+        replaces: 同じプレイヤーの既存の接続を置き換える（接続数が増えない）
+        """
+        if self.draining:
+            return self._reject("connection", "draining", self.draining_retry_after)
+        if not replaces and self.max_connections:
+            limit = self.max_connections if in_progress else self.max_connections * self.lobby_share
+            if connection_count >= limit:
+                return self._reject("connection", "connections")
+        if self.connect_bucket is not None:
+            reserve = 0.0 if in_progress else self.lobby_reserve
+            if not self.connect_bucket.try_acquire(reserve):
+                return self._reject("connection", "rate", self.connect_bucket.wait_time(reserve))
+        return None
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After ヘッダーの値（整数秒、切り上げ）"""
+    return str(max(1, int(-(-seconds // 1))))
+
+
+def close_reason(seconds: float) -> Tuple[int, str]:
+    """WebSocketを断るときのクローズコード（1013 Try Again Later）と理由（再試行までの秒数）"""
+    return 1013, f"retry_after={seconds:.1f}"
@@ -0,0 +1,284 @@
+"""
+ベンチマークスクリプト
+
+使い方:
+    python bench.py ws-encoding [--players 6] [--rounds 3] [--repeat 20]
+    python bench.py ws-compression [--players 6] [--rounds 3] [--repeat 20]
+    python bench.py http-codec [--players 6] [--rounds 3] [--rooms 50] [--repeat 20]
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from axis_data import generate_axis_pair, generate_wolf_axis_pair
+from codec import CONTENT_ENCODINGS, ENCODINGS, JSON_CODECS, compress_body, compress_frame, encode_frame
+
+PLAYER_NAMES = ['たろう', 'はなこ', 'じろう', 'さくら', 'けんた', 'ゆうこ', 'しょうた', 'みき']
+CHAT_LINES = ['それ絶対人狼でしょ', 'え、私は村人だよ', '右上のカードが怪しい', 'うーん迷う', 'もう一回！']
+
+
+def simulate_game_events(num_players: int, num_rounds: int, seed: int = 1234) -> List[dict]:
+    """1ゲーム分のブロードキャストイベント列を生成（実際のゲーム進行に近い順序・内容）"""
+    import main
+
+    rng = random.Random(seed)
+    themes = ['food', 'daily', 'entertainment']
+    slots = list(range(num_players))
+    events: List[dict] = []
+    seq = 0
+
+    def emit(event: dict):
+        nonlocal seq
+        seq += 1
+        events.append({**event, "seq": seq})
+
+    for slot in slots:
+        emit({"type": "player_joined", "player_slot": slot, "player_name": PLAYER_NAMES[slot % len(PLAYER_NAMES)]})
+        emit({"type": "player_online", "player_id": f"player-{slot:04d}-{rng.getrandbits(64):016x}"})
+
+    for round_number in range(1, num_rounds + 1):
+        round_seed = rng.randint(0, 10000)
+        normal_axis = generate_axis_pair(themes, round_seed)
+        generate_wolf_axis_pair(normal_axis, themes, round_seed)
+        hands = main.generate_all_hands(str(round_seed), slots, 5, themes)
+
+        if round_number > 1:
+            emit({"type": "round_started", "round": round_number})
+        emit({"type": "phase_changed", "phase": "placement"})
+
+        for slot in slots:
+            for card_id in main.serialize_hand(hands[slot][:3]):
+                # ドラッグ中のプレビュー（ティックごとに1フレーム）
+                for _ in range(8):
+                    events.append({"type": "drag_preview", "previews": [{
+                        "player_slot": slot,
+                        "card_id": card_id,
+                        "quadrant": rng.randint(1, 4),
+                        "offsets": {"x": rng.random(), "y": rng.random()}
+                    }]})
+                emit({
+                    "type": "card_placed",
+                    "player_slot": slot,
+                    "card_id": card_id,
+                    "quadrant": rng.randint(1, 4),
+                    "offsets": {"x": rng.random(), "y": rng.random()}
+                })
+
+        for _ in range(5):
+            slot = rng.choice(slots)
+            emit({
+                "type": "chat",
+                "player_id": f"player-{slot:04d}",
+                "player_name": PLAYER_NAMES[slot % len(PLAYER_NAMES)],
+                "player_slot": slot,
+                "message": rng.choice(CHAT_LINES),
+                "timestamp": datetime.now().isoformat()
+            })
+
+        emit({"type": "phase_changed", "phase": "voting"})
+        for slot in slots:
+            emit({"type": "vote_submitted", "voter_slot": slot, "target_slot": rng.choice(slots)})
+        emit({"type": "phase_changed", "phase": "results"})
+
+    return events
+
+
+def simulate_results_payloads(num_players: int, num_rounds: int, seed: int = 1234) -> List[dict]:
+    """各ラウンドの結果データ（calculate_results のレスポンス相当）を生成"""
+    import main
+
+    rng = random.Random(seed)
+    themes = ['food', 'daily', 'entertainment']
+    slots = list(range(num_players))
+    payloads = []
+    for _ in range(num_rounds):
+        round_seed = rng.randint(0, 10000)
+        normal_axis = generate_axis_pair(themes, round_seed)
+        wolf_axis = generate_wolf_axis_pair(normal_axis, themes, round_seed)
+        hands = main.generate_all_hands(str(round_seed), slots, 5, themes)
+        wolf_slot = rng.choice(slots)
+        payloads.append({
+            "wolf_slot": wolf_slot,
+            "top_voted": [wolf_slot],
+            "wolf_caught": True,
+            "scores": {str(slot): rng.randint(0, 2) for slot in slots},
+            "total_scores": {str(slot): rng.randint(0, 10) for slot in slots},
+            "vote_counts": {str(wolf_slot): num_players - 1},
+            "all_hands": {str(slot): main.serialize_hand(hand) for slot, hand in hands.items()},
+            "wolf_axis": wolf_axis,
+            "normal_axis": normal_axis
+        })
+    return payloads
+
+
+def simulate_room_traffic(num_players: int, num_rounds: int) -> List[Tuple[dict, int]]:
+    """
+    1ルーム分の送信メッセージを (メッセージ, 受信者数) のリストで生成
+
+    ブロードキャスト（1回エンコードして全員に送信）、各プレイヤーの結果取得、
+    再接続1回分のチャット履歴再送（接続ごとにエンコード）を含む
+    """
+    events = simulate_game_events(num_players, num_rounds)
+    messages = [(event, num_players) for event in events]
+    for payload in simulate_results_payloads(num_players, num_rounds):
+        messages.extend((payload, 1) for _ in range(num_players))
+    chat_history = [event for event in events if event["type"] == "chat"]
+    messages.extend((event, 1) for event in chat_history * num_players)
+    return messages
+
+
+def simulate_http_payloads(num_players: int, num_rounds: int, num_rooms: int, seed: int = 1234) -> Dict[str, dict]:
+    """
+    サイズの大きいHTTPレスポンスを生成（名前 -> レスポンス）
+
+    - debug-rooms: /api/debug/rooms（全ルームの全プレイヤー）
+    - cards: /api/rooms/{room_code}/cards（全員が配置を終えた時点）
+    - results: ラウンド結果（全員の手札と両方の軸を含む）
+    """
+    rng = random.Random(seed)
+    now = datetime.now().isoformat()
+    results = simulate_results_payloads(num_players, num_rounds, seed)[-1]
+
+    room_list = []
+    for index in range(num_rooms):
+        room_code = f"ROOM{index:04d}"
+        room_players = [{
+            "room_code": room_code,
+            "player_id": f"player-{slot:04d}-{rng.getrandbits(64):016x}",
+            "player_slot": slot,
+            "player_name": PLAYER_NAMES[slot % len(PLAYER_NAMES)],
+            "status": "connected",
+            "is_host": 1 if slot == 0 else 0,
+            "connected_at": now,
+            "last_seen_at": now,
+        } for slot in range(num_players)]
+        room_list.append({
+            "room_code": room_code,
+            "phase": "placement",
+            "active_round": num_rounds,
+            "axis_payload": results["normal_axis"],
+            "wolf_axis_payload": results["wolf_axis"],
+            "round_seed": str(rng.randint(0, 10000)),
+            "selected_theme": "food",
+            "scores": '{"0": 3, "1": 1}',
+            "themes": '["food", "daily", "entertainment"]',
+            "hand_size": 5,
+            "required_placement_count": 3,
+            "created_at": now,
+            "updated_at": now,
+            "last_activity_at": now,
+            "players_count": num_players,
+            "players": room_players,
+            "cards_count": num_players * 3,
+            "votes_count": 0,
+        })
+
+    placed = []
+    for slot, hand in results["all_hands"].items():
+        for card_id in hand[:3]:
+            placed.append({
+                "room_code": "ROOM0000",
+                "round": num_rounds,
+                "player_slot": int(slot),
+                "card_id": card_id,
+                "quadrant": rng.randint(1, 4),
+                "offsets": {"x": rng.random(), "y": rng.random()},
+                "locked": 0,
+                "placed_at": now,
+            })
+
+    return {
+        "debug-rooms": {"rooms": room_list, "total": num_rooms},
+        "cards": {"cards": placed},
+        "results": results,
+    }
+
+
+def measure(fn: Callable[[], None], repeat: int) -> float:
+    """fnを repeat 回実行した1回あたりの平均時間（ミリ秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def bench_ws_encoding(args):
+    events = simulate_game_events(args.players, args.rounds)
+    recipients = args.players
+
+    print(f"events/game={len(events)} players={args.players} rounds={args.rounds}")
+    print(f"{'encoding':<10} {'bytes/game':>12} {'sent/game':>12} {'encode ms/game':>15} {'ratio':>7}")
+    baseline = None
+    for encoding in ENCODINGS:
+        frames = [encode_frame(event, encoding) for event in events]
+        size = sum(frame_size(f) for f in frames)
+        elapsed = measure(lambda: [encode_frame(event, encoding) for event in events], args.repeat)
+        baseline = baseline or size
+        print(f"{encoding:<10} {size:>12,} {size * recipients:>12,} {elapsed:>15.3f} {size / baseline:>7.2f}")
+
+
+def frame_size(frame) -> int:
+    return len(frame.encode('utf-8')) if isinstance(frame, str) else len(frame)
+
+
+def bench_ws_compression(args):
+    messages = simulate_room_traffic(args.players, args.rounds)
+    frames = [(encode_frame(message, "json"), recipients) for message, recipients in messages]
+    raw_size = sum(frame_size(f) * recipients for f, recipients in frames)
+
+    print(f"frames/room={len(frames)} players={args.players} rounds={args.rounds} raw bytes sent/room={raw_size:,}")
+    print(f"{'min_bytes':>9} {'level':>5} {'bytes/room':>12} {'saved':>7} {'compressed':>10} {'cpu ms/room':>12}")
+    for min_bytes in (0, 256, 1024, 4096):
+        for level in (1, 6, 9):
+            compressed = [(compress_frame(f, min_bytes, level), recipients) for f, recipients in frames]
+            size = sum(frame_size(f) * recipients for f, recipients in compressed)
+            count = sum(1 for f, _ in compressed if isinstance(f, bytes))
+            elapsed = measure(lambda: [compress_frame(f, min_bytes, level) for f, _ in frames], args.repeat)
+            print(f"{min_bytes:>9} {level:>5} {size:>12,} {1 - size / raw_size:>7.1%} {count:>10} {elapsed:>12.3f}")
+
+
+def bench_http_codec(args):
+    payloads = simulate_http_payloads(args.players, args.rounds, args.rooms)
+
+    print(f"players={args.players} rounds={args.rounds} rooms={args.rooms}")
+    print(f"{'payload':<12} {'codec':<8} {'bytes':>10} {'encode ms':>10}")
+    for name, payload in payloads.items():
+        for codec_name, dumps in JSON_CODECS.items():
+            size = len(dumps(payload))
+            elapsed = measure(lambda: dumps(payload), args.repeat)
+            print(f"{name:<12} {codec_name:<8} {size:>10,} {elapsed:>10.3f}")
+
+    print()
+    print(f"{'payload':<12} {'encoding':<8} {'level':>5} {'bytes':>10} {'saved':>7} {'cpu ms':>8}")
+    levels = {"gzip": (1, 6, 9), "br": (1, 4, 11)}
+    for name, payload in payloads.items():
+        body = JSON_CODECS["json"](payload)
+        for encoding in CONTENT_ENCODINGS:
+            for level in levels[encoding]:
+                size = len(compress_body(body, encoding, level))
+                elapsed = measure(lambda: compress_body(body, encoding, level), args.repeat)
+                print(f"{name:<12} {encoding:<8} {level:>5} {size:>10,} {1 - size / len(body):>7.1%} {elapsed:>8.3f}")
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "ws-encoding": bench_ws_encoding,
+    "ws-compression": bench_ws_compression,
+    "http-codec": bench_http_codec,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Axis Wolf backend benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--players", type=int, default=6)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,22 +17,26 @@ cd "$(dirname "$0")/.."
 echo "Moved to project root: $(pwd)"
 
 # フロントエンドの依存関係インストール
-echo "[1/4] Installing frontend dependencies..."
+echo "[1/5] Installing frontend dependencies..."
 cd frontend
 npm ci
 
 # フロントエンドのビルド
-echo "[2/4] Building frontend..."
+echo "[2/5] Building frontend..."
 VITE_API_BASE='' VITE_WS_BASE='' npm run build
 
 # 静的ファイルをバックエンドディレクトリにコピー
-echo "[3/4] Copying built files to backend/static..."
+echo "[3/5] Copying built files to backend/static..."
 cd ../backend
 mkdir -p static
 cp -r ../frontend/dist/* static/
 
 # Python依存関係のインストール
-echo "[4/4] Installing Python dependencies..."
+echo "[4/5] Installing Python dependencies..."
 pip install -r requirements.txt
 
+# 静的ファイルの事前圧縮（.gz / brotliがあれば .br も作成し、配信時はそのまま返す）
+echo "[5/5] Precompressing static files..."
+python static_site.py static
+
 echo "===== Build Complete ====="
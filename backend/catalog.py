@@ -0,0 +1,188 @@
+"""カードカタログ（カード名と整数IDの対応表）"""
+import hashlib
+import json
+import random
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 手札・配置で使う整数IDの配列型（符号なし16bit）
+CARD_REF_TYPECODE = "H"
+
+
+# カード・軸ラベルの定義ファイル
+DATA_DIR = Path(__file__).parent / "data"
+CARDS_FILE = "cards.json"
+AXIS_LABELS_FILE = "axis_labels.json"
+
+# 軸ペア（通常2本 + 人狼用に入れ替える1本以上）を作るのに必要なテーマごとの軸の数
+MIN_AXES_PER_THEME = 3
+
+
+class UnknownCard(KeyError):
+    """カタログに存在しないカード名"""
+
+
+class CatalogError(ValueError):
+    """定義ファイルの内容が不正"""
+
+
+class CardCatalog:
+    """
+    重複を除いたカード一覧と、カード名 <-> 整数ID の対応表（軸ラベルも同じバージョンで保持する）
+
+    - ID はテーマ定義の出現順に 0 から振られる（同じ名前が複数テーマにあっても1つのID）
+    - base（前のバージョン）を渡すと、既存カードの ID を引き継ぎ、新しいカードには続きの ID を振る
+      削除されたカードも名前は残すため、古いバージョンの ID はどのバージョンでも同じ名前に戻せる
+    - テーマごとのプールは ID のタプルで保持する（テーマ内の重複も除く）
+    - version はカタログ内容（manifest）のハッシュで、内容が同じなら同じ値になる
+      （ID の振り方・削除済みのカードには依存しないので、再読み込みしたプロセスと新しく起動したプロセスで一致する）
+    手札・配置はこの ID で保持し、カード名への変換は API の入出力時にだけ行う
+    生成後は変更しない（差し替えは新しいインスタンスを作って行う）
+    """
+    def __init__(
+        self,
+        pool_by_theme: Dict[str, Sequence[str]],
+        axis_labels: Sequence[dict] = (),
+        base: Optional["CardCatalog"] = None
+    ):
+        self.names: List[str] = list(base.names) if base else []
+        self.ids: Dict[str, int] = dict(base.ids) if base else {}
+        self.themes: Dict[str, Tuple[int, ...]] = {}
+        self.axis_labels: Tuple[dict, ...] = tuple(axis_labels)
+        for theme, theme_cards in pool_by_theme.items():
+            refs: List[int] = []
+            seen = set()
+            for name in theme_cards:
+                ref = self.ids.get(name)
+                if ref is None:
+                    ref = self.ids[name] = len(self.names)
+                    self.names.append(name)
+                if ref not in seen:
+                    seen.add(ref)
+                    refs.append(ref)
+            self.themes[theme] = tuple(refs)
+        # 全カード（いずれかのテーマに含まれるカード。削除済みのカードは含まない）
+        self.all_refs: Tuple[int, ...] = tuple(sorted({ref for refs in self.themes.values() for ref in refs}))
+
+        content = json.dumps(self.manifest(), ensure_ascii=False, separators=(",", ":"))
+        self.version = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+    def manifest(self) -> dict:
+        """
+        配信用の内容: 現在のカード名の一覧（テーマ定義の出現順）と、テーマごとのその一覧での位置、軸ラベル
+
+        プロセス内の ID ではなく定義ファイルの内容だけで決まる
+        """
+        cards: List[str] = []
+        positions: Dict[int, int] = {}
+        themes: Dict[str, List[int]] = {}
+        for theme, refs in self.themes.items():
+            indexes = []
+            for ref in refs:
+                if ref not in positions:
+                    positions[ref] = len(cards)
+                    cards.append(self.names[ref])
+                indexes.append(positions[ref])
+            themes[theme] = indexes
+        return {"cards": cards, "themes": themes, "axis_labels": list(self.axis_labels)}
+
+    def __len__(self) -> int:
+        return len(self.all_refs)
+
+    def ref(self, name: str) -> int:
+        """カード名から ID を取得（存在しない場合は UnknownCard）"""
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise UnknownCard(name) from None
+
+    def name(self, ref: int) -> str:
+        """ID からカード名を取得"""
+        return self.names[ref]
+
+    def resolve(self, refs: Iterable[int]) -> List[str]:
+        """ID の列をカード名のリストに変換"""
+        names = self.names
+        return [names[ref] for ref in refs]
+
+    def pool(self, themes: Optional[List[str]] = None, seed: Optional[int] = None) -> Tuple[int, ...]:
+        """
+        テーマに基づいてフィルタリングされたカードプール（ID）を取得
+
+        - themes が None または空の場合: 全カード
+        - 'chaos' が含まれる場合: 全テーマのカードを混合（カオスモード）
+        - 単一テーマの場合: そのテーマのカードのみ
+        - 複数テーマの場合: seedを使って1つのテーマをランダムに選択
+        """
+        if not themes or 'chaos' in themes:
+            return self.all_refs
+
+        if len(themes) == 1:
+            return self.themes.get(themes[0], self.all_refs)
+
+        if seed is not None:
+            selected_theme = random.Random(seed).choice(themes)
+            if selected_theme in self.themes:
+                return self.themes[selected_theme]
+
+        # フォールバック: 全カード
+        return self.all_refs
+
+
+def card_refs(refs: Iterable[int]) -> array:
+    """ID の列をコンパクトな整数配列にする"""
+    return array(CARD_REF_TYPECODE, refs)
+
+
+def validate_catalog_data(pool_by_theme, axis_labels) -> None:
+    """定義ファイルの内容を検証（不正な場合は CatalogError）"""
+    if not isinstance(pool_by_theme, dict) or not pool_by_theme:
+        raise CatalogError(f"{CARDS_FILE}: テーマ名 -> カード名リストのオブジェクトが必要です")
+    for theme, theme_cards in pool_by_theme.items():
+        if not isinstance(theme_cards, list) or not theme_cards:
+            raise CatalogError(f"{CARDS_FILE}: テーマ '{theme}' のカードが空です")
+        if not all(isinstance(name, str) and name for name in theme_cards):
+            raise CatalogError(f"{CARDS_FILE}: テーマ '{theme}' に文字列でないカードがあります")
+
+    if not isinstance(axis_labels, list) or not axis_labels:
+        raise CatalogError(f"{AXIS_LABELS_FILE}: 軸ラベルのリストが必要です")
+    seen_ids = set()
+    for axis in axis_labels:
+        if not isinstance(axis, dict) or not all(isinstance(axis.get(key), str) for key in ("id", "positive", "negative")):
+            raise CatalogError(f"{AXIS_LABELS_FILE}: id・positive・negative が必要です: {axis!r}")
+        if not isinstance(axis.get("themes"), list):
+            raise CatalogError(f"{AXIS_LABELS_FILE}: '{axis['id']}' の themes がリストではありません")
+        if axis["id"] in seen_ids:
+            raise CatalogError(f"{AXIS_LABELS_FILE}: 軸ID '{axis['id']}' が重複しています")
+        seen_ids.add(axis["id"])
+
+    for theme in pool_by_theme:
+        count = sum(1 for axis in axis_labels if theme in axis["themes"])
+        if count < MIN_AXES_PER_THEME:
+            raise CatalogError(f"{AXIS_LABELS_FILE}: テーマ '{theme}' の軸が{count}本しかありません（{MIN_AXES_PER_THEME}本以上必要）")
+
+
+def load_catalog(data_dir: Path = DATA_DIR, base: Optional[CardCatalog] = None) -> CardCatalog:
+    """定義ファイルからカタログを読み込む（base を渡すと既存カードの ID を引き継ぐ）"""
+    try:
+        with open(data_dir / CARDS_FILE, encoding="utf-8") as f:
+            pool_by_theme = json.load(f)
+        with open(data_dir / AXIS_LABELS_FILE, encoding="utf-8") as f:
+            axis_labels = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise CatalogError(str(e)) from e
+
+    validate_catalog_data(pool_by_theme, axis_labels)
+    return CardCatalog(pool_by_theme, axis_labels, base=base)
+
+
+def data_files_mtime(data_dir: Path = DATA_DIR) -> Tuple[float, ...]:
+    """定義ファイルの更新時刻（ファイル監視用）"""
+    mtimes = []
+    for name in (CARDS_FILE, AXIS_LABELS_FILE):
+        try:
+            mtimes.append((data_dir / name).stat().st_mtime)
+        except OSError:
+            mtimes.append(0.0)
+    return tuple(mtimes)
@@ -0,0 +1,218 @@
+"""WebSocketフレーム・HTTPレスポンスのエンコーディング定義"""
+import gzip
+import json
+import os
+import zlib
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjsonは任意依存
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpackは任意依存
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # brotliは任意依存
+    brotli = None
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    # 整数キーの辞書は標準の json と同じく文字列キーとして出力する
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+# 利用可能なJSONエンコーダ（名前 -> オブジェクトをUTF-8のJSONバイト列にする関数）
+# どちらも区切りの空白なし・非ASCII文字をそのまま出力する（同じ入力に同じ出力）
+JSON_CODECS: Dict[str, Callable[[Any], bytes]] = {"json": _stdlib_dumps}
+if orjson is not None:
+    JSON_CODECS["orjson"] = _orjson_dumps
+
+
+def resolve_json_codec(requested: str = "") -> str:
+    """使用するJSONエンコーダを決める（未指定・未インストールの場合は使える中で最速のもの）"""
+    if requested in JSON_CODECS:
+        return requested
+    return "orjson" if orjson is not None else "json"
+
+
+# HTTPレスポンス・WebSocketフレームで使うJSONエンコーダ（JSON_CODEC=json で標準ライブラリに固定できる）
+JSON_CODEC = resolve_json_codec(os.getenv("JSON_CODEC", ""))
+dumps_bytes: Callable[[Any], bytes] = JSON_CODECS[JSON_CODEC]
+
+
+def dumps(obj: Any) -> str:
+    """オブジェクトをJSONテキストにする（テキストフレーム用）"""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+# compact / msgpack エンコーディングで使う短縮キー
+# クライアントは逆引き表で元のキーに戻す（短縮キーが元のキーと衝突しないこと）
+SHORT_KEYS: Dict[str, str] = {
+    "type": "t",
+    "seq": "s",
+    "events": "e",
+    "previews": "pv",
+    "request_id": "ri",
+    "ok": "k",
+    "status": "st",
+    "error": "er",
+    "result": "rs",
+    "success": "sc",
+    "phase": "ph",
+    "round": "rd",
+    "player_id": "pi",
+    "player_slot": "ps",
+    "player_name": "pn",
+    "card_id": "ci",
+    "quadrant": "qd",
+    "offsets": "of",
+    "voter_slot": "vs",
+    "target_slot": "ts",
+    "new_host_slot": "hs",
+    "new_host_name": "hn",
+    "reason": "rn",
+    "message": "m",
+    "timestamp": "tm",
+    "themes": "th",
+    "hand_size": "hz",
+    "required_placement_count": "rp",
+}
+
+# 利用可能なエンコーディング
+ENCODINGS = ("json", "compact", "msgpack") if msgpack is not None else ("json", "compact")
+
+Frame = Union[str, bytes]
+
+
+def shorten_keys(obj: Any) -> Any:
+    """辞書のキーを再帰的に短縮キーへ置き換える"""
+    if isinstance(obj, dict):
+        return {SHORT_KEYS.get(k, k): shorten_keys(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [shorten_keys(v) for v in obj]
+    return obj
+
+
+def resolve_encoding(requested: str) -> str:
+    """クライアントが要求したエンコーディングを解決（未対応の場合はjson）"""
+    return requested if requested in ENCODINGS else "json"
+
+
+def encode_frame(message: dict, encoding: str = "json") -> Frame:
+    """
+    メッセージを送信用フレームにエンコード
+
+    - json: 従来通りのJSONテキスト
+    - compact: 短縮キーのJSONテキスト
+    - msgpack: 短縮キーのMessagePackバイナリ
+    """
+    if encoding == "compact":
+        return dumps(shorten_keys(message))
+    if encoding == "msgpack":
+        return msgpack.packb(shorten_keys(message), use_bin_type=True)
+    return dumps(message)
+
+
+# 圧縮フレームの先頭1バイト（?compress=deflate で接続したクライアントのバイナリフレームのみ）
+FRAME_RAW = b"\x00"
+FRAME_DEFLATE = b"\x01"
+
+
+def compress_frame(frame: Frame, min_bytes: int, level: int) -> Frame:
+    """
+    min_bytes 以上のフレームを raw deflate で圧縮したバイナリフレームにする
+
+    - 小さいテキストフレームはそのまま（pong や vote_submitted など）
+    - 圧縮したフレーム: 0x01 + raw deflate（ブラウザでは DecompressionStream('deflate-raw') で展開）
+    - 小さいバイナリフレーム: 0x00 + 元のバイト列
+    """
+    data = frame.encode("utf-8") if isinstance(frame, str) else frame
+    if len(data) < min_bytes:
+        return frame if isinstance(frame, str) else FRAME_RAW + data
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) >= len(data):
+        # 圧縮しても小さくならない場合はそのまま送る
+        return frame if isinstance(frame, str) else FRAME_RAW + data
+    return FRAME_DEFLATE + compressed
+
+
+# 事前圧縮するHTTPレスポンスのエンコーディング（優先順）
+CONTENT_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress_body(body: bytes, encoding: str, level: int) -> bytes:
+    """レスポンスボディを圧縮（level は gzip なら圧縮レベル、br なら quality）"""
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level)
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """
+    変化しないレスポンスボディを事前に圧縮する（リクエストごとに圧縮しないため）
+
+    brotli がインストールされている場合は br も作る
+    """
+    variants = {"gzip": compress_body(body, "gzip", 9)}
+    if brotli is not None:
+        variants["br"] = compress_body(body, "br", 11)
+    return variants
+
+
+def _accepted_encodings(accept_encoding: str) -> dict:
+    """Accept-Encoding を {エンコーディング: q値} にする（q値が不正なものは 0 として扱う）"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, *params = (item.strip() for item in part.split(";"))
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str, available) -> Optional[str]:
+    """
+    Accept-Encoding と用意済みの圧縮形式から返すエンコーディングを決める（無ければ None）
+
+    q値が最も大きいものを選び、同じ場合は CONTENT_ENCODINGS の順を優先する。q=0 は受け付けない指定として扱う
+    """
+    accepted = _accepted_encodings(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in CONTENT_ENCODINGS:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def variant_etag(etag: str, encoding: Optional[str]) -> str:
+    """圧縮形式ごとのETag（同じ内容でもエンコーディングが違えば別の表現として扱わせる）"""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match（複数指定・弱いETag・* を含む）が etag に一致するか"""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
@@ -0,0 +1,141 @@
+"""
+イベントループの遅延監視
+
+- LoopLagMonitor.run: 一定間隔で sleep し、予定時刻からの遅れ（スケジューリング遅延）をヒストグラムに記録する
+- ウォッチドッグスレッド: ループが予定時刻を threshold 以上過ぎても戻らない場合、
+  その時点でループのスレッドが実行中のスタックを採取する（フレームのローカル変数から room_code・ルートも取得）
+遅延がない間のコストは interval ごとの sleep 1回と、ウォッチドッグの時刻比較だけ
+"""
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from types import FrameType
+from typing import List, Optional
+
+from metrics import Counter, Histogram
+
+# スタックサンプルに含める最大フレーム数
+MAX_STACK_DEPTH = 40
+
+
+def frame_context(frame: Optional[FrameType]) -> dict:
+    """
+    フレームを内側から順に調べ、最初に見つかった room_code とリクエストのルートを返す
+
+    ルームのコマンド（room_code 引数）や ASGI アプリ（scope 引数）のフレームから取得する
+    """
+    context = {"room_code": None, "route": None}
+    while frame is not None and (context["room_code"] is None or context["route"] is None):
+        local_vars = frame.f_locals
+        room_code = local_vars.get("room_code")
+        if context["room_code"] is None and isinstance(room_code, str):
+            context["room_code"] = room_code
+        scope = local_vars.get("scope")
+        if context["route"] is None and isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            context["route"] = f"{scope.get('method', 'WS')} {scope.get('path', '')}"
+        frame = frame.f_back
+    return context
+
+
+def format_stack(frame: FrameType) -> List[str]:
+    """フレームから外側へのスタックを "ファイル:行 関数名" のリストにする（外側が先頭）"""
+    return [
+        f"{entry.filename}:{entry.lineno} {entry.name}"
+        for entry in traceback.extract_stack(frame, limit=MAX_STACK_DEPTH)
+    ]
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval: float,
+        threshold: float,
+        max_samples: int,
+        lag_histogram: Histogram,
+        slow_counter: Counter
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag_histogram = lag_histogram
+        self.slow_counter = slow_counter
+        # 閾値を超えた遅延の記録（新しいものが末尾）
+        self.slow_events: deque = deque(maxlen=max_samples)
+        # ループが次に起きる予定の時刻（ウォッチドッグが参照する）
+        self._expected_at = time.monotonic()
+        # ウォッチドッグが採取した、現在の遅延中のスタック（予定時刻, サンプル）
+        self._sample: Optional[tuple] = None
+        self._loop_thread_id: Optional[int] = None
+        self._stopped = threading.Event()
+
+    async def run(self):
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        watchdog = threading.Thread(target=self._watchdog, name="loop-lag-watchdog", daemon=True)
+        watchdog.start()
+        try:
+            while True:
+                expected_at = time.monotonic() + self.interval
+                self._expected_at = expected_at
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, time.monotonic() - expected_at)
+                self.lag_histogram.observe(lag)
+                if lag >= self.threshold:
+                    self._record_slow(expected_at, lag)
+        finally:
+            self._stopped.set()
+
+    def _record_slow(self, expected_at: float, lag: float):
+        self.slow_counter.inc()
+        sample = self._sample
+        self._sample = None
+        event = {
+            "at": datetime.now().isoformat(),
+            "lag_ms": round(lag * 1000, 1),
+            "room_code": None,
+            "route": None,
+            "stack": [],
+        }
+        if sample is not None and sample[0] == expected_at:
+            event.update(sample[1])
+        self.slow_events.append(event)
+        print(
+            f"[LOOP] Event loop blocked for {event['lag_ms']}ms "
+            f"(room={event['room_code']}, route={event['route']}, at={event['stack'][-1] if event['stack'] else '-'})",
+            file=sys.stderr
+        )
+
+    def _watchdog(self):
+        """ループが予定時刻を threshold 以上過ぎても戻らない場合に、1回の遅延につき1回スタックを採取する"""
+        poll = max(self.threshold / 2, 0.01)
+        while not self._stopped.wait(poll):
+            expected_at = self._expected_at
+            if time.monotonic() - expected_at < self.threshold:
+                continue
+            if self._sample is not None and self._sample[0] == expected_at:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            try:
+                self._sample = (expected_at, {**frame_context(frame), "stack": format_stack(frame)})
+            finally:
+                del frame
+
+    def snapshot(self) -> dict:
+        """デバッグAPI用の現在の状態"""
+        histogram = self.lag_histogram.snapshot()
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag": {
+                "count": histogram["count"],
+                "mean_ms": round(histogram["sum"] / histogram["count"] * 1000, 3) if histogram["count"] else 0,
+                "max_ms": round(histogram["max"] * 1000, 3),
+                "buckets_seconds": histogram["buckets"],
+            },
+            "slow_events": list(self.slow_events),
+        }
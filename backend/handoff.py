@@ -0,0 +1,57 @@
+"""
+シャットダウン時のゲーム状態の引き継ぎ
+
+終了するプロセスが write_snapshot で状態を書き出し、次に起動したプロセスが read_snapshot で読み込む。
+- gzip 圧縮したJSONを一時ファイルに書いてから置き換えるので、書き込み途中のファイルを読むことはない
+- 読み込んだファイルは .loaded に名前を変える（同じ状態を2回読み込まない）
+- max_age 秒より古いスナップショットは読み込まない（プレイヤーが既に離れている）
+状態の中身（どのストアを含めるか）は呼び出し側が決める
+"""
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+from codec import dumps_bytes
+
+# スナップショットの形式（互換性のない変更をしたら上げる）
+SNAPSHOT_FORMAT = 2
+
+
+def write_snapshot(path: str, state: dict) -> int:
+    """状態を書き出し、書き込んだバイト数を返す"""
+    body = gzip.compress(dumps_bytes({"format": SNAPSHOT_FORMAT, "saved_at": time.time(), "state": state}), compresslevel=6)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(body)
+
+
+def read_snapshot(path: str, max_age: float) -> Optional[dict]:
+    """スナップショットの状態を読み込む（ファイルがない・古い・壊れている場合は None）"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = json.loads(gzip.decompress(f.read()))
+    except (OSError, ValueError) as e:
+        print(f"[HANDOFF] Ignoring unreadable snapshot {path}: {e}", file=sys.stderr)
+        return None
+    finally:
+        try:
+            os.replace(path, f"{path}.loaded")
+        except OSError:
+            pass
+    if snapshot.get("format") != SNAPSHOT_FORMAT:
+        print(f"[HANDOFF] Ignoring snapshot with format {snapshot.get('format')} (expected {SNAPSHOT_FORMAT})", file=sys.stderr)
+        return None
+    age = time.time() - snapshot.get("saved_at", 0)
+    if age > max_age:
+        print(f"[HANDOFF] Ignoring snapshot saved {age:.0f}s ago (max {max_age:.0f}s)", file=sys.stderr)
+        return None
+    return snapshot["state"]
@@ -0,0 +1,96 @@
+"""
+HTTPレスポンスのJSONエンコードと圧縮
+
+- CodecJSONResponse: codec.py のJSONエンコーダ（orjson があれば orjson）で出力するレスポンス
+- CompressionMiddleware: 一定サイズ以上のレスポンスを Accept-Encoding に応じて gzip / br で圧縮する
+"""
+from typing import Any, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from codec import CONTENT_ENCODINGS, compress_body, dumps_bytes, negotiate_encoding
+
+# 実行時に圧縮するレスポンスの Content-Type（画像などは圧縮しても小さくならない）
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "application/x-ndjson", "image/svg+xml", "text/")
+
+
+class CodecJSONResponse(JSONResponse):
+    """codec.dumps_bytes でエンコードするJSONレスポンス（FastAPI の default_response_class 用）"""
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.split(";")[0].strip().lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    レスポンスを実行時に圧縮するASGIミドルウェア
+
+    次の場合は圧縮せずにそのまま返す:
+    - クライアントが gzip / br を受け付けない
+    - 既に Content-Encoding が付いている（事前圧縮済みのカタログ・結果・静的ファイル）
+    - ストリーミングレスポンス（最初のボディが more_body=True。逐次送信を妨げないため）
+    - min_bytes 未満・圧縮対象外の Content-Type・ボディを持たないステータス（204 / 304 など）
+    - 圧縮しても小さくならない
+    """
+    def __init__(self, app: ASGIApp, min_bytes: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.min_bytes = min_bytes
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), CONTENT_ENCODINGS)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        # レスポンス開始メッセージは最初のボディを見るまで保留する（圧縮するならヘッダーを書き換えるため）
+        start_message: Optional[Message] = None
+        decided = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, decided
+            if decided:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            decided = True
+            if message["type"] == "http.response.body":
+                compressed = self._compress(start_message, message, encoding)
+                if compressed is not None:
+                    start_message, message = compressed
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compress(self, start_message: Message, message: Message, encoding: str) -> Optional[Tuple[Message, Message]]:
+        """圧縮する場合は書き換えた (開始メッセージ, ボディメッセージ) を返す"""
+        body: bytes = message.get("body", b"")
+        if message.get("more_body", False) or len(body) < self.min_bytes:
+            return None
+        status = start_message["status"]
+        if status < 200 or status in (204, 304):
+            return None
+        headers = MutableHeaders(raw=list(start_message["headers"]))
+        if "content-encoding" in headers or not is_compressible(headers.get("content-type", "")):
+            return None
+
+        compressed = compress_body(body, encoding, self.levels[encoding])
+        if len(compressed) >= len(body):
+            return None
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        headers.add_vary_header("Accept-Encoding")
+        raw: List[Tuple[bytes, bytes]] = headers.raw
+        return {**start_message, "headers": raw}, {**message, "body": compressed}
@@ -1,43 +1,163 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Header, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Header, Depends, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, field_validator, model_validator
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from typing import Optional, List, Dict, Any, Callable, Tuple
+from datetime import datetime, timedelta, timezone
 from contextlib import asynccontextmanager
 import random
 import asyncio
 import json
-import secrets
+import gzip
+import hashlib
+import hmac
 import os
+import time
+import threading
+import signal
 import sys
 from pathlib import Path
+from collections import deque
+from array import array
 from axis_data import generate_axis_pair, generate_wolf_axis_pair
+from codec import JSON_CODEC, Frame, compress_frame, dumps_bytes, encode_frame, etag_matches, negotiate_encoding, precompress, resolve_encoding, variant_etag
+from http_codec import CodecJSONResponse, CompressionMiddleware
+from tokens import InvalidToken, TokenSigner, parse_signing_keys
+from static_site import StaticSite
+from catalog import CardCatalog, CatalogError, UnknownCard, card_refs, data_files_mtime, load_catalog
+from room_index import RoomFilter, RoomIndex, RoomSummary
+from metrics import registry as metrics
+from diagnostics import LoopLagMonitor
+from profiler import SlowRequestMiddleware, SlowRequestRecorder, format_collapsed, profile_process
+from tracing import Tracer, TracingMiddleware, current_spans, render_timeline
+from traffic import TrafficRecorder, TrafficRecordingMiddleware
+from timers import DeadlineScheduler
+from admission import AdmissionController, close_reason, retry_after_header
+from handoff import read_snapshot, write_snapshot
+from ws_limits import InboundLimiter, message_category, parse_rate_limits
 
 # ライフサイクルイベント管理
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 起動時の処理
     print("[STARTUP] アプリケーション起動中...")
+    # 前のプロセスがシャットダウン時に書き出した状態を引き継ぐ（設定されている場合のみ）
+    if STATE_SNAPSHOT_PATH:
+        state = read_snapshot(STATE_SNAPSHOT_PATH, STATE_SNAPSHOT_MAX_AGE)
+        if state is not None:
+            print(f"[STARTUP] 引き継いだ状態を読み込み: {import_state(state)}ルーム")
+    # 終了シグナルを受けたら、サーバーが接続を閉じる前にドレインする（uvicorn main:app でも python main.py でも）
+    restore_signal_handlers = install_drain_signal_handlers()
     # 定期クリーンアップタスクを開始
     cleanup_task = asyncio.create_task(periodic_cleanup())
     print("[STARTUP] 定期クリーンアップタスク開始")
+    # ドラッグプレビュー配信タスクを開始
+    drag_preview_task = asyncio.create_task(drag_preview_ticker())
+    print("[STARTUP] ドラッグプレビュー配信タスク開始")
+    # カタログ定義ファイルの監視を開始（設定されている場合のみ）
+    catalog_watch_task = None
+    if CATALOG_WATCH_INTERVAL > 0:
+        catalog_watch_task = asyncio.create_task(catalog_watcher())
+        print(f"[STARTUP] カタログ監視タスク開始（{CATALOG_WATCH_INTERVAL}秒間隔）")
+    # フェーズの制限時間を管理するタスクを開始（全ルームで1つ）
+    phase_timer_task = asyncio.create_task(phase_timers.run(on_phase_deadline))
+    print("[STARTUP] フェーズタイマー開始")
+    # イベントループの遅延監視を開始（無効化されていない場合のみ）
+    loop_monitor_task = None
+    if loop_monitor:
+        loop_monitor_task = asyncio.create_task(loop_monitor.run())
+        print(f"[STARTUP] イベントループ遅延監視開始（{LOOP_MONITOR_INTERVAL_MS}ms間隔、閾値{LOOP_SLOW_THRESHOLD_MS}ms）")
+    # 完了したトレースをまとめて書き出す（TRACE_EXPORT_PATH を設定した場合のみ）
+    trace_export_task = None
+    if tracer.enabled and tracer.export_path:
+        trace_export_task = asyncio.create_task(tracer.run())
+    # トラフィックの記録を定期的に書き出す（記録中のみ）
+    traffic_flush_task = None
+    if traffic_recorder:
+        traffic_flush_task = asyncio.create_task(traffic_recorder.run())
 
     yield  # アプリケーション実行中
 
     # シャットダウン時の処理
     print("[SHUTDOWN] アプリケーション終了中...")
+    restore_signal_handlers()
+    # 新しい処理を断り、接続中のクライアントに再接続を案内する（ドレイン済みなら何もしない）
+    await drain_server()
+    if loop_monitor_task:
+        loop_monitor_task.cancel()
+        try:
+            await loop_monitor_task
+        except asyncio.CancelledError:
+            print("[SHUTDOWN] イベントループ遅延監視停止")
+    if catalog_watch_task:
+        catalog_watch_task.cancel()
+        try:
+            await catalog_watch_task
+        except asyncio.CancelledError:
+            print("[SHUTDOWN] カタログ監視タスク停止")
+    phase_timer_task.cancel()
+    try:
+        await phase_timer_task
+    except asyncio.CancelledError:
+        print("[SHUTDOWN] フェーズタイマー停止")
+    # 処理中のコマンドが終わってから状態を書き出す（フェーズの期限は phase_deadline から次のプロセスが再登録する）
+    if STATE_SNAPSHOT_PATH:
+        await wait_for_room_actors(DRAIN_TIMEOUT)
+        try:
+            size = write_snapshot(STATE_SNAPSHOT_PATH, export_state())
+            print(f"[SHUTDOWN] 状態を書き出し: {len(rooms)}ルーム, {size}バイト -> {STATE_SNAPSHOT_PATH}")
+        except OSError as e:
+            print(f"[SHUTDOWN] 状態の書き出しに失敗: {e}", file=sys.stderr)
+    drag_preview_task.cancel()
+    try:
+        await drag_preview_task
+    except asyncio.CancelledError:
+        print("[SHUTDOWN] ドラッグプレビュー配信タスク停止")
     cleanup_task.cancel()
     try:
         await cleanup_task
     except asyncio.CancelledError:
         print("[SHUTDOWN] クリーンアップタスク停止")
-
-app = FastAPI(lifespan=lifespan)
+    if trace_export_task:
+        trace_export_task.cancel()
+        try:
+            await trace_export_task
+        except asyncio.CancelledError:
+            pass
+        tracer.flush_export()
+    if traffic_flush_task:
+        traffic_flush_task.cancel()
+        try:
+            await traffic_flush_task
+        except asyncio.CancelledError:
+            pass
+    if traffic_recorder:
+        traffic_recorder.close()
+
+# レスポンスは codec.py のJSONエンコーダ（orjson があれば orjson）で出力する
+app = FastAPI(lifespan=lifespan, default_response_class=CodecJSONResponse)
 
 # トークン認証を有効化するかどうか（環境変数で制御）
 REQUIRE_TOKEN_AUTH = os.getenv("REQUIRE_TOKEN_AUTH", "false").lower() == "true"
 
+# カード配置の厳格な検証（手札にないカード・配置必須枚数を超える配置を拒否する）
+STRICT_CARD_VALIDATION = os.getenv("STRICT_CARD_VALIDATION", "false").lower() == "true"
+
+# 管理API用のトークン（未設定の場合は管理APIを無効化）
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# トークン署名鍵（"kid:secret,kid:secret" 形式。先頭の鍵で署名し、全ての鍵で検証する）
+# 未設定の場合は起動ごとにランダムな鍵を使う（再起動で既存トークンは無効になる。複数ワーカーでは必ず設定する）
+TOKEN_SIGNING_KEYS = os.getenv("TOKEN_SIGNING_KEYS", "")
+# トークンの有効期限（秒、デフォルトは非アクティブなルームの保持期間と同じ14日）
+TOKEN_TTL_SECONDS = int(os.getenv("TOKEN_TTL_SECONDS", str(14 * 86400)))
+
+if TOKEN_SIGNING_KEYS:
+    token_signer = TokenSigner(parse_signing_keys(TOKEN_SIGNING_KEYS), TOKEN_TTL_SECONDS)
+else:
+    token_signer = TokenSigner.ephemeral(TOKEN_TTL_SECONDS)
+    print("[AUTH] TOKEN_SIGNING_KEYS が未設定のため、ランダムな署名鍵を使用します", file=sys.stderr)
+
 # CORS設定
 # 環境変数から許可するオリジンを取得（本番環境対応）
 ALLOWED_ORIGINS = os.getenv(
@@ -51,143 +171,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # アドミッション制御で断ったときの再試行までの秒数をクライアントから読めるようにする
+    expose_headers=["Retry-After"],
 )
 
-# テーマ別カードプール（フロントエンドのonlineCards.tsと同期）
-# テーママッピング: 'food'/'daily'/'entertainment'/'animal'/'place'/'vehicle'
-CARD_POOL_BY_THEME = {
-    'food': [
-        '寿司', 'ラーメン', 'カレー', 'ピザ', 'ハンバーガー', '天ぷら', 'うどん', 'そば', 'おにぎり', 'たこ焼き',
-        '焼き鳥', '餃子', 'チャーハン', 'パスタ', 'サラダ', 'ステーキ', '焼肉', 'しゃぶしゃぶ', 'お好み焼き', '牛丼',
-        '親子丼', 'カツ丼', 'オムライス', 'カレーパン', 'メロンパン', 'クロワッサン', 'ドーナツ', 'ケーキ', 'プリン', 'アイスクリーム',
-        'チョコレート', 'ポテトチップス', 'せんべい', '団子', '大福', 'たい焼き', 'わたあめ', 'かき氷', 'コーヒー', '紅茶',
-        '緑茶', 'りんご', 'みかん', 'バナナ', 'ぶどう', 'いちご', 'もも', 'なし', 'メロン', 'スイカ',
-        'パイナップル', 'マンゴー', 'キウイ', 'グレープフルーツ', 'レモン', 'オレンジ', 'さくらんぼ', 'ブルーベリー', 'ラズベリー', '柿',
-        '栗', 'アボカド', 'ライチ', 'ドラゴンフルーツ', 'ココナッツ', 'びわ', 'ゆず', 'すだち', 'かぼす', 'いちじく', 'ざくろ',
-        'キャベツ', 'レタス', '白菜', 'ほうれん草', '小松菜', 'ネギ', '玉ねぎ', 'にんじん', '大根', 'じゃがいも',
-        'さつまいも', 'トマト', 'きゅうり', 'なす', 'ピーマン', 'パプリカ', 'ブロッコリー', 'カリフラワー', 'アスパラガス', 'セロリ',
-        'ごぼう', 'れんこん', 'かぼちゃ', 'とうもろこし', '枝豆', 'オクラ', 'にんにく', 'しょうが', 'みょうが', '大葉（しそ）',
-        'パセリ', 'バジル', 'もやし', 'かいわれ大根', '豆苗', 'ズッキーニ', 'ゴーヤ', 'チンゲン菜', 'ニラ', '春菊',
-        'しいたけ', 'えのき', 'しめじ', 'まいたけ', 'エリンギ'
-    ],
-    'daily': [
-        'スマートフォン', 'パソコン', 'テレビ', '冷蔵庫', '洗濯機', 'エアコン', '掃除機', '電子レンジ', '炊飯器', 'ドライヤー',
-        '歯ブラシ', 'シャンプー', 'タオル', 'ティッシュ', 'トイレットペーパー', 'マスク', 'メガネ', '腕時計', '財布', 'カバン',
-        '傘', '靴', '服', '帽子', '手袋', 'マフラー', 'ペン', 'ノート', 'はさみ', 'のり',
-        '定規', '消しゴム', '鉛筆', '本', '雑誌', '新聞', 'カメラ',
-        'ダイヤモンド', '羽毛', '氷', '炎', '鉄', '綿', '岩', '水', 'ガラス', 'ゴム',
-        '木材', 'プラスチック', 'スポンジ', '針', '刀', '盾', '槍', '弓', 'ハンマー', '釘',
-        '筋肉', '骨', '心臓', '脳', '目', '耳', '手', '足',
-        '砂時計', 'コンパス', '地図', '羅針盤', '望遠鏡', '顕微鏡', '時計', 'カレンダー', '電話', 'ラジオ', 'スピーカー',
-        '枕', '布団', 'ベッド', 'ソファ', '椅子', 'テーブル', '机', 'タンス', '本棚', '食器棚',
-        'クローゼット', 'カーテン', 'じゅうたん', 'マット', 'クッション', '毛布', 'シーツ', '掛け布団', '敷布団', '座布団',
-        '箸', 'スプーン', 'フォーク', 'ナイフ', '皿', '茶碗', 'コップ', 'マグカップ', '湯呑み', 'グラス',
-        '鍋', 'フライパン', 'やかん', '包丁', 'まな板', 'おたま', 'フライ返し', '泡立て器', 'ボウル', 'ざる',
-        '計量カップ', '計量スプーン', 'ラップ', 'アルミホイル', 'キッチンペーパー', 'スポンジ', '洗剤', '石鹸', 'ハンドソープ', 'ボディソープ',
-        'リンス', 'トリートメント', '歯磨き粉', 'うがい薬', 'バスタオル', 'フェイスタオル', 'ハンドタオル', 'バスマット', 'トイレマット', 'トイレブラシ',
-        'モップ', 'ほうき', 'ちりとり', 'バケツ', '雑巾', 'ゴミ箱', 'ゴミ袋', 'ビニール袋', '紙袋', 'エコバッグ',
-        '保冷バッグ', 'クーラーボックス', '水筒', 'タンブラー', '弁当箱', 'おはし箱', 'ランチョンマット', 'エプロン', '鏡', '手鏡',
-        'くし', 'ブラシ', 'かみそり', 'シェーバー', '爪切り', '爪やすり', '耳かき', '綿棒', 'ピンセット', '体温計',
-        '血圧計', '体重計', '薬', '絆創膏', '包帯', 'ガーゼ', '消毒液', '目薬', 'コンタクトレンズ', 'サングラス',
-        '老眼鏡', 'イヤホン', 'ヘッドホン', '充電器', 'バッテリー', '電池', '延長コード', 'コンセント', 'スイッチ', 'リモコン',
-        'エアコンフィルター', '加湿器', '除湿機', '空気清浄機', '扇風機', 'ヒーター', 'こたつ', '電気毛布', 'ホットカーペット', '湯たんぽ',
-        'カイロ', 'うちわ', '扇子', '蚊取り線香', '虫除けスプレー', '殺虫剤', '防虫剤', '芳香剤', '消臭剤', 'アロマオイル',
-        'お香', 'ろうそく', 'ライター', 'マッチ', '灰皿', '栓抜き', '缶切り', 'ワインオープナー', 'アイスピック', 'トング',
-        'ピーラー', 'おろし金', 'すり鉢', 'すりこぎ', 'ミキサー', 'ジューサー', 'コーヒーメーカー', 'ポット', '魔法瓶', 'トースター',
-        'ホットプレート', 'たこ焼き器', 'ワッフルメーカー', 'ホームベーカリー', 'アイロン', 'アイロン台', 'ミシン', '針', '糸', 'ボタン',
-        'ファスナー', '安全ピン', 'クリップ', 'ホッチキス', 'ホッチキスの芯', 'セロハンテープ', 'ガムテープ', '両面テープ', 'マスキングテープ', '輪ゴム',
-        'ひも', 'ロープ', 'チェーン', '南京錠', '鍵', 'ドライバー', 'レンチ', 'ペンチ', 'ニッパー', 'のこぎり',
-        'カッター', 'メジャー', '水準器', 'ドリル', 'ネジ', 'ボルト', 'ナット', 'ワッシャー', '接着剤', 'ペンキ',
-        'はけ', 'ローラー', 'サンドペーパー', 'パテ', 'シーリング材', 'ブルーシート', 'ダンボール', '新聞紙', 'コピー用紙', 'メモ帳',
-        '付箋', 'ファイル', 'バインダー', 'クリアファイル', '封筒', '便箋', 'はがき', '切手', '印鑑', '朱肉',
-        'スタンプ', 'インク', '稲妻', '雲', '太陽', '月', '星', '雪', '風', '虹',
-        '晴れ', '曇り', '雨', '台風', '雷', '霧', 'あられ', 'みぞれ', '吹雪', '快晴'
-    ],
-    'entertainment': [
-        '映画', 'アニメ', 'ドラマ', '音楽', 'ゲーム', '漫画', '小説', 'YouTube', 'TikTok', 'Instagram',
-        'Twitter', 'ポッドキャスト', 'ラジオ', 'テレビ番組', 'お笑い', 'ミュージカル', '演劇', 'コンサート', 'フェス', 'カラオケ',
-        'Netflix', 'Disney+', 'Amazon Prime', 'Hulu', 'Spotify', 'Apple Music', 'PlayStation', 'Nintendo Switch', 'Xbox', 'Steam',
-        'VR', 'AR', 'eスポーツ', 'ボードゲーム', 'カードゲーム', 'パズル', 'クイズ', 'なぞなぞ', 'ダンス', 'DJ',
-        'ライブ配信', 'Vtuber', 'アイドル', '声優', 'コスプレ', '同人誌', 'コミケ', 'サーカス', '手品',
-        '落語', '漫才', 'コント', '歌舞伎', '能', '狂言', '宝塚', 'オペラ', 'バレエ', 'ジャズ',
-        'ロック', 'ポップス', 'クラシック（音楽）', 'ヒップホップ', 'EDM', 'K-POP', 'J-POP', '演歌', 'フォークダンス', 'レゲエ',
-        'ブルース', 'カントリー（音楽）', 'ソウル（音楽）', 'R&B', 'メタル（音楽）', 'パンク', 'テクノ（音楽）', 'アンビエント（音楽）', 'ワールドミュージック', 'サウンドトラック',
-        'ピアノ', 'ギター', 'ドラム', 'ベース', 'バイオリン', 'サックス', 'トランペット', 'フルート', 'ハーモニカ', 'ウクレレ',
-        '三味線', '琴', '尺八', '太鼓', 'レコード', 'CD', 'カセットテープ', 'MD', 'ラジカセ', 'ウォークマン',
-    ],
-    'animal': [
-        'ライオン', 'うさぎ', '象', '蟻', '鷹', '亀', 'チーター', 'ナマケモノ', '犬', '猫',
-        '馬', '牛', '豚', '羊', '山羊', '鶏', 'アヒル', '七面鳥', 'ハムスター', 'モルモット',
-        'リス', 'ネズミ', 'コウモリ', 'キツネ', 'タヌキ', 'イタチ', 'アライグマ', 'カワウソ', 'ビーバー', 'ハリネズミ',
-        'モグラ', '熊', 'パンダ', 'コアラ', 'カンガルー', 'ワラビー', 'オポッサム', '虎', 'ヒョウ', 'ジャガー',
-        'ピューマ', '猿', 'ゴリラ', 'チンパンジー', 'オランウータン', 'テナガザル', 'キツネザル', 'メガネザル', 'マンドリル', 'ニホンザル',
-        'キリン', 'シマウマ', 'カバ', 'サイ', 'ラクダ', 'アルパカ', 'リャマ', '鹿', 'トナカイ', 'ヘラジカ',
-        'カモシカ', 'バイソン', 'ヤク', 'イノシシ', 'イボイノシシ', 'アルマジロ', 'アリクイ', 'センザンコウ', 'カピバラ', 'ヤマアラシ',
-        'スカンク', 'アナグマ', 'ラッコ', 'オットセイ', 'アシカ', 'アザラシ', 'セイウチ', 'イルカ', 'クジラ', 'シャチ',
-        'ジュゴン', 'マナティー', 'ペンギン', '白鳥', '鶴', 'フラミンゴ', 'ペリカン', 'カモメ', 'アホウドリ', 'ワシ',
-        'トビ', 'フクロウ', 'ミミズク', 'オウム', 'インコ', 'カナリア', '文鳥', 'スズメ', 'ツバメ', 'カラス',
-        'ハト', 'キジ', 'クジャク', 'ダチョウ', 'エミュー', 'キーウィ', 'カッコウ', 'キツツキ', 'カワセミ', 'ウグイス',
-        'メジロ', 'ヒバリ', 'トンボ', 'バッタ', 'コオロギ', 'カマキリ', 'セミ', 'チョウ', '蛾', 'ハチ',
-        'アブ', 'ハエ', '蚊', 'カブトムシ', 'クワガタ', 'テントウムシ', 'ホタル', 'クモ', 'サソリ', 'ムカデ',
-        'ヤスデ', 'ミミズ', 'カタツムリ', 'ナメクジ', 'タコ', 'イカ', 'エビ', 'カニ', 'ヤドカリ', 'ザリガニ',
-        'クラゲ', 'ヒトデ', 'ウニ', 'ナマコ', 'サンゴ', 'イソギンチャク', 'サメ', 'エイ', 'マグロ', 'カツオ',
-        'サバ', 'アジ', 'イワシ', 'サンマ', 'タイ', 'ヒラメ', 'カレイ', 'フグ', 'アンコウ', 'ウナギ',
-        'アナゴ', 'ハモ', 'ドジョウ', 'ナマズ', 'コイ', 'フナ', '金魚', 'メダカ', 'グッピー', 'ピラニア',
-        'カエル', 'ヒキガエル', 'アマガエル', 'オタマジャクシ', 'サンショウウオ', 'イモリ', 'ヤモリ', 'トカゲ', 'イグアナ', 'カメレオン',
-        'ヘビ', 'コブラ', 'マムシ', 'ニシキヘビ', 'アナコンダ', 'ワニ', 'アリゲーター',
-    ],
-    'place': [
-        '城', '小屋', '高層ビル', 'テント', '橋', 'トンネル', '山', '谷', '海', '川',
-        '湖', '砂漠', '森', '草原', '洞窟', '火山', '氷山', '地球', '宇宙',
-        '東京', '大阪', '名古屋', '横浜', '京都', '神戸', '札幌', '福岡', '仙台', '広島',
-        '川崎', 'さいたま', '千葉', '北九州', '堺', '新潟', '浜松', '熊本', '相模原', '岡山',
-        '静岡', '船橋', '鹿児島', '八王子', '宇都宮', '松山', '金沢', '長崎', '那覇', '富山',
-        'アメリカ', '中国', '韓国', 'インド', 'ロシア', 'イギリス', 'フランス', 'ドイツ', 'イタリア', 'スペイン',
-        'カナダ', 'オーストラリア', 'ブラジル', 'メキシコ', 'アルゼンチン', 'インドネシア', 'タイ', 'ベトナム', 'フィリピン', 'シンガポール',
-        'マレーシア', 'トルコ', 'エジプト', '南アフリカ', 'ナイジェリア', 'ケニア', 'エチオピア', 'モロッコ', 'サウジアラビア', 'イラン',
-        'イスラエル', 'UAE', 'オランダ', 'ベルギー', 'スイス', 'オーストリア', 'スウェーデン', 'ノルウェー', 'デンマーク', 'フィンランド',
-        'ポーランド', 'チェコ', 'ハンガリー', 'ギリシャ', 'ポルトガル', 'アイルランド', 'ニュージーランド', 'チリ', 'ペルー', 'コロンビア',
-        'ベネズエラ', 'キューバ', 'ジャマイカ', 'パキスタン', 'バングラデシュ', 'スリランカ', 'ネパール', 'ミャンマー', 'カンボジア', 'ラオス',
-        'モンゴル', '台湾', '香港', 'マカオ', 'ウクライナ', 'ルーマニア', 'ブルガリア', 'クロアチア', 'セルビア', 'スロバキア', 'スロベニア',
-        '東京タワー', '東京スカイツリー', '富士山', '清水寺', '金閣寺', '伏見稲荷大社', '厳島神社', '姫路城', '大阪城', '名古屋城',
-        '浅草寺', '東大寺', '日光東照宮', '出雲大社', '伊勢神宮', '平等院', '法隆寺', '原爆ドーム', '首里城', '札幌時計台',
-        'エッフェル塔', '凱旋門', 'ルーブル美術館', 'ノートルダム大聖堂', 'ベルサイユ宮殿', 'ビッグベン', 'タワーブリッジ', 'バッキンガム宮殿', 'ウェストミンスター寺院', 'ストーンヘンジ',
-        '自由の女神', 'エンパイアステートビル', 'ゴールデンゲートブリッジ', 'ホワイトハウス', 'グランドキャニオン', 'ナイアガラの滝', 'ラシュモア山', 'ハリウッドサイン', 'タイムズスクエア', 'セントラルパーク',
-        '万里の長城', '紫禁城', '天安門', '兵馬俑', 'タージマハル', 'アンコールワット', 'ボロブドゥール', 'ペトロナスツインタワー', 'マリーナベイサンズ', 'ブルジュハリファ',
-        'ピラミッド', 'スフィンクス', 'コロッセオ', 'ピサの斜塔', 'サグラダファミリア', 'アルハンブラ宮殿', 'パルテノン神殿', 'アクロポリス', 'モンサンミッシェル', 'ノイシュバンシュタイン城',
-        'オペラハウス', 'ハーバーブリッジ', 'エアーズロック', 'マチュピチュ', 'イースター島のモアイ', 'クライストチャーチ大聖堂', 'チチェンイッツァ', 'テオティワカン', 'リオのキリスト像'
-    ],
-    'vehicle': [
-        '軽自動車', '普通自動車', '高級車', 'スポーツカー', 'ワゴン車', 'ミニバン', 'SUV', 'トラック', 'バス', 'タクシー',
-        'パトカー', '救急車', '消防車', 'ショベルカー', 'ブルドーザー', 'クレーン車', '新幹線', '特急電車', '普通電車', '地下鉄',
-        '路面電車', 'モノレール', '蒸気機関車', '旅客機', '戦闘機', 'ヘリコプター', '気球', 'ロケット', '宇宙船', '客船',
-        'タンカー', '漁船', 'ヨット', 'カヌー', '水上バイク', '潜水艦', 'フェリー', '原付バイク', 'オートバイ', '電動自転車',
-        '三輪車', '一輪車', 'スケートボード', 'キックボード', 'セグウェイ', '車椅子', 'ベビーカー', 'リヤカー', '馬車',
-        'ダンプカー', 'ミキサー車', 'ゴミ収集車', 'タンクローリー', 'レッカー車', 'フォークリフト', 'トレーラー', 'コンテナ車', 'キャンピングカー', 'リムジン',
-        'オープンカー', 'クーペ', 'セダン', 'ハッチバック', 'ピックアップトラック', 'バギー', 'ゴーカート', 'F1カー', 'ラリーカー', 'ドリフトカー',
-        'スクーター', 'ビッグバイク', 'オフロードバイク', 'トライク', 'サイドカー', 'ローラースケート', 'インラインスケート', 'スクートバイク', 'ホバーボード', 'トロリーバス',
-        '2階建てバス', '連節バス', 'スクールバス', '観光バス', 'リニアモーターカー', 'ケーブルカー', 'トロッコ', '貨物列車', '寝台列車', '観光列車',
-        'ディーゼル車', '輸送機', 'グライダー', '飛行船', 'ドローン', '水上飛行機', 'ジェット機', 'プロペラ機', 'オスプレイ', 'ジャイロコプター',
-        '宇宙ステーション', '自動車', '自転車', 'バイク', '電車', '飛行機', '船', 'ロープウェイ', '人力車'
-    ],
-    'sport': [
-        'サッカー', '野球', 'バスケットボール', 'テニス', 'ゴルフ', '水泳', '陸上', '体操', '柔道', '剣道',
-        '空手', 'ボクシング', 'バドミントン', '卓球', 'バレーボール', 'ラグビー', 'スキー', 'スノーボード', 'スケート', 'サーフィン',
-        'アメフト', 'ホッケー', 'アイスホッケー', 'ハンドボール', 'ソフトボール', 'クリケット', 'ボウリング', 'ビリヤード', 'ダーツ', 'アーチェリー',
-        '射撃', 'フェンシング', 'レスリング', '相撲', '合気道', 'テコンドー', 'キックボクシング', '総合格闘技', 'プロレス', 'ウエイトリフティング',
-        'パワーリフティング', 'ボディビル', 'クロスフィット', 'ヨガ', 'ピラティス', 'エアロビクス', 'ズンバ', 'マラソン', '駅伝', 'トライアスロン',
-        '競歩', 'ハードル', '走り幅跳び', '走り高跳び', '棒高跳び', '砲丸投げ', 'やり投げ', '円盤投げ', 'ハンマー投げ', '十種競技',
-        '七種競技', '新体操', 'トランポリン', '鉄棒', 'あん馬', '平行棒', 'つり輪', '跳馬', '平均台', 'シンクロナイズドスイミング',
-        '飛込み', '水球', 'フィンスイミング', 'カヌー', 'カヤック', 'ボート', 'ヨット', 'ウィンドサーフィン', 'カイトサーフィン', 'ウェイクボード',
-        '水上スキー', 'スキューバダイビング', 'シュノーケリング', 'フリーダイビング', 'クロスカントリースキー', 'スキージャンプ', 'バイアスロン', 'フィギュアスケート', 'スピードスケート', 'ショートトラック',
-        'カーリング', 'ボブスレー', 'リュージュ', 'スケルトン', 'ロッククライミング', 'ボルダリング', '登山', 'トレッキング', 'サイクリング', 'BMX'
-    ],
-}
+# HTTPレスポンスの圧縮（HTTP_COMPRESS_MIN_BYTES 以上のJSON・テキストを gzip / br で圧縮する）
+HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+app.add_middleware(
+    CompressionMiddleware,
+    min_bytes=HTTP_COMPRESS_MIN_BYTES,
+    gzip_level=int(os.getenv("HTTP_COMPRESS_LEVEL", "6")),
+    brotli_quality=int(os.getenv("HTTP_BROTLI_QUALITY", "4")),
+)
+# 遅いリクエストのプロファイル（SLOW_REQUEST_PROFILE_MS 以上かかったHTTPリクエスト・WebSocketメッセージ。0 = 無効）
+SLOW_REQUEST_PROFILE_MS = float(os.getenv("SLOW_REQUEST_PROFILE_MS", "0"))
+slow_requests = SlowRequestRecorder(
+    threshold=SLOW_REQUEST_PROFILE_MS / 1000,
+    interval=float(os.getenv("SLOW_REQUEST_SAMPLE_MS", "5")) / 1000,
+    max_profiles=int(os.getenv("SLOW_REQUEST_PROFILES", "20")),
+)
+if slow_requests.enabled:
+    app.add_middleware(SlowRequestMiddleware, recorder=slow_requests)
+
+# リクエストからブロードキャストまでのトレース（TRACE_SAMPLE_RATE の割合のHTTPリクエスト・WebSocketメッセージを記録。0 = 無効）
+tracer = Tracer(
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0")),
+    max_traces=int(os.getenv("TRACE_BUFFER", "200")),
+    export_path=os.getenv("TRACE_EXPORT_PATH", ""),
+)
+if tracer.enabled:
+    app.add_middleware(TracingMiddleware, tracer=tracer)
 
-# 全カードプール（後方互換性のため）
-CARD_POOL = []
-for theme_cards in CARD_POOL_BY_THEME.values():
-    CARD_POOL.extend(theme_cards)
+# 実トラフィックの記録（TRAFFIC_RECORD_PATH を設定した場合のみ。再生は python traffic.py replay）
+TRAFFIC_RECORD_PATH = os.getenv("TRAFFIC_RECORD_PATH", "")
+traffic_recorder = TrafficRecorder(TRAFFIC_RECORD_PATH) if TRAFFIC_RECORD_PATH else None
+if traffic_recorder:
+    app.add_middleware(TrafficRecordingMiddleware, recorder=traffic_recorder)
+    print(f"[TRAFFIC] Recording room traffic to {TRAFFIC_RECORD_PATH}", file=sys.stderr)
+
+print(f"[CODEC] json={JSON_CODEC}, http compression >= {HTTP_COMPRESS_MIN_BYTES} bytes", file=sys.stderr)
+
+# カードカタログ（data/cards.json・data/axis_labels.json から読み込む。手札・配置はカードIDで保持する）
+# card_catalog は新しいラウンドで使う最新版。実行中に reload_catalog で差し替えられる
+card_catalog = load_catalog()
+# バージョン -> カタログ（進行中のラウンドが開始時のバージョンを使い続けるために保持）
+catalogs: Dict[str, CardCatalog] = {card_catalog.version: card_catalog}
+print(f"[CATALOG] {len(card_catalog)} cards, {len(card_catalog.axis_labels)} axis labels, version={card_catalog.version}", file=sys.stderr)
+
+# 定義ファイルの監視間隔（秒、0の場合は監視しない。管理APIからの再読み込みは常に可能）
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "0"))
 
 def select_theme_from_list(themes: List[str], seed: int) -> str:
     """
@@ -210,51 +242,26 @@ def select_theme_from_list(themes: List[str], seed: int) -> str:
     rng = random.Random(seed)
     return rng.choice(themes)
 
-def get_filtered_card_pool(themes: Optional[List[str]] = None, seed: Optional[int] = None) -> List[str]:
-    """
-    テーマに基づいてフィルタリングされたカードプールを取得
-
-    - themes が None または空の場合: 全カード
-    - 'chaos' が含まれる場合: 全テーマのカードを混合（カオスモード）
-    - 単一テーマの場合: そのテーマのカードのみ
-    - 複数テーマの場合: seedを使って1つのテーマをランダムに選択
-    """
-    if not themes:
-        return CARD_POOL.copy()
-
-    # カオスモードチェック
-    if 'chaos' in themes:
-        return CARD_POOL.copy()
-
-    # 単一テーマの場合
-    if len(themes) == 1:
-        theme = themes[0]
-        if theme in CARD_POOL_BY_THEME:
-            return CARD_POOL_BY_THEME[theme].copy()
-        return CARD_POOL.copy()
-
-    # 複数テーマの場合: seedを使って1つランダムに選択
-    if seed is not None:
-        rng = random.Random(seed)
-        selected_theme = rng.choice(themes)
-        if selected_theme in CARD_POOL_BY_THEME:
-            return CARD_POOL_BY_THEME[selected_theme].copy()
-
-    # フォールバック: 全カード
-    return CARD_POOL.copy()
-
-def generate_all_hands(round_seed: str, player_slots: List[int], hand_size: int = 5, themes: Optional[List[str]] = None) -> Dict[int, List[str]]:
+def generate_all_hands(
+    round_seed: str,
+    player_slots: List[int],
+    hand_size: int = 5,
+    themes: Optional[List[str]] = None,
+    catalog: Optional[CardCatalog] = None
+) -> Dict[int, array]:
     """
     全プレイヤーの手札を一度に生成（重複なし、テーマフィルタ対応）
     player_slots: 実際のプレイヤースロット番号のリスト（例: [0, 2, 3]）
+    手札はカードIDの整数配列（カード名は card_catalog.resolve で取得）
+    catalog を省略した場合は最新のカタログを使う
     """
     rng = random.Random(int(round_seed))
 
     # テーマに応じたカードプールを取得（seedを渡してテーマ選択）
-    card_pool = get_filtered_card_pool(themes, int(round_seed))
+    card_pool = (catalog or card_catalog).pool(themes, int(round_seed))
 
     # カードプールをシャッフル
-    shuffled_cards = card_pool.copy()
+    shuffled_cards = list(card_pool)
     rng.shuffle(shuffled_cards)
 
     # 各プレイヤーに配布（実際のスロット番号を使用）
@@ -265,29 +272,75 @@ def generate_all_hands(round_seed: str, player_slots: List[int], hand_size: int
 
         # カードが足りない場合は循環して使用
         if end_idx <= len(shuffled_cards):
-            hands[player_slot] = shuffled_cards[start_idx:end_idx]
+            hands[player_slot] = card_refs(shuffled_cards[start_idx:end_idx])
         else:
             # カードプールが足りない場合は、再度シャッフルして追加
             remaining = hand_size - (len(shuffled_cards) - start_idx)
-            hands[player_slot] = shuffled_cards[start_idx:] + shuffled_cards[:remaining]
+            hands[player_slot] = card_refs(shuffled_cards[start_idx:] + shuffled_cards[:remaining])
 
     return hands
 
-def generate_hand(player_slot: int, round_seed: str, player_slots: List[int], hand_size: int = 5, themes: Optional[List[str]] = None) -> List[str]:
+def generate_hand(player_slot: int, round_seed: str, player_slots: List[int], hand_size: int = 5, themes: Optional[List[str]] = None) -> array:
     """
     特定プレイヤーの手札を生成（重複なしで配布、テーマフィルタ対応）
     player_slots: 実際のプレイヤースロット番号のリスト（例: [0, 2, 3]）
     """
     all_hands = generate_all_hands(round_seed, player_slots, hand_size, themes)
-    return all_hands.get(player_slot, [])
+    return all_hands.get(player_slot, card_refs(()))
+
+def plan_round(themes: List[str], player_slots: List[int], hand_size: int, seed: int, catalog: CardCatalog) -> dict:
+    """
+    1ラウンド分の乱数結果（テーマ・軸・人狼・手札）をまとめて生成
+
+    シード値から決定的に求まる純粋関数なので、バックグラウンドスレッドで事前計算できる
+    """
+    selected_theme = select_theme_from_list(themes, seed)
+    normal_axis = generate_axis_pair(themes, seed, catalog.axis_labels)
+    wolf_axis = generate_wolf_axis_pair(normal_axis, themes, seed, catalog.axis_labels)
+
+    # 人狼を決定（実際のプレイヤースロットを使用）
+    wolf_slot = None
+    if player_slots:
+        rng = random.Random(seed)
+        wolf_index = rng.randint(0, len(player_slots) - 1)
+        wolf_slot = player_slots[wolf_index]
 
-def generate_token() -> str:
+    return {
+        "seed": seed,
+        "selected_theme": selected_theme,
+        "axis_payload": normal_axis,
+        "wolf_axis_payload": wolf_axis,
+        "wolf_slot": wolf_slot,
+        "player_slots": player_slots,
+        "hands": generate_all_hands(str(seed), player_slots, hand_size, themes, catalog),
+        "catalog_version": catalog.version,
+    }
+
+def generate_token(player_id: str, room_code: str) -> str:
+    """
+    署名付きトークンを生成（player_id・ルーム・有効期限を含む）
     """
-    安全なトークンを生成
+    return token_signer.issue(player_id, room_code)
+
+def check_token(token: str, player_id: str, room_code: Optional[str] = None) -> str:
     """
-    return secrets.token_urlsafe(32)
+    トークンの署名・有効期限・対象プレイヤー（・ルーム）を検証し、エラー内容を返す（正常な場合は空文字列）
+
+    共有ストレージを参照しないので、どのワーカーでも同じ結果になる
+    """
+    try:
+        claims = token_signer.verify(token)
+    except InvalidToken as e:
+        return f"{e}. Please rejoin the room."
+
+    if not hmac.compare_digest(claims.player_id.encode("utf-8"), player_id.encode("utf-8")):
+        return "Invalid token. Please rejoin the room."
+    if room_code is not None and claims.room_code != room_code:
+        return "Token is not valid for this room. Please rejoin the room."
+    return ""
 
 async def verify_player_token(
+    request: Request,
     player_id: str = Query(...),
     authorization: Optional[str] = Header(None),
     token: Optional[str] = Query(None)
@@ -299,6 +352,7 @@ async def verify_player_token(
     1. Authorizationヘッダー（"Bearer {token}" 形式）
     2. クエリパラメータ token={token}（WebSocket用）
 
+    パスに room_code がある場合は、そのルーム用に発行されたトークンかも確認する
     REQUIRE_TOKEN_AUTH=false の場合は検証をスキップ
     """
     # トークン認証が無効の場合はスキップ
@@ -322,23 +376,26 @@ async def verify_player_token(
             detail="Authentication required. Please provide a valid token."
         )
 
-    # player_idに対応するトークンを確認
-    stored_token = player_tokens.get(player_id)
-    if not stored_token:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid player_id. Please rejoin the room."
-        )
-
-    # トークンを照合
-    if stored_token != extracted_token:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid token. Please rejoin the room."
-        )
+    # 署名・有効期限・プレイヤー・ルームを照合
+    with tracer.span("auth.verify_token", player_id=player_id):
+        error = check_token(extracted_token, player_id, request.path_params.get("room_code"))
+    if error:
+        raise HTTPException(status_code=401, detail=error)
 
     return player_id
 
+async def verify_admin(authorization: Optional[str] = Header(None)):
+    """
+    管理APIのトークンを検証する依存関数（Authorizationヘッダーの "Bearer {ADMIN_TOKEN}"）
+
+    ADMIN_TOKEN が未設定の場合は管理API自体を無効にする
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    provided = authorization[7:] if authorization and authorization.startswith("Bearer ") else ""
+    if not hmac.compare_digest(provided.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 class VerifyHostToken:
     """
     ホストのトークンを検証する依存クラス
@@ -350,12 +407,13 @@ class VerifyHostToken:
 
     async def __call__(
         self,
+        request: Request,
         player_id: str = Query(...),
         authorization: Optional[str] = Header(None),
         token: Optional[str] = Query(None)
     ) -> str:
         # まずプレイヤートークンを検証
-        verified_player_id = await verify_player_token(player_id, authorization, token)
+        verified_player_id = await verify_player_token(request, player_id, authorization, token)
 
         # トークン認証が無効の場合は、ここでもホストチェックをスキップ
         if not REQUIRE_TOKEN_AUTH:
@@ -386,11 +444,114 @@ players: Dict[str, List[dict]] = {}
 cards: Dict[str, List[dict]] = {}
 votes: Dict[str, List[dict]] = {}
 chat_messages: Dict[str, List[dict]] = {}  # room_code -> チャットメッセージリスト
-player_tokens: Dict[str, str] = {}  # player_id -> token の対応
-cached_results: Dict[str, dict] = {}  # room_code + round -> 計算結果のキャッシュ
+cached_results: Dict[str, dict] = {}  # room_code -> 計算結果のキャッシュ（ラウンド番号・エンコード済みバイト列・ETag）
+event_seq: Dict[str, int] = {}  # room_code -> 最後にブロードキャストしたイベントのシーケンス番号
+round_hands: Dict[str, dict] = {}  # room_code -> 現ラウンドの全手札キャッシュ
+placed_index: Dict[str, dict] = {}  # room_code -> スロットごとの配置済みカード集合（cards の索引）
+# room_code -> 結果フェーズ中に事前計算している次ラウンドの計画（fingerprint と計算タスク）
+next_round_plans: Dict[str, dict] = {}
+# room_code -> (player_slot, カードID) -> 最新のドラッグ位置（永続化しない、次のティックで配信して破棄）
+drag_previews: Dict[str, Dict[Tuple[int, int], dict]] = {}
+
+# ドラッグプレビューを配信する間隔（ミリ秒）
+DRAG_PREVIEW_TICK_MS = int(os.getenv("DRAG_PREVIEW_TICK_MS", "100"))
+
+# アプリ側のWebSocketフレーム圧縮（WS_APP_COMPRESSION=true の場合に ?compress=deflate で接続したクライアントのみ）
+# トランスポート層の permessage-deflate と二重に圧縮しないよう、デフォルトでは無効（有効にする場合は
+# --ws-per-message-deflate false で起動する）。bench.py ws-compression での削減量は閾値1024バイトで約2%
+WS_APP_COMPRESSION = os.getenv("WS_APP_COMPRESSION", "false").lower() == "true"
+# この値より小さいフレーム（pong / vote_submitted など）は圧縮しない
+WS_COMPRESS_MIN_BYTES = int(os.getenv("WS_COMPRESS_MIN_BYTES", "1024"))
+WS_COMPRESS_LEVEL = int(os.getenv("WS_COMPRESS_LEVEL", "6"))
+
+# スナップショットで返すチャット履歴の件数
+SNAPSHOT_CHAT_TAIL = int(os.getenv("SNAPSHOT_CHAT_TAIL", "50"))
+
+# ルームごとのアクター（変更コマンドを直列に実行する。処理中のルームのみ存在）
+room_actors: Dict[str, "RoomActor"] = {}
+
+# 管理API用のルーム一覧（ルームの作成時・アクターのバッチ適用後に集計値を更新する）
+room_index = RoomIndex()
+
+# イベントループの遅延監視（LOOP_MONITOR_INTERVAL_MS=0 で無効）
+# 予定より LOOP_SLOW_THRESHOLD_MS 以上遅れた場合、実行中のスタックと room_code・ルートを記録する
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100"))
+LOOP_SLOW_THRESHOLD_MS = float(os.getenv("LOOP_SLOW_THRESHOLD_MS", "100"))
+LOOP_SLOW_SAMPLES = int(os.getenv("LOOP_SLOW_SAMPLES", "50"))
+loop_monitor = LoopLagMonitor(
+    interval=LOOP_MONITOR_INTERVAL_MS / 1000,
+    threshold=LOOP_SLOW_THRESHOLD_MS / 1000,
+    max_samples=LOOP_SLOW_SAMPLES,
+    lag_histogram=metrics.histogram(
+        "event_loop_lag_seconds", "Delay between scheduled and actual wake-up of the loop monitor",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    ),
+    slow_counter=metrics.counter("event_loop_slow_total", "Loop stalls longer than LOOP_SLOW_THRESHOLD_MS"),
+) if LOOP_MONITOR_INTERVAL_MS > 0 else None
+
+# フェーズの制限時間（秒、0 = 無制限）。新しいルームのデフォルトで、ルームごとにゲーム設定で変更できる
+# 制限時間を過ぎると phase_timeout を通知して次のフェーズ（配置 -> 投票 -> 結果）に自動で進む
+PLACEMENT_TIME_LIMIT = int(os.getenv("PLACEMENT_TIME_LIMIT", "0"))
+VOTING_TIME_LIMIT = int(os.getenv("VOTING_TIME_LIMIT", "0"))
+MAX_PHASE_TIME_LIMIT = 3600
+# 制限時間のあるフェーズ -> 時間切れで進むフェーズ
+PHASE_TIMEOUT_NEXT = {"placement": "voting", "voting": "results"}
+
+# 全ルームのフェーズの期限（room_code -> (フェーズ, ラウンド)）。1つのタスクで管理する
+phase_timers = DeadlineScheduler()
+
+# アドミッション制御（0 = 無制限）。上限を超えたルーム作成・参加は 503（Retry-After 付き）、
+# WebSocket接続は 1013（理由に再試行までの秒数）で断る。進行中のゲームを新しいロビーより優先する
+admission = AdmissionController(
+    max_rooms=int(os.getenv("ADMISSION_MAX_ROOMS", "0")),
+    max_connections=int(os.getenv("ADMISSION_MAX_CONNECTIONS", "0")),
+    connect_rate=float(os.getenv("ADMISSION_CONNECT_RATE", "0")),
+    connect_burst=float(os.getenv("ADMISSION_CONNECT_BURST", "50")),
+    lobby_share=float(os.getenv("ADMISSION_LOBBY_SHARE", "0.8")),
+    retry_after=float(os.getenv("ADMISSION_RETRY_AFTER", "2")),
+    retry_jitter=float(os.getenv("ADMISSION_RETRY_JITTER", "1.0")),
+    rejected_counter=metrics.counter(
+        "admission_rejected_total", "Requests and connections refused by admission control", labelnames=("kind", "reason")
+    ),
+)
+
+# WebSocketの受信制限（接続ごと）
+# WS_MAX_FRAME_BYTES を超えるフレームを受信したら 1009 で切断する
+WS_MAX_FRAME_BYTES = int(os.getenv("WS_MAX_FRAME_BYTES", "32768"))
+# uvicorn がトランスポート層で拒否するフレームのサイズ（起動コマンドの --ws-max-size にも同じ値を指定する）
+WS_TRANSPORT_MAX_BYTES = max(WS_MAX_FRAME_BYTES * 4, 65536)
+# 種類ごとの受信レート（"chat=1/5,ping=1/5,drag_preview=30/30,command=10/20,other=5/10" 形式、毎秒の件数/バースト）
+WS_RATE_LIMITS = parse_rate_limits(os.getenv("WS_RATE_LIMITS", ""))
+# 違反（レート超過・不正なメッセージ）の許容量。使い切った接続は 1008 で切断する
+WS_VIOLATION_RATE = float(os.getenv("WS_VIOLATION_RATE", "1"))
+WS_VIOLATION_BURST = float(os.getenv("WS_VIOLATION_BURST", "20"))
+ws_violations = metrics.counter(
+    "ws_inbound_violations_total", "Inbound WebSocket messages dropped by per-connection limits", labelnames=("category", "reason")
+)
+ws_abuse_disconnects = metrics.counter(
+    "ws_abuse_disconnects_total", "WebSocket connections closed for oversized frames or repeated violations", labelnames=("reason",)
+)
 
-# ルームごとのロック（レースコンディション防止用）
-room_locks: Dict[str, asyncio.Lock] = {}
+# チャットメッセージの最大文字数と、ルームごとに保持する件数（古いものから捨てる）
+CHAT_MAX_LENGTH = int(os.getenv("CHAT_MAX_LENGTH", "500"))
+CHAT_HISTORY_LIMIT = int(os.getenv("CHAT_HISTORY_LIMIT", "200"))
+
+# ドレインと状態の引き継ぎ
+# STATE_SNAPSHOT_PATH を設定すると、シャットダウン時にゲーム状態を書き出し、次の起動時に読み込む
+# （トークンを引き継ぐため TOKEN_SIGNING_KEYS も固定すること）
+STATE_SNAPSHOT_PATH = os.getenv("STATE_SNAPSHOT_PATH", "")
+STATE_SNAPSHOT_MAX_AGE = float(os.getenv("STATE_SNAPSHOT_MAX_AGE", "600"))
+# ドレイン時にクライアントへ案内する再接続までの時間（DRAIN_RECONNECT_MS に 0〜DRAIN_RECONNECT_JITTER_MS を加える）
+DRAIN_RECONNECT_MS = int(os.getenv("DRAIN_RECONNECT_MS", "3000"))
+DRAIN_RECONNECT_JITTER_MS = int(os.getenv("DRAIN_RECONNECT_JITTER_MS", "5000"))
+# 状態を書き出す前に処理中のコマンドの完了を待つ最大秒数
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "5"))
+if STATE_SNAPSHOT_PATH and not TOKEN_SIGNING_KEYS:
+    print("[HANDOFF] TOKEN_SIGNING_KEYS が未設定のため、引き継いだプレイヤーのトークンは次のプロセスで無効になります", file=sys.stderr)
+
+# 管理APIのルーム一覧: 1ページの最大件数と、1回の呼び出しで調べる最大ルーム数
+ADMIN_ROOMS_MAX_LIMIT = 1000
+ADMIN_ROOMS_SCAN_LIMIT = int(os.getenv("ADMIN_ROOMS_SCAN_LIMIT", "10000"))
 
 # WebSocket接続管理
 class ConnectionManager:
@@ -400,9 +561,21 @@ class ConnectionManager:
         self.player_connections: Dict[str, WebSocket] = {}
         # WebSocket -> player_id の逆引き
         self.websocket_to_player: Dict[WebSocket, str] = {}
-
-    async def connect(self, websocket: WebSocket, room_code: str, player_id: str = None):
+        # WebSocket -> クライアントが対応するプロトコルバージョン
+        self.protocol_versions: Dict[WebSocket, int] = {}
+        # WebSocket -> フレームのエンコーディング（json / compact / msgpack）
+        self.encodings: Dict[WebSocket, str] = {}
+        # WebSocket -> 大きいフレームを圧縮して送るかどうか
+        self.compression: Dict[WebSocket, bool] = {}
+        # room_code -> バッチ中に溜まったイベント / バッチのネスト数
+        self.pending_batches: Dict[str, List[dict]] = {}
+        self.batch_depth: Dict[str, int] = {}
+
+    async def connect(self, websocket: WebSocket, room_code: str, player_id: str = None, protocol: int = 1, encoding: str = "json", compress: bool = False):
         await websocket.accept()
+        self.protocol_versions[websocket] = protocol
+        self.encodings[websocket] = encoding
+        self.compression[websocket] = compress
 
         # 同じplayer_idの古い接続があれば削除
         if player_id and player_id in self.player_connections:
@@ -414,6 +587,9 @@ class ConnectionManager:
             # 逆引きマップから削除
             if old_ws in self.websocket_to_player:
                 del self.websocket_to_player[old_ws]
+            self.protocol_versions.pop(old_ws, None)
+            self.encodings.pop(old_ws, None)
+            self.compression.pop(old_ws, None)
             # 古い接続をクローズ
             try:
                 await old_ws.close(1000, "New connection from same player")
@@ -439,6 +615,9 @@ class ConnectionManager:
             if player_id in self.player_connections:
                 del self.player_connections[player_id]
             del self.websocket_to_player[websocket]
+        self.protocol_versions.pop(websocket, None)
+        self.encodings.pop(websocket, None)
+        self.compression.pop(websocket, None)
 
     def get_online_players(self, room_code: str) -> List[str]:
         """ルーム内のオンラインプレイヤーIDのリストを返す"""
@@ -449,16 +628,448 @@ class ConnectionManager:
                     online_player_ids.append(self.websocket_to_player[ws])
         return online_player_ids
 
-    async def broadcast(self, room_code: str, message: dict):
+    async def broadcast(self, room_code: str, message: dict, ephemeral: bool = False):
+        # イベントにシーケンス番号を付与（再接続時のスナップショットとの突き合わせ用）
+        # ドラッグプレビューなどの一時的なメッセージは状態を変えないので番号を振らない
+        if not ephemeral:
+            seq = event_seq.get(room_code, 0) + 1
+            event_seq[room_code] = seq
+            message = {**message, "seq": seq}
+
+        # バッチ中は溜めておき、バッチ終了時にまとめて送信
+        if self.batch_depth.get(room_code):
+            self.pending_batches[room_code].append(message)
+            return
+
         if room_code in self.active_connections:
-            for connection in self.active_connections[room_code]:
+            connections = self.active_connections[room_code]
+            with tracer.span("broadcast", type=message.get("type"), recipients=len(connections)):
+                # エンコード・圧縮はフレーム形式ごとに1回だけ行い、全受信者で共有
+                frames: Dict[Tuple[str, bool], Frame] = {}
+                for connection in connections:
+                    frame_format = self._frame_format(connection)
+                    if frame_format not in frames:
+                        with tracer.span("broadcast.encode", encoding=frame_format[0], compress=frame_format[1]):
+                            frames[frame_format] = self._encode(message, frame_format)
+                    try:
+                        with tracer.span("ws.send", player_id=self.websocket_to_player.get(connection)):
+                            await self._send_frame(connection, frames[frame_format])
+                    except:
+                        pass
+
+    async def send_personal(self, websocket: WebSocket, message: dict):
+        """1つの接続にその接続のフレーム形式でメッセージを送信"""
+        await self._send_frame(websocket, self._encode(message, self._frame_format(websocket)))
+
+    def _frame_format(self, websocket: WebSocket) -> Tuple[str, bool]:
+        return self.encodings.get(websocket, "json"), self.compression.get(websocket, False)
+
+    @staticmethod
+    def _encode(message: dict, frame_format: Tuple[str, bool]) -> Frame:
+        encoding, compress = frame_format
+        frame = encode_frame(message, encoding)
+        if compress:
+            frame = compress_frame(frame, WS_COMPRESS_MIN_BYTES, WS_COMPRESS_LEVEL)
+        return frame
+
+    @staticmethod
+    async def _send_frame(websocket: WebSocket, frame: Frame):
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
+    @asynccontextmanager
+    async def batch(self, room_code: str):
+        """
+        ブロック内でブロードキャストされたイベントを1フレームにまとめて送信する
+
+        プロトコルv2以上のクライアントには {"type": "batch", "events": [...]} を1回だけ送り、
+        それ以外のクライアントには従来通り1イベントずつ送る（順序は保持）
+        """
+        depth = self.batch_depth.get(room_code, 0)
+        if depth == 0:
+            self.pending_batches[room_code] = []
+        self.batch_depth[room_code] = depth + 1
+        try:
+            yield
+        finally:
+            self.batch_depth[room_code] -= 1
+            if self.batch_depth[room_code] == 0:
+                del self.batch_depth[room_code]
+                events = self.pending_batches.pop(room_code, [])
+                if events:
+                    await self._send_batch(room_code, events)
+
+    async def _send_batch(self, room_code: str, events: List[dict]):
+        if room_code not in self.active_connections:
+            return
+        batch_message = {"type": "batch", "events": events}
+        connections = self.active_connections[room_code]
+        with tracer.span("broadcast", events=len(events), recipients=len(connections)):
+            # (フレーム形式, バッチかどうか) ごとに1回だけエンコード
+            frames: Dict[Tuple[Tuple[str, bool], bool], List[Frame]] = {}
+            for connection in connections:
+                frame_format = self._frame_format(connection)
+                batched = len(events) > 1 and self.protocol_versions.get(connection, 1) >= 2
+                key = (frame_format, batched)
+                if key not in frames:
+                    with tracer.span("broadcast.encode", encoding=frame_format[0], compress=frame_format[1], batched=batched):
+                        if batched:
+                            frames[key] = [self._encode(batch_message, frame_format)]
+                        else:
+                            frames[key] = [self._encode(event, frame_format) for event in events]
                 try:
-                    await connection.send_json(message)
+                    with tracer.span("ws.send", player_id=self.websocket_to_player.get(connection), frames=len(frames[key])):
+                        for frame in frames[key]:
+                            await self._send_frame(connection, frame)
                 except:
                     pass
 
 manager = ConnectionManager()
 
+metrics.gauge("rooms", "Rooms in memory", fn=lambda: len(rooms))
+metrics.gauge("players", "Players in all rooms", fn=lambda: sum(len(p) for p in players.values()))
+metrics.gauge("websocket_connections", "Open WebSocket connections",
+              fn=lambda: sum(len(c) for c in manager.active_connections.values()))
+metrics.gauge("room_actors_active", "Rooms with queued or running commands", fn=lambda: len(room_actors))
+metrics.gauge("phase_timers", "Rooms with a pending phase deadline", fn=lambda: len(phase_timers))
+if admission.connect_bucket is not None:
+    metrics.gauge("admission_connect_tokens", "Tokens left in the WebSocket connect rate bucket",
+                  fn=admission.connect_bucket.available)
+
+def connection_count() -> int:
+    """開いているWebSocket接続の数"""
+    return len(manager.protocol_versions)
+
+def server_busy(retry_after: float) -> HTTPException:
+    """アドミッション制御で断るときのレスポンス"""
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy. Please retry later.",
+        headers={"Retry-After": retry_after_header(retry_after)}
+    )
+
+def drop_room(room_code: str):
+    """ルームに紐づく全ての状態を削除"""
+    discard_next_round_plan(room_code)
+    for store in (rooms, players, cards, votes, chat_messages, event_seq, round_hands, placed_index, drag_previews, cached_results):
+        if room_code in store:
+            del store[room_code]
+    room_index.remove(room_code)
+    phase_timers.cancel(room_code)
+
+def refresh_room_summary(room_code: str):
+    """管理API用のルームの集計値を現在の状態で更新（ルームが削除済みの場合は一覧から外す）"""
+    room = rooms.get(room_code)
+    if room is None:
+        room_index.remove(room_code)
+        return
+    last_activity_at = room.get("last_activity_at", room["created_at"])
+    room_index.update(RoomSummary(
+        room_code=room_code,
+        phase=room["phase"],
+        active_round=room.get("active_round", 0),
+        players_count=len(players.get(room_code, [])),
+        cards_count=len(cards.get(room_code, [])),
+        votes_count=len(votes.get(room_code, [])),
+        chat_count=len(chat_messages.get(room_code, [])),
+        created_at=room["created_at"],
+        last_activity_at=last_activity_at,
+        last_activity_ts=datetime.fromisoformat(last_activity_at).timestamp(),
+    ))
+
+def get_round_player_slots(room: dict, room_players: List[dict]) -> List[int]:
+    """ラウンド開始時に保存されたプレイヤースロットリストを取得"""
+    player_slots_str = room.get("round_player_slots")
+    if player_slots_str:
+        return json.loads(player_slots_str)
+    # 後方互換性：round_player_slotsが存在しない場合は現在のプレイヤーから生成
+    return sorted([p["player_slot"] for p in room_players])
+
+def get_room_catalog(room_code: str) -> CardCatalog:
+    """ルームの現ラウンドが使うカタログ（ラウンド開始前・不明な場合は最新版）"""
+    return catalogs.get(rooms[room_code].get("catalog_version"), card_catalog)
+
+def prune_catalogs():
+    """最新版とルームが使用中のバージョン以外のカタログを破棄"""
+    in_use = {room.get("catalog_version") for room in rooms.values()}
+    in_use.add(card_catalog.version)
+    for version in [v for v in catalogs if v not in in_use]:
+        del catalogs[version]
+        rendered_catalogs.pop(version, None)
+
+def reload_catalog() -> dict:
+    """
+    定義ファイルを読み込み直して最新のカタログを差し替える
+
+    新しいカタログは既存カードのIDを引き継ぐ。読み込みに失敗した場合は CatalogError で、現在のカタログはそのまま。
+    進行中のラウンドは開始時のバージョンを使い続け、次のラウンドから新しいバージョンを使う。
+    """
+    global card_catalog, rendered_catalog
+    previous = card_catalog
+    catalog = load_catalog(base=previous)
+    if catalog.version != previous.version:
+        rendered = render_catalog(catalog)
+        catalogs[catalog.version] = catalog
+        rendered_catalogs[catalog.version] = rendered
+        # 参照の差し替えだけで切り替える（読み込み・検証・レンダリングは全て済んでいる）
+        card_catalog, rendered_catalog = catalog, rendered
+        prune_catalogs()
+        print(f"[CATALOG] Reloaded: {previous.version} -> {catalog.version} ({len(catalog)} cards, {len(catalog.axis_labels)} axis labels)", file=sys.stderr)
+    return {
+        "version": card_catalog.version,
+        "previous_version": previous.version,
+        "changed": card_catalog.version != previous.version,
+        "cards": len(card_catalog),
+        "axis_labels": len(card_catalog.axis_labels),
+    }
+
+async def catalog_watcher():
+    """定義ファイルの更新時刻を定期的に確認し、変更されていればカタログを再読み込み"""
+    last_mtime = data_files_mtime()
+    while True:
+        await asyncio.sleep(CATALOG_WATCH_INTERVAL)
+        mtime = data_files_mtime()
+        if mtime == last_mtime:
+            continue
+        last_mtime = mtime
+        try:
+            reload_catalog()
+        except CatalogError as e:
+            print(f"[CATALOG] Reload failed, keeping version {card_catalog.version}: {e}", file=sys.stderr)
+
+def serialize_card(card: dict) -> dict:
+    """配置済みカードをAPIレスポンス用に変換（カードIDをカード名に戻す）"""
+    return {
+        ("card_id" if k == "card_ref" else k): (card_catalog.name(v) if k == "card_ref" else v)
+        for k, v in card.items()
+    }
+
+def serialize_cards(room_code: str) -> List[dict]:
+    """ルームの配置済みカードをAPIレスポンス用に変換"""
+    return [serialize_card(c) for c in cards.get(room_code, [])]
+
+def serialize_hand(hand) -> List[str]:
+    """手札（カードIDの配列）をカード名のリストに変換"""
+    return card_catalog.resolve(hand)
+
+def lookup_card_ref(card_id: str) -> int:
+    """APIで受け取ったカード名をカードIDに変換（存在しない場合は400）"""
+    try:
+        return card_catalog.ref(card_id)
+    except UnknownCard:
+        raise HTTPException(status_code=400, detail="Unknown card_id")
+
+def get_round_hands(room_code: str) -> Dict[int, array]:
+    """
+    現ラウンドの全プレイヤーの手札を取得（ルームごとにキャッシュ）
+
+    シード・スロット構成・手札枚数・テーマ・カタログのいずれかが変わった場合のみ再生成する
+    """
+    room = rooms[room_code]
+    room_themes_str = room.get("themes")
+    player_slots = get_round_player_slots(room, players.get(room_code, []))
+    hand_size = room.get("hand_size", 5)
+
+    catalog = get_room_catalog(room_code)
+
+    cache_key = (room["round_seed"], tuple(player_slots), hand_size, room_themes_str, catalog.version)
+    cached = round_hands.get(room_code)
+    if cached and cached["key"] == cache_key:
+        return cached["hands"]
+
+    themes = json.loads(room_themes_str) if room_themes_str else None
+    hands = generate_all_hands(room["round_seed"], player_slots, hand_size, themes, catalog)
+    round_hands[room_code] = {"key": cache_key, "hands": hands}
+    print(f"[get_round_hands] Generated hands with player_slots={player_slots}, hand_size={hand_size}", file=sys.stderr)
+    return hands
+
+def get_round_hand_index(room_code: str) -> Dict[int, frozenset]:
+    """
+    現ラウンドの手札をスロットごとの frozenset で取得（所持判定を O(1) で行うため）
+
+    手札キャッシュと同じエントリに保持し、手札が再生成されたら作り直す
+    """
+    get_round_hands(room_code)
+    entry = round_hands[room_code]
+    if "index" not in entry:
+        entry["index"] = {slot: frozenset(hand) for slot, hand in entry["hands"].items()}
+    return entry["index"]
+
+def get_placed_index(room_code: str) -> Dict[int, set]:
+    """
+    配置済みカード（ID）のスロットごとの集合を取得
+
+    cards[room_code] のリストが差し替えられた場合（ラウンド開始・退出など）は作り直す
+    place_card_command はリストをその場で更新し、この索引も合わせて更新する
+    """
+    room_cards = cards.setdefault(room_code, [])
+    entry = placed_index.get(room_code)
+    if entry is None or entry["cards"] is not room_cards:
+        slots: Dict[int, set] = {}
+        for c in room_cards:
+            slots.setdefault(c["player_slot"], set()).add(c["card_ref"])
+        entry = placed_index[room_code] = {"cards": room_cards, "slots": slots}
+    return entry["slots"]
+
+def next_round_fingerprint(room_code: str) -> tuple:
+    """次ラウンドの計画に影響するルーム状態（プレイヤー構成・テーマ・手札枚数・最新のカタログ）"""
+    room = rooms[room_code]
+    player_slots = tuple(sorted(p["player_slot"] for p in players.get(room_code, [])))
+    return (player_slots, room.get("themes"), room.get("hand_size", 5), card_catalog.version)
+
+def schedule_next_round_plan(room_code: str):
+    """
+    結果フェーズ中に次ラウンドの計画をバックグラウンドで事前計算する
+
+    next_round ではこの計画を差し替えるだけで済む。
+    プレイヤーや設定が変わった場合・カタログが更新された場合は使用時に fingerprint の不一致で破棄される。
+    """
+    discard_next_round_plan(room_code)
+
+    fingerprint = next_round_fingerprint(room_code)
+    player_slots, room_themes_str, hand_size, _ = fingerprint
+    themes = json.loads(room_themes_str) if room_themes_str else ['food', 'daily', 'entertainment']
+    seed = random.randint(0, 10000)
+
+    task = asyncio.create_task(asyncio.to_thread(plan_round, themes, list(player_slots), hand_size, seed, card_catalog))
+    next_round_plans[room_code] = {"fingerprint": fingerprint, "task": task}
+    print(f"[next_round_plan] Scheduled: room={room_code}, seed={seed}", file=sys.stderr)
+
+def discard_next_round_plan(room_code: str):
+    """事前計算中・計算済みの次ラウンド計画を破棄"""
+    entry = next_round_plans.pop(room_code, None)
+    if entry:
+        entry["task"].cancel()
+
+async def wait_for_next_round_plan(room_code: str):
+    """
+    事前計算中の次ラウンド計画が終わるまで待つ（取り出さない）
+
+    取り出すのは次ラウンドを開始できると確認した後（start_next_round_command の中）。
+    リクエストが中断されても計算は取り消さない
+    """
+    entry = next_round_plans.get(room_code)
+    if entry:
+        await asyncio.wait({entry["task"]})
+
+def take_next_round_plan(room_code: str) -> Optional[dict]:
+    """
+    事前計算済みの次ラウンド計画を取り出す（無い・計算中・無効な場合は None）
+
+    計画には計算時の fingerprint が含まれ、現在の状態と一致するか確認する
+    """
+    entry = next_round_plans.pop(room_code, None)
+    if not entry:
+        return None
+
+    task = entry["task"]
+    if not task.done() or entry["fingerprint"] != next_round_fingerprint(room_code):
+        task.cancel()
+        print(f"[next_round_plan] Discarded (players or settings changed): room={room_code}", file=sys.stderr)
+        return None
+    if task.cancelled() or task.exception() is not None:
+        print(f"[next_round_plan] Failed: room={room_code}, error={None if task.cancelled() else task.exception()}", file=sys.stderr)
+        return None
+    return task.result()
+
+def players_with_presence(room_code: str) -> List[dict]:
+    """プレイヤー情報にオンライン状態を付与して返す"""
+    online_player_ids = manager.get_online_players(room_code)
+    room_players = players.get(room_code, [])
+    for player in room_players:
+        player["is_online"] = player["player_id"] in online_player_ids
+    return room_players
+
+def build_results_payload(room: dict) -> dict:
+    """保存済みのラウンド結果からレスポンス用の結果データを組み立てる"""
+    return {
+        "wolf_slot": room.get("last_wolf_slot"),
+        "top_voted": json.loads(room.get("last_top_voted", "[]")),
+        "wolf_caught": room.get("last_wolf_caught"),
+        "scores": json.loads(room.get("last_round_scores", "{}")),
+        "total_scores": json.loads(room["scores"]) if room["scores"] else {},
+        "vote_counts": json.loads(room.get("last_vote_counts", "{}")),
+        "all_hands": {
+            slot: serialize_hand(hand) for slot, hand in json.loads(room.get("last_all_hands", "{}")).items()
+        },
+        "wolf_axis": room["wolf_axis_payload"],
+        "normal_axis": room["axis_payload"]
+    }
+
+def render_results(room_code: str) -> dict:
+    """
+    ラウンド結果を一度だけレンダリングしてキャッシュ
+
+    JSONのバイト列とgzip圧縮版、ETagを保持し、以降のリクエストではエンコードし直さない
+    """
+    room = rooms[room_code]
+    payload = build_results_payload(room)
+    body = dumps_bytes(payload)
+    entry = {
+        "round": room["active_round"],
+        "payload": payload,
+        "body": body,
+        "encoded": {"gzip": gzip.compress(body, compresslevel=6)},
+        "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+    }
+    cached_results[room_code] = entry
+    return entry
+
+def get_rendered_results(room_code: str) -> Optional[dict]:
+    """現ラウンドのレンダリング済み結果を返す（未計算の場合は None）"""
+    room = rooms[room_code]
+    if not room.get("round_results_calculated"):
+        return None
+    entry = cached_results.get(room_code)
+    if entry is None or entry["round"] != room["active_round"]:
+        entry = render_results(room_code)
+    return entry
+
+def prerendered_response(entry: dict, request: Request, cache_control: str) -> Response:
+    """
+    レンダリング済みのJSON（body・圧縮版 encoded・etag）をETag・圧縮対応で返す
+
+    圧縮版は事前に作成済みのものだけを使い、リクエストごとには圧縮しない
+    ETag はエンコーディングごとに変える（"<etag>-gzip" など）
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), entry["encoded"])
+    headers = {
+        "ETag": variant_etag(entry["etag"], encoding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(entry["encoded"][encoding], media_type="application/json", headers=headers)
+    return Response(entry["body"], media_type="application/json", headers=headers)
+
+def results_response(entry: dict, request: Request) -> Response:
+    """レンダリング済み結果を返す（ラウンド中に変わらないが、毎回ETagで再検証させる）"""
+    return prerendered_response(entry, request, "public, no-cache")
+
+def render_catalog(catalog: CardCatalog) -> dict:
+    """
+    カードカタログと軸ラベルを配信用JSONとしてレンダリング
+
+    バージョンはカタログ内容のハッシュで、同じ内容なら同じURLになる（クライアントは永続的にキャッシュできる）
+    テーマのカードはプロセス内の ID ではなく cards での位置で表す（同じバージョンならどのプロセスでも同じ本文になる）
+    """
+    body = dumps_bytes(catalog.manifest())
+    return {
+        "version": catalog.version,
+        "body": body,
+        "encoded": precompress(body),
+        "etag": f'"{catalog.version}"',
+    }
+
+# 配信用にレンダリング済みのカタログ（最新版と、進行中のラウンドが使っているバージョン）
+rendered_catalog = render_catalog(card_catalog)
+rendered_catalogs: Dict[str, dict] = {card_catalog.version: rendered_catalog}
+
 # 古いルームを削除する関数
 def cleanup_old_rooms():
     """14日間アクティビティのないルームを削除"""
@@ -472,16 +1083,89 @@ def cleanup_old_rooms():
             rooms_to_delete.append(room_code)
 
     for room_code in rooms_to_delete:
-        if room_code in rooms:
-            del rooms[room_code]
-        if room_code in players:
-            del players[room_code]
-        if room_code in cards:
-            del cards[room_code]
-        if room_code in votes:
-            del votes[room_code]
+        drop_room(room_code)
         print(f"[CLEANUP] Deleted inactive room: {room_code}")
 
+    # 削除したルームだけが使っていた古いカタログを破棄
+    prune_catalogs()
+
+class RoomActor:
+    """
+    ルームへの変更コマンドを1つのワーカーで直列に実行するアクター
+
+    - コマンドは同期関数なので、適用中に他のコマンドが割り込むことはない
+    - キューに溜まったコマンドはまとめて適用し、発生したイベントを1回のバッチで送信する
+    - キューが空になったらワーカーは終了し、アクターも破棄される（待機中のルームはタスクを持たない）
+    """
+    def __init__(self, room_code: str):
+        self.room_code = room_code
+        self.pending: deque = deque()
+        self.worker: Optional[asyncio.Task] = None
+
+    async def submit(self, command: Callable, *args) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        # 呼び出し元のトレース（記録中の場合）をアクターのタスクに引き継ぐ
+        self.pending.append((command, args, future, current_spans(), time.perf_counter()))
+        if self.worker is None:
+            self.worker = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self):
+        try:
+            while self.pending:
+                commands = list(self.pending)
+                self.pending.clear()
+                completed = []
+                # バッチの送信は、まとめて適用した全コマンドのトレースに記録する
+                batch_spans = tuple(span for *_, spans, _ in commands for span in spans)
+                try:
+                    with tracer.activate(batch_spans):
+                        async with manager.batch(self.room_code):
+                            for command, args, future, spans, queued_at in commands:
+                                with tracer.activate(spans), tracer.span(
+                                    "room.command",
+                                    command=command.__name__,
+                                    room_code=self.room_code,
+                                    queued_ms=round((time.perf_counter() - queued_at) * 1000, 3),
+                                    batch_size=len(commands)
+                                ):
+                                    try:
+                                        result, events = command(self.room_code, *args)
+                                    except Exception as e:
+                                        completed.append((future, None, e))
+                                        continue
+                                    for event in events:
+                                        await manager.broadcast(self.room_code, event)
+                                    completed.append((future, result, None))
+                finally:
+                    for future, result, error in completed:
+                        if future.done():
+                            continue
+                        if error is not None:
+                            future.set_exception(error)
+                        else:
+                            future.set_result(result)
+                    # 送信中の例外などで未完了のまま残ったコマンドは失敗として返す
+                    for _, _, future, _, _ in commands:
+                        if not future.done():
+                            future.set_exception(RuntimeError(f"Room command aborted: room={self.room_code}"))
+                    refresh_room_summary(self.room_code)
+        finally:
+            if room_actors.get(self.room_code) is self:
+                del room_actors[self.room_code]
+
+async def run_room_command(room_code: str, command: Callable, *args) -> Any:
+    """
+    ルームへの変更コマンドをルームのアクター経由で実行し、レスポンスを返す
+
+    command は (レスポンス, ブロードキャストするイベントのリスト) を返す同期関数。
+    同じルームのコマンドは直列に実行され、別のルームのコマンドとは独立している。
+    """
+    actor = room_actors.get(room_code)
+    if actor is None:
+        actor = room_actors[room_code] = RoomActor(room_code)
+    return await actor.submit(command, *args)
+
 # Pydanticモデル
 class CreateRoomRequest(BaseModel):
     room_code: str
@@ -510,12 +1194,26 @@ class PlaceCardRequest(BaseModel):
 class SubmitVoteRequest(BaseModel):
     target_slot: int
 
+class ChatMessageRequest(BaseModel):
+    """WebSocketで受信するチャット（送信者の情報・時刻はサーバー側で付けるため、本文以外は無視する）"""
+    message: str
+
+    @field_validator('message')
+    @classmethod
+    def validate_message(cls, v):
+        v = v.strip()
+        if not v or len(v) > CHAT_MAX_LENGTH:
+            raise ValueError(f'message must be between 1 and {CHAT_MAX_LENGTH} characters')
+        return v
+
 class UpdateThemesRequest(BaseModel):
     themes: List[str]
 
 class UpdateGameSettingsRequest(BaseModel):
     hand_size: int
     required_placement_count: int
+    placement_time_limit: Optional[int] = None  # 配置フェーズの制限時間（秒、0 = 無制限、省略時は変更しない）
+    voting_time_limit: Optional[int] = None  # 投票フェーズの制限時間（秒、0 = 無制限、省略時は変更しない）
 
     @field_validator('hand_size')
     @classmethod
@@ -531,6 +1229,13 @@ class UpdateGameSettingsRequest(BaseModel):
             raise ValueError('required_placement_count must be between 1 and 10')
         return v
 
+    @field_validator('placement_time_limit', 'voting_time_limit')
+    @classmethod
+    def validate_time_limit(cls, v):
+        if v is not None and (v < 0 or v > MAX_PHASE_TIME_LIMIT):
+            raise ValueError(f'time limit must be between 0 and {MAX_PHASE_TIME_LIMIT} seconds')
+        return v
+
     @model_validator(mode='after')
     def validate_hand_size_vs_placement(self):
         if self.hand_size < self.required_placement_count:
@@ -540,13 +1245,51 @@ class UpdateGameSettingsRequest(BaseModel):
 # ヘルスチェック
 @app.get("/api/health")
 async def health_check():
+    # ドレイン中はロードバランサーが新しいリクエストを振り分けないよう 503 を返す
+    if admission.draining:
+        return CodecJSONResponse({"status": "draining"}, status_code=503)
     return {"status": "ok", "rooms": len(rooms), "players": sum(len(p) for p in players.values())}
 
+# カタログ（カード・テーマ・軸ラベル）
+@app.get("/api/catalog")
+async def get_catalog_manifest(response: Response):
+    """
+    現在のカタログのバージョンとURLを返す
+
+    本体は /api/catalog/{version}.json で、内容が変わらない限りURLも変わらない
+    """
+    response.headers["Cache-Control"] = "no-cache"
+    version = rendered_catalog["version"]
+    return {"version": version, "url": f"/api/catalog/{version}.json"}
+
+@app.post("/api/admin/catalog/reload", dependencies=[Depends(verify_admin)])
+async def reload_catalog_endpoint():
+    """
+    カード・軸ラベルの定義ファイルを読み込み直す（再起動不要）
+
+    進行中のラウンドは開始時のバージョンを使い続け、次のラウンドから新しいバージョンを使う
+    """
+    try:
+        return reload_catalog()
+    except CatalogError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/catalog/{version}.json")
+async def get_catalog(version: str, request: Request):
+    """カタログ本体（バージョンごとに不変のため、ブラウザに永続的にキャッシュさせる）"""
+    entry = rendered_catalogs.get(version)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Catalog version not found")
+    return prerendered_response(entry, request, "public, max-age=31536000, immutable")
+
 # ルーム作成
 @app.post("/api/rooms/create")
 async def create_room(req: CreateRoomRequest):
     if req.room_code in rooms:
         raise HTTPException(status_code=400, detail="Room already exists")
+    retry_after = admission.admit_room(len(rooms), connection_count())
+    if retry_after is not None:
+        raise server_busy(retry_after)
 
     now = datetime.now()
     rooms[req.room_code] = {
@@ -561,6 +1304,9 @@ async def create_room(req: CreateRoomRequest):
         "themes": json.dumps(['food', 'daily', 'entertainment']),  # デフォルトテーマ
         "hand_size": req.hand_size,  # 手札枚数
         "required_placement_count": req.required_placement_count,  # 配置必須枚数
+        "placement_time_limit": PLACEMENT_TIME_LIMIT,  # 配置フェーズの制限時間（秒、0 = 無制限）
+        "voting_time_limit": VOTING_TIME_LIMIT,  # 投票フェーズの制限時間（秒、0 = 無制限）
+        "phase_deadline": None,  # 現在のフェーズの期限（UNIX秒、制限時間がない場合は None）
         "created_at": now.isoformat(),
         "updated_at": now.isoformat(),
         "last_activity_at": now.isoformat(),
@@ -580,15 +1326,27 @@ async def create_room(req: CreateRoomRequest):
     cards[req.room_code] = []
     votes[req.room_code] = []
 
+    refresh_room_summary(req.room_code)
+
     # トークンを生成
-    token = generate_token()
-    player_tokens[req.player_id] = token
+    token = generate_token(req.player_id, req.room_code)
 
     return {"success": True, "room_code": req.room_code, "token": token}
 
 # ルーム参加
 @app.post("/api/rooms/join")
 async def join_room(req: JoinRoomRequest):
+    # ゲーム開始後の参加・既存プレイヤーの再参加は進行中のゲームとして優先する
+    room = rooms.get(req.room_code)
+    if room is not None:
+        rejoin = room["phase"] != "lobby" or any(p["player_id"] == req.player_id for p in players.get(req.room_code, []))
+        retry_after = admission.admit_join(connection_count(), in_progress=rejoin)
+        if retry_after is not None:
+            raise server_busy(retry_after)
+    return await run_room_command(req.room_code, join_room_command, req)
+
+def join_room_command(room_code: str, req: JoinRoomRequest) -> Tuple[dict, List[dict]]:
+    """ルーム参加のゲームロジック"""
     if req.room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -599,13 +1357,9 @@ async def join_room(req: JoinRoomRequest):
     existing = next((p for p in room_players if p["player_id"] == req.player_id), None)
 
     if existing:
-        # 既存プレイヤーの場合、トークンが既に存在すればそれを返す
-        token = player_tokens.get(req.player_id)
-        if not token:
-            # トークンが存在しない場合は新規生成（後方互換性のため）
-            token = generate_token()
-            player_tokens[req.player_id] = token
-        return {"success": True, "player_slot": existing["player_slot"], "token": token}
+        # 既存プレイヤーの場合はトークンを再発行（有効期限も延長される）
+        token = generate_token(req.player_id, req.room_code)
+        return {"success": True, "player_slot": existing["player_slot"], "token": token}, []
 
     # ゲーム開始後の新規参加を防ぐ
     if room["phase"] != "lobby":
@@ -632,17 +1386,16 @@ async def join_room(req: JoinRoomRequest):
     players[req.room_code].append(new_player)
 
     # 他のプレイヤーに通知
-    await manager.broadcast(req.room_code, {
+    events = [{
         "type": "player_joined",
         "player_slot": next_slot,
         "player_name": req.player_name
-    })
+    }]
 
     # トークンを生成
-    token = generate_token()
-    player_tokens[req.player_id] = token
+    token = generate_token(req.player_id, req.room_code)
 
-    return {"success": True, "player_slot": next_slot, "token": token}
+    return {"success": True, "player_slot": next_slot, "token": token}, events
 
 # トークン検証
 @app.post("/api/auth/verify")
@@ -650,12 +1403,9 @@ async def verify_token(player_id: str, token: str):
     """
     player_idとtokenの組み合わせが正しいかを検証
     """
-    stored_token = player_tokens.get(player_id)
-    if not stored_token:
-        raise HTTPException(status_code=401, detail="Invalid player_id")
-
-    if stored_token != token:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    error = check_token(token, player_id)
+    if error:
+        raise HTTPException(status_code=401, detail=error)
 
     return {"success": True, "player_id": player_id}
 
@@ -665,6 +1415,10 @@ async def leave_room(
     room_code: str,
     player_id: str = Depends(verify_player_token)
 ):
+    return await run_room_command(room_code, leave_room_command, player_id)
+
+def leave_room_command(room_code: str, player_id: str) -> Tuple[dict, List[dict]]:
+    """プレイヤー退出のゲームロジック"""
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -687,22 +1441,17 @@ async def leave_room(
         votes[room_code] = [v for v in votes[room_code] if v["voter_slot"] != player_slot]
 
     # 他のプレイヤーに通知
-    await manager.broadcast(room_code, {
+    events = [{
         "type": "player_left",
         "player_slot": player_slot,
         "player_name": player_name
-    })
+    }]
 
     # ルームが空になったら削除
     if len(players[room_code]) == 0:
-        del rooms[room_code]
-        del players[room_code]
-        if room_code in cards:
-            del cards[room_code]
-        if room_code in votes:
-            del votes[room_code]
+        drop_room(room_code)
 
-    return {"success": True}
+    return {"success": True}, events
 
 # ルーム情報取得
 @app.get("/api/rooms/{room_code}")
@@ -710,19 +1459,62 @@ async def get_room(room_code: str):
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    # オンラインプレイヤーIDのリストを取得
-    online_player_ids = manager.get_online_players(room_code)
-
     # プレイヤー情報にオンライン状態を追加
-    room_players = players.get(room_code, [])
-    for player in room_players:
-        player["is_online"] = player["player_id"] in online_player_ids
+    room_players = players_with_presence(room_code)
 
     return {
         "room": rooms[room_code],
         "players": room_players
     }
 
+# 再接続用スナップショット取得
+@app.get("/api/rooms/{room_code}/snapshot")
+async def get_snapshot(
+    room_code: str,
+    player_id: str = Depends(verify_player_token)
+):
+    """
+    再接続時に必要な状態を1回のレスポンスでまとめて返す
+
+    ルーム情報・オンライン状態付きプレイヤー・配置済みカード・自分の手札・投票状況・
+    チャット履歴の末尾・（結果フェーズの場合）ラウンド結果を含む。
+    seq は最後にブロードキャストしたイベントのシーケンス番号で、
+    クライアントはこれより大きい seq のイベントのみ適用すればよい。
+    """
+    if room_code not in rooms:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    room_players = players_with_presence(room_code)
+    player = next((p for p in room_players if p["player_id"] == player_id), None)
+
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
+
+    room = rooms[room_code]
+
+    # 手札はゲーム開始後のみ
+    hand = []
+    if room["round_seed"]:
+        hand = serialize_hand(get_round_hands(room_code).get(player["player_slot"], ()))
+
+    # 結果は計算済みの場合のみ
+    results = None
+    if room["phase"] == "results":
+        rendered = get_rendered_results(room_code)
+        results = rendered["payload"] if rendered else None
+
+    return {
+        "seq": event_seq.get(room_code, 0),
+        "room": room,
+        "players": room_players,
+        "player_slot": player["player_slot"],
+        "cards": serialize_cards(room_code),
+        "hand": hand,
+        "votes": votes.get(room_code, []),
+        "chat": chat_messages.get(room_code, [])[-SNAPSHOT_CHAT_TAIL:],
+        "results": results
+    }
+
 # テーマ更新
 @app.post("/api/rooms/{room_code}/themes")
 async def update_themes(
@@ -730,6 +1522,10 @@ async def update_themes(
     req: UpdateThemesRequest,
     player_id: str = Depends(verify_player_token)
 ):
+    return await run_room_command(room_code, update_themes_command, player_id, req)
+
+def update_themes_command(room_code: str, player_id: str, req: UpdateThemesRequest) -> Tuple[dict, List[dict]]:
+    """テーマ更新のゲームロジック"""
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -753,12 +1549,12 @@ async def update_themes(
     rooms[room_code]["last_activity_at"] = now.isoformat()
 
     # 他のプレイヤーに通知
-    await manager.broadcast(room_code, {
+    events = [{
         "type": "themes_updated",
         "themes": req.themes
-    })
+    }]
 
-    return {"success": True, "themes": req.themes}
+    return {"success": True, "themes": req.themes}, events
 
 # ゲーム設定更新
 @app.post("/api/rooms/{room_code}/game-settings")
@@ -767,6 +1563,10 @@ async def update_game_settings(
     req: UpdateGameSettingsRequest,
     player_id: str = Depends(verify_player_token)
 ):
+    return await run_room_command(room_code, update_game_settings_command, player_id, req)
+
+def update_game_settings_command(room_code: str, player_id: str, req: UpdateGameSettingsRequest) -> Tuple[dict, List[dict]]:
+    """ゲーム設定更新のゲームロジック"""
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -793,22 +1593,25 @@ async def update_game_settings(
     now = datetime.now()
     rooms[room_code]["hand_size"] = req.hand_size
     rooms[room_code]["required_placement_count"] = req.required_placement_count
+    if req.placement_time_limit is not None:
+        rooms[room_code]["placement_time_limit"] = req.placement_time_limit
+    if req.voting_time_limit is not None:
+        rooms[room_code]["voting_time_limit"] = req.voting_time_limit
     rooms[room_code]["updated_at"] = now.isoformat()
     rooms[room_code]["last_activity_at"] = now.isoformat()
 
-    # 他のプレイヤーに通知
-    await manager.broadcast(room_code, {
-        "type": "game_settings_updated",
-        "hand_size": req.hand_size,
-        "required_placement_count": req.required_placement_count
-    })
-
-    return {
-        "success": True,
+    settings = {
         "hand_size": req.hand_size,
-        "required_placement_count": req.required_placement_count
+        "required_placement_count": req.required_placement_count,
+        "placement_time_limit": room.get("placement_time_limit", 0),
+        "voting_time_limit": room.get("voting_time_limit", 0),
     }
 
+    # 他のプレイヤーに通知
+    events = [{"type": "game_settings_updated", **settings}]
+
+    return {"success": True, **settings}, events
+
 # フェーズ更新
 @app.post("/api/rooms/{room_code}/phase")
 async def update_phase(
@@ -816,6 +1619,10 @@ async def update_phase(
     req: UpdatePhaseRequest,
     player_id: str = Depends(verify_player_token)
 ):
+    return await run_room_command(room_code, update_phase_command, player_id, req)
+
+def update_phase_command(room_code: str, player_id: str, req: UpdatePhaseRequest) -> Tuple[dict, List[dict]]:
+    """フェーズ更新のゲームロジック（REST/WebSocket共通）"""
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -826,11 +1633,18 @@ async def update_phase(
         if not player or not player.get("is_host"):
             raise HTTPException(status_code=403, detail="Only the host can update the phase")
 
+    return change_phase(room_code, req)
+
+def change_phase(room_code: str, req: UpdatePhaseRequest) -> Tuple[dict, List[dict]]:
+    """フェーズを変更する（ホストの操作と、制限時間切れによる自動進行で共通）"""
     now = datetime.now()
     rooms[room_code]["phase"] = req.phase
     rooms[room_code]["updated_at"] = now.isoformat()
     rooms[room_code]["last_activity_at"] = now.isoformat()
 
+    # 前回の結果キャッシュはフェーズが変わった時点で破棄（結果フェーズでは下で再生成）
+    cached_results.pop(room_code, None)
+
     # ロビーに戻る場合はカードと投票をクリア
     if req.phase == 'lobby':
         if room_code in cards:
@@ -913,20 +1727,9 @@ async def update_phase(
             # スコアと結果を保存
             room["scores"] = json.dumps(current_scores)
 
-            # 全プレイヤーの手札を生成（テーマ対応）
-            room_themes_str = room.get("themes")
-            themes = json.loads(room_themes_str) if room_themes_str else None
-            # ラウンド開始時に保存されたプレイヤースロットリストを使用
-            player_slots_str = room.get("round_player_slots")
-            if player_slots_str:
-                player_slots = json.loads(player_slots_str)
-            else:
-                # 後方互換性：round_player_slotsが存在しない場合は現在のプレイヤーから生成
-                player_slots = sorted([p["player_slot"] for p in room_players])
-            hand_size = room.get("hand_size", 5)  # ルームの設定から手札枚数を取得
-            all_hands_dict = generate_all_hands(room["round_seed"], player_slots, hand_size, themes)
-            all_hands = {str(slot): hand for slot, hand in all_hands_dict.items()}
-            print(f"[update_phase:results] Generated hands with player_slots={player_slots}, hand_size={hand_size}", file=sys.stderr)
+            # 全プレイヤーの手札を取得（テーマ対応、ラウンド内でキャッシュ済み）
+            all_hands_dict = get_round_hands(room_code)
+            all_hands = {str(slot): hand.tolist() for slot, hand in all_hands_dict.items()}
 
             # 結果をroomに保存
             room["round_results_calculated"] = True
@@ -939,6 +1742,10 @@ async def update_phase(
 
             print(f"[update_phase:results] Scores calculated. round_scores: {round_scores}, total_scores: {current_scores}", file=sys.stderr)
 
+    # 配置フェーズの開始時に、このラウンドで使うカタログのバージョンを固定
+    if req.phase == 'placement':
+        rooms[room_code]["catalog_version"] = card_catalog.version
+
     # 軸データが提供されていない場合は自動生成
     if req.phase == 'placement' and not req.axis_payload:
         # ルームのテーマを使用（存在しない場合はデフォルト）
@@ -956,8 +1763,9 @@ async def update_phase(
         rooms[room_code]["selected_theme"] = selected_theme
 
         # 通常の軸と人狼用の軸を生成
-        normal_axis = generate_axis_pair(themes, seed)
-        wolf_axis = generate_wolf_axis_pair(normal_axis, themes, seed)
+        catalog = get_room_catalog(room_code)
+        normal_axis = generate_axis_pair(themes, seed, catalog.axis_labels)
+        wolf_axis = generate_wolf_axis_pair(normal_axis, themes, seed, catalog.axis_labels)
 
         rooms[room_code]["axis_payload"] = normal_axis
         rooms[room_code]["wolf_axis_payload"] = wolf_axis
@@ -985,12 +1793,58 @@ async def update_phase(
         if req.round_seed:
             rooms[room_code]["round_seed"] = req.round_seed
 
-    await manager.broadcast(room_code, {
+    phase_event = {
         "type": "phase_changed",
         "phase": req.phase
-    })
+    }
+
+    # 結果フェーズでは結果を一度だけレンダリングし、クライアントが取得しに来なくて済むよう通知に同梱
+    if req.phase == 'results':
+        rendered = get_rendered_results(room_code)
+        if rendered:
+            phase_event["round"] = rendered["round"]
+            phase_event["results"] = rendered["payload"]
+
+        # 結果を見ている間に次ラウンドを準備
+        schedule_next_round_plan(room_code)
+    else:
+        discard_next_round_plan(room_code)
 
-    return {"success": True}
+    # 新しいフェーズの制限時間を設定（制限時間のないフェーズでは前のフェーズの期限を取り消す）
+    deadline = set_phase_deadline(room_code)
+    if deadline:
+        phase_event["deadline"] = deadline
+
+    return {"success": True}, [phase_event]
+
+def set_phase_deadline(room_code: str) -> Optional[float]:
+    """ルームの現在のフェーズに制限時間があれば期限を登録して返す（なければ期限を取り消す）"""
+    room = rooms[room_code]
+    phase = room["phase"]
+    limit = room.get(f"{phase}_time_limit", 0) if phase in PHASE_TIMEOUT_NEXT else 0
+    if not limit:
+        phase_timers.cancel(room_code)
+        room["phase_deadline"] = None
+        return None
+    deadline = time.time() + limit
+    phase_timers.schedule(room_code, deadline, (phase, room["active_round"]))
+    room["phase_deadline"] = deadline
+    return deadline
+
+async def on_phase_deadline(room_code: str, data: Tuple[str, int]):
+    """期限が来たルームのフェーズをルームのアクターで進める"""
+    if room_code in rooms:
+        await run_room_command(room_code, phase_timeout_command, *data)
+
+def phase_timeout_command(room_code: str, phase: str, round_number: int) -> Tuple[None, List[dict]]:
+    """制限時間切れ: phase_timeout を通知して次のフェーズに進む（期限の登録後にフェーズ・ラウンドが変わっていれば何もしない）"""
+    room = rooms.get(room_code)
+    if room is None or room["phase"] != phase or room["active_round"] != round_number:
+        return None, []
+    next_phase = PHASE_TIMEOUT_NEXT[phase]
+    print(f"[phase_timer] Time limit reached: room={room_code}, round={round_number}, {phase} -> {next_phase}", file=sys.stderr)
+    _, events = change_phase(room_code, UpdatePhaseRequest(phase=next_phase))
+    return None, [{"type": "phase_timeout", "phase": phase, "next_phase": next_phase, "round": round_number}, *events]
 
 # カード配置
 @app.post("/api/rooms/{room_code}/cards")
@@ -999,6 +1853,10 @@ async def place_card(
     req: PlaceCardRequest,
     player_id: str = Depends(verify_player_token)
 ):
+    return await run_room_command(room_code, place_card_command, player_id, req)
+
+def place_card_command(room_code: str, player_id: str, req: PlaceCardRequest) -> Tuple[dict, List[dict]]:
+    """カード配置のゲームロジック（REST/WebSocket共通）"""
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -1009,38 +1867,57 @@ async def place_card(
     if not player:
         raise HTTPException(status_code=404, detail="Player not found")
 
+    player_slot = player["player_slot"]
+    card_ref = lookup_card_ref(req.card_id)
+    placed = get_placed_index(room_code).setdefault(player_slot, set())
+    already_placed = card_ref in placed
+
+    # 厳格モード: 手札にないカードと配置必須枚数を超える配置を拒否
+    if STRICT_CARD_VALIDATION:
+        if not rooms[room_code]["round_seed"]:
+            raise HTTPException(status_code=400, detail="Game not started")
+        if card_ref not in get_round_hand_index(room_code).get(player_slot, frozenset()):
+            raise HTTPException(status_code=400, detail="Card is not in your hand")
+        limit = rooms[room_code].get("required_placement_count", 3)
+        if not already_placed and len(placed) >= limit:
+            raise HTTPException(status_code=400, detail=f"Cannot place more than {limit} cards")
+
     # カード配置
-    room_cards = cards.get(room_code, [])
-    # 同じカードがあれば削除
-    room_cards = [c for c in room_cards if not (
-        c["player_slot"] == player["player_slot"] and c["card_id"] == req.card_id
-    )]
+    room_cards = cards[room_code]
+    # 同じカードがあれば削除（配置済みの場合のみ走査する）
+    if already_placed:
+        room_cards[:] = [c for c in room_cards if not (
+            c["player_slot"] == player_slot and c["card_ref"] == card_ref
+        )]
 
     now = datetime.now()
     room_cards.append({
         "room_code": room_code,
         "round": rooms[room_code]["active_round"],
         "player_slot": player["player_slot"],
-        "card_id": req.card_id,
+        "card_ref": card_ref,
         "quadrant": req.quadrant,
         "offsets": req.offsets,
         "locked": 0,
         "placed_at": now.isoformat(),
     })
-    cards[room_code] = room_cards
+    placed.add(card_ref)
+
+    # 確定した配置より古いドラッグプレビューが後から届かないよう破棄
+    drag_previews.get(room_code, {}).pop((player_slot, card_ref), None)
 
     # 最終アクティビティ時刻を更新
     rooms[room_code]["last_activity_at"] = now.isoformat()
 
-    await manager.broadcast(room_code, {
+    events = [{
         "type": "card_placed",
         "player_slot": player["player_slot"],
         "card_id": req.card_id,
         "quadrant": req.quadrant,
         "offsets": req.offsets
-    })
+    }]
 
-    return {"success": True}
+    return {"success": True}, events
 
 # 配置済みカード取得
 @app.get("/api/rooms/{room_code}/cards")
@@ -1052,8 +1929,7 @@ async def get_cards(room_code: str):
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    room_cards = cards.get(room_code, [])
-    return {"cards": room_cards}
+    return {"cards": serialize_cards(room_code)}
 
 # 手札取得
 @app.get("/api/rooms/{room_code}/hand")
@@ -1075,26 +1951,11 @@ async def get_hand(
     if not room["round_seed"]:
         raise HTTPException(status_code=400, detail="Game not started")
 
-    # ルームのテーマを取得
-    import json
-    room_themes_str = room.get("themes")
-    themes = json.loads(room_themes_str) if room_themes_str else None
-
-    # 手札を生成（ラウンド開始時に保存されたプレイヤースロットリストを使用）
-    player_slots_str = room.get("round_player_slots")
-    if player_slots_str:
-        player_slots = json.loads(player_slots_str)
-    else:
-        # 後方互換性：round_player_slotsが存在しない場合は現在のプレイヤーから生成
-        player_slots = sorted([p["player_slot"] for p in room_players])
-
-    # ルームの手札枚数設定を取得（デフォルト5枚）
-    hand_size = room.get("hand_size", 5)
-    hand = generate_hand(player["player_slot"], room["round_seed"], player_slots, hand_size, themes)
-    print(f"[get_hand] Generated hand for player_slot={player['player_slot']} with player_slots={player_slots}", file=sys.stderr)
+    # 手札を取得（ラウンド開始時に保存されたプレイヤースロットリストを使用、ラウンド内でキャッシュ済み）
+    hand = get_round_hands(room_code).get(player["player_slot"], ())
 
     return {
-        "hand": hand,
+        "hand": serialize_hand(hand),
         "player_slot": player["player_slot"]
     }
 
@@ -1105,6 +1966,10 @@ async def submit_vote(
     req: SubmitVoteRequest,
     player_id: str = Depends(verify_player_token)
 ):
+    return await run_room_command(room_code, submit_vote_command, player_id, req)
+
+def submit_vote_command(room_code: str, player_id: str, req: SubmitVoteRequest) -> Tuple[dict, List[dict]]:
+    """投票のゲームロジック（REST/WebSocket共通）"""
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -1130,13 +1995,13 @@ async def submit_vote(
     # 最終アクティビティ時刻を更新
     rooms[room_code]["last_activity_at"] = now.isoformat()
 
-    await manager.broadcast(room_code, {
+    events = [{
         "type": "vote_submitted",
         "voter_slot": player["player_slot"],
         "target_slot": req.target_slot
-    })
+    }]
 
-    return {"success": True}
+    return {"success": True}, events
 
 # 投票結果取得
 @app.get("/api/rooms/{room_code}/votes")
@@ -1149,31 +2014,36 @@ async def get_votes(room_code: str):
 
 # 結果取得（計算済みの結果を返すだけ）
 @app.post("/api/rooms/{room_code}/calculate_results")
-async def calculate_results(room_code: str):
+async def calculate_results(room_code: str, request: Request):
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    room = rooms[room_code]
-
     # 結果が計算されていない場合はエラー
-    if not room.get("round_results_calculated"):
+    rendered = get_rendered_results(room_code)
+    if not rendered:
         raise HTTPException(status_code=400, detail="Results not calculated yet. Move to results phase first.")
 
-    # 保存済みの結果を返す
-    import json
+    # レンダリング済みの結果を返す
     print(f"[calculate_results] Returning cached results", file=sys.stderr)
 
-    return {
-        "wolf_slot": room.get("last_wolf_slot"),
-        "top_voted": json.loads(room.get("last_top_voted", "[]")),
-        "wolf_caught": room.get("last_wolf_caught"),
-        "scores": json.loads(room.get("last_round_scores", "{}")),
-        "total_scores": json.loads(room["scores"]) if room["scores"] else {},
-        "vote_counts": json.loads(room.get("last_vote_counts", "{}")),
-        "all_hands": json.loads(room.get("last_all_hands", "{}")),
-        "wolf_axis": room["wolf_axis_payload"],
-        "normal_axis": room["axis_payload"]
-    }
+    return results_response(rendered, request)
+
+# ラウンド結果取得（キャッシュ可能なGET）
+@app.get("/api/rooms/{room_code}/results/{round_number}")
+async def get_results(room_code: str, round_number: int, request: Request):
+    """
+    指定ラウンドのレンダリング済み結果を返す
+
+    ETag による条件付きリクエスト（304）と gzip に対応
+    """
+    if room_code not in rooms:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    rendered = get_rendered_results(room_code)
+    if not rendered or rendered["round"] != round_number:
+        raise HTTPException(status_code=404, detail="Results not found for this round")
+
+    return results_response(rendered, request)
 
 # 次ラウンドへ移行
 @app.post("/api/rooms/{room_code}/next_round")
@@ -1181,6 +2051,12 @@ async def start_next_round(
     room_code: str,
     player_id: str = Depends(verify_player_token)
 ):
+    # 結果フェーズ中に事前計算している計画が終わるまで待つ（取り出すのはコマンドの中で、開始できると確認した後）
+    await wait_for_next_round_plan(room_code)
+    return await run_room_command(room_code, start_next_round_command, player_id)
+
+def start_next_round_command(room_code: str, player_id: str) -> Tuple[dict, List[dict]]:
+    """次ラウンド開始のゲームロジック"""
     if room_code not in rooms:
         raise HTTPException(status_code=404, detail="Room not found")
 
@@ -1194,52 +2070,56 @@ async def start_next_round(
     room = rooms[room_code]
     room_players = players.get(room_code, [])
 
+    if room["phase"] != "results":
+        raise HTTPException(status_code=400, detail="Next round can only be started from the results phase")
+
     # 新しいラウンド番号
     new_round = room["active_round"] + 1
 
-    # 新しいシード値を生成
-    new_seed = random.randint(0, 10000)
-
-    # 新しい軸を生成（ルームのテーマを使用）
-    import json
-    room_themes_str = room.get("themes")
-    if room_themes_str:
-        themes = json.loads(room_themes_str)
+    # 結果フェーズ中に事前計算した計画を使用（無い・無効な場合はここで計算）
+    plan = take_next_round_plan(room_code)
+    if plan:
+        print(f"[start_next_round] Using precomputed plan: seed={plan['seed']}", file=sys.stderr)
     else:
-        themes = ['food', 'daily', 'entertainment']
-
-    # テーマを決定して保存
-    selected_theme = select_theme_from_list(themes, new_seed)
+        # 新しい軸を生成（ルームのテーマを使用）
+        room_themes_str = room.get("themes")
+        if room_themes_str:
+            themes = json.loads(room_themes_str)
+        else:
+            themes = ['food', 'daily', 'entertainment']
 
-    normal_axis = generate_axis_pair(themes, new_seed)
-    wolf_axis = generate_wolf_axis_pair(normal_axis, themes, new_seed)
+        player_slots = sorted([p["player_slot"] for p in room_players])
+        plan = plan_round(themes, player_slots, room.get("hand_size", 5), random.randint(0, 10000), card_catalog)
 
-    # 人狼を決定（実際のプレイヤースロットを使用）
-    player_slots = sorted([p["player_slot"] for p in room_players])
-    num_players = len(player_slots)
-    if num_players > 0:
-        rng = random.Random(new_seed)
-        wolf_index = rng.randint(0, num_players - 1)
-        wolf_slot = player_slots[wolf_index]
-        print(f"[start_next_round] Wolf determined: slot={wolf_slot}, player_slots={player_slots}, seed={new_seed}", file=sys.stderr)
-    else:
-        wolf_slot = None
+    new_seed = plan["seed"]
+    player_slots = plan["player_slots"]
+    wolf_slot = plan["wolf_slot"]
+    print(f"[start_next_round] Wolf determined: slot={wolf_slot}, player_slots={player_slots}, seed={new_seed}", file=sys.stderr)
 
     # ルームの状態を更新
     now = datetime.now()
     room["active_round"] = new_round
     room["phase"] = "placement"
     room["round_seed"] = str(new_seed)
-    room["selected_theme"] = selected_theme  # テーマを保存
-    room["axis_payload"] = normal_axis
-    room["wolf_axis_payload"] = wolf_axis
+    room["selected_theme"] = plan["selected_theme"]  # テーマを保存
+    room["axis_payload"] = plan["axis_payload"]
+    room["wolf_axis_payload"] = plan["wolf_axis_payload"]
     room["wolf_slot"] = wolf_slot  # 人狼スロットを保存
     room["round_player_slots"] = json.dumps(player_slots)  # プレイヤースロットリストを保存
+    room["catalog_version"] = plan["catalog_version"]  # このラウンドで使うカタログを固定
     room["updated_at"] = now.isoformat()
     room["last_activity_at"] = now.isoformat()
 
+    # 計画済みの手札を手札キャッシュに登録（直後の /hand 呼び出しで再計算しない）
+    if room.get("themes"):
+        round_hands[room_code] = {
+            "key": (room["round_seed"], tuple(player_slots), room.get("hand_size", 5), room["themes"], plan["catalog_version"]),
+            "hands": plan["hands"],
+        }
+
     # 結果計算フラグをリセット
     room["round_results_calculated"] = False
+    cached_results.pop(room_code, None)
 
     # 前ラウンドの結果キャッシュをクリア
     room.pop("last_wolf_slot", None)
@@ -1255,42 +2135,232 @@ async def start_next_round(
     if room_code in votes:
         votes[room_code] = []
 
+    # 配置フェーズの制限時間を設定
+    deadline = set_phase_deadline(room_code)
+
     # WebSocketで通知
-    await manager.broadcast(room_code, {
+    events = [{
         "type": "round_started",
-        "round": new_round
-    })
+        "round": new_round,
+        **({"deadline": deadline} if deadline else {})
+    }]
 
     return {
         "success": True,
         "round": new_round,
         "round_seed": str(new_seed)
-    }
+    }, events
 
-# デバッグ: ルーム一覧取得
-@app.get("/api/debug/rooms")
-async def get_all_rooms():
+# デバッグ: ルーム一覧取得（プレイヤーを含む。管理者トークンが必要で、管理APIのルーム一覧と同じくページ単位で返す）
+@app.get("/api/debug/rooms", dependencies=[Depends(verify_admin)])
+async def get_all_rooms(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=ADMIN_ROOMS_MAX_LIMIT),
+):
     # 本番環境では無効化（セキュリティ対策）
     if os.getenv("ENV") == "production":
         raise HTTPException(status_code=404, detail="Not found")
 
+    items, next_cursor = room_index.page(cursor, limit, RoomFilter(), time.time(), ADMIN_ROOMS_SCAN_LIMIT)
     rooms_with_players = []
-    for room_code, room_data in rooms.items():
+    for summary in items:
+        room_code = summary.room_code
+        if room_code not in rooms:
+            continue
         room_players = players.get(room_code, [])
-        room_cards = cards.get(room_code, [])
-        room_votes = votes.get(room_code, [])
         rooms_with_players.append({
-            **room_data,
+            **rooms[room_code],
             "players_count": len(room_players),
             "players": room_players,
-            "cards_count": len(room_cards),
-            "votes_count": len(room_votes)
+            "cards_count": len(cards.get(room_code, [])),
+            "votes_count": len(votes.get(room_code, []))
         })
     return {
         "rooms": rooms_with_players,
+        "next_cursor": next_cursor,
         "total": len(rooms)
     }
 
+# メトリクス（Prometheus のテキスト形式）
+@app.get("/api/metrics", dependencies=[Depends(verify_admin)], response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# 管理API: イベントループの遅延（ヒストグラムと、閾値を超えた遅延のスタックサンプル）
+@app.get("/api/admin/diagnostics/loop", dependencies=[Depends(verify_admin)])
+async def get_loop_diagnostics():
+    if loop_monitor is None:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled")
+    return loop_monitor.snapshot()
+
+# 管理API: サンプリングプロファイル（collapsed 形式。flamegraph.pl / speedscope で表示できる）
+# 同時に実行できるのは1つだけ
+PROFILE_MAX_SECONDS = 60
+profile_running = False
+
+@app.post("/api/admin/profile", dependencies=[Depends(verify_admin)], response_class=PlainTextResponse)
+async def run_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    threads: str = Query("loop", pattern="^(loop|all)$"),
+):
+    """
+    指定時間プロセスのスタックを採取し、collapsed 形式で返す
+
+    threads=loop はイベントループのスレッドのみ、all は全スレッド。採取は別スレッドで行い、ループは止めない
+    """
+    global profile_running
+    if profile_running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    profile_running = True
+    try:
+        thread_id = threading.get_ident() if threads == "loop" else None
+        samples = await asyncio.to_thread(profile_process, seconds, interval_ms / 1000, thread_id)
+    finally:
+        profile_running = False
+    print(f"[PROFILE] {sum(samples.values())} samples in {seconds}s (threads={threads})", file=sys.stderr)
+    return PlainTextResponse(format_collapsed(samples), headers={"X-Profile-Samples": str(sum(samples.values()))})
+
+# 管理API: 遅いリクエスト・WebSocketメッセージのプロファイル（SLOW_REQUEST_PROFILE_MS を設定した場合のみ記録）
+@app.get("/api/admin/profile/slow", dependencies=[Depends(verify_admin)])
+async def get_slow_profiles():
+    return {
+        "enabled": slow_requests.enabled,
+        "threshold_ms": SLOW_REQUEST_PROFILE_MS,
+        "profiles": list(slow_requests.profiles),
+    }
+
+# 管理API: トレース（TRACE_SAMPLE_RATE を設定した場合のみ記録）
+@app.get("/api/admin/traces", dependencies=[Depends(verify_admin)])
+async def list_traces(
+    room_code: Optional[str] = None,
+    request_id: Optional[str] = None,
+    min_ms: float = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """記録済みのトレースの一覧（新しい順、span は含まない）"""
+    matched = []
+    for record in reversed(tracer.traces):
+        if room_code and record.get("room_code") != room_code:
+            continue
+        if request_id and record.get("request_id") != request_id:
+            continue
+        if record["duration_ms"] < min_ms:
+            continue
+        matched.append({key: value for key, value in record.items() if key != "spans"})
+        if len(matched) >= limit:
+            break
+    return {"enabled": tracer.enabled, "sample_rate": tracer.sample_rate, "traces": matched}
+
+@app.get("/api/admin/traces/{trace_id}", dependencies=[Depends(verify_admin)])
+async def get_trace(trace_id: str, format: str = Query("json", pattern="^(json|text)$")):
+    """1つのトレースのタイムライン（format=text で字下げとバーのテキスト表示）"""
+    record = tracer.find(trace_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "text":
+        return PlainTextResponse(render_timeline(record))
+    return record
+
+# 管理API: ドレイン（終了シグナルを待たずに新しい処理を断り、クライアントに再接続を案内する）
+@app.post("/api/admin/drain", dependencies=[Depends(verify_admin)])
+async def drain_endpoint():
+    """デプロイ前にドレインを開始する（状態はプロセスの終了時に書き出す）"""
+    return await drain_server()
+
+# 管理API: ルーム一覧（カーソルによるページングとNDJSONストリーミング）
+@app.get("/api/admin/rooms", dependencies=[Depends(verify_admin)])
+async def list_rooms_admin(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=ADMIN_ROOMS_MAX_LIMIT),
+    phase: Optional[str] = None,
+    min_idle: Optional[float] = Query(None, ge=0),
+    max_idle: Optional[float] = Query(None, ge=0),
+    min_players: Optional[int] = Query(None, ge=0),
+    max_players: Optional[int] = Query(None, ge=0),
+    min_size: Optional[int] = Query(None, ge=0),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    ルームの集計値の一覧（ルームコード順）
+
+    - json: 最大 limit 件と次ページのカーソル（next_cursor が null なら最後のページ）
+    - ndjson: cursor 以降の一致する全ルームを1行1ルームで逐次送信する（limit は使わない）
+    集計値は変更時に更新済みのものを読むだけで、ルームの状態はコピーしない
+    """
+    room_filter = RoomFilter(
+        phase=phase,
+        min_idle_seconds=min_idle,
+        max_idle_seconds=max_idle,
+        min_players=min_players,
+        max_players=max_players,
+        min_size=min_size,
+    )
+    if format == "ndjson":
+        return StreamingResponse(stream_rooms_ndjson(cursor, room_filter), media_type="application/x-ndjson")
+
+    now = time.time()
+    items, next_cursor = room_index.page(cursor, limit, room_filter, now, ADMIN_ROOMS_SCAN_LIMIT)
+    return {
+        "rooms": [summary.to_dict(now) for summary in items],
+        "next_cursor": next_cursor,
+        "total": len(room_index),
+    }
+
+async def stream_rooms_ndjson(cursor: Optional[str], room_filter: RoomFilter):
+    """一致するルームをページ単位で取り出し、ページごとにイベントループへ制御を返しながら送信する"""
+    while True:
+        now = time.time()
+        items, cursor = room_index.page(cursor, ADMIN_ROOMS_MAX_LIMIT, room_filter, now, ADMIN_ROOMS_MAX_LIMIT)
+        if items:
+            yield b"".join(dumps_bytes(summary.to_dict(now)) + b"\n" for summary in items)
+        if cursor is None:
+            return
+        await asyncio.sleep(0)
+
+# WebSocketで受け付けるゲームコマンド: type -> (リクエストモデル, コマンド関数)
+WS_COMMANDS: Dict[str, Tuple[type, Callable]] = {
+    "place_card": (PlaceCardRequest, place_card_command),
+    "submit_vote": (SubmitVoteRequest, submit_vote_command),
+    "update_phase": (UpdatePhaseRequest, update_phase_command),
+}
+
+async def handle_ws_command(websocket: WebSocket, room_code: str, player_id: Optional[str], message: dict):
+    """
+    WebSocket経由のゲームコマンドを実行し、ackを返す
+
+    受信形式: {"type": "place_card", "request_id": "...", "payload": {...}}
+    応答形式: {"type": "ack", "request_id": "...", "ok": true, "result": {...}}
+              {"type": "ack", "request_id": "...", "ok": false, "status": 404, "error": "..."}
+
+    認証は接続時に一度だけ行うため、コマンドごとのトークン検証は不要
+    """
+    request_id = message.get("request_id")
+    request_model, command = WS_COMMANDS[message["type"]]
+
+    try:
+        if not player_id:
+            raise HTTPException(status_code=401, detail="player_id is required to send commands")
+        req = request_model.model_validate(message.get("payload") or {})
+        result = await run_room_command(room_code, command, player_id, req)
+        ack = {"type": "ack", "request_id": request_id, "ok": True, "result": result}
+    except ValidationError as e:
+        ack = {
+            "type": "ack",
+            "request_id": request_id,
+            "ok": False,
+            "status": 422,
+            "error": e.errors(include_url=False, include_context=False, include_input=False)
+        }
+    except HTTPException as e:
+        ack = {"type": "ack", "request_id": request_id, "ok": False, "status": e.status_code, "error": e.detail}
+    except Exception as e:
+        # 予期しないエラーでも ack を返す（クライアントの応答待ちを残さない）
+        print(f"[WebSocket] コマンド処理エラー: type={message['type']}, room={room_code}, error={e!r}", file=sys.stderr)
+        ack = {"type": "ack", "request_id": request_id, "ok": False, "status": 500, "error": "Internal server error"}
+
+    await manager.send_personal(websocket, ack)
+
 # WebSocket接続
 @app.websocket("/ws/{room_code}")
 async def websocket_endpoint(
@@ -1298,9 +2368,13 @@ async def websocket_endpoint(
     room_code: str,
     player_id: Optional[str] = Query(None),
     token: Optional[str] = Query(None),
-    load_history: bool = Query(True)
+    load_history: bool = Query(True),
+    protocol: int = Query(1),
+    encoding: str = Query("json"),
+    compress: Optional[str] = Query(None)
 ):
-    print(f"[WebSocket] 接続要求: room={room_code}, player_id={player_id}, load_history={load_history}")
+    print(f"[WebSocket] 接続要求: room={room_code}, player_id={player_id}, load_history={load_history}, protocol={protocol}, encoding={encoding}, compress={compress}")
+    encoding = resolve_encoding(encoding)
 
     # トークン認証が有効な場合はトークンを検証
     if REQUIRE_TOKEN_AUTH and player_id:
@@ -1309,19 +2383,37 @@ async def websocket_endpoint(
             await websocket.close(code=1008, reason="Authentication required")
             return
 
-        # player_idに対応するトークンを確認
-        stored_token = player_tokens.get(player_id)
-        if not stored_token or stored_token != token:
+        # 署名・有効期限・プレイヤー・ルームを確認
+        if check_token(token, player_id, room_code):
             await websocket.close(code=1008, reason="Invalid token")
             return
 
-    await manager.connect(websocket, room_code, player_id)
+    # アドミッション制御（クローズコードと理由をクライアントに届けるため、接続を受け付けてから閉じる）
+    room = rooms.get(room_code)
+    retry_after = admission.admit_connection(
+        connection_count(),
+        in_progress=room is not None and room["phase"] != "lobby",
+        replaces=bool(player_id) and player_id in manager.player_connections
+    )
+    if retry_after is not None:
+        print(f"[WebSocket] 過負荷のため接続を拒否: room={room_code}, player_id={player_id}, retry_after={retry_after:.1f}s")
+        code, reason = close_reason(retry_after)
+        await websocket.accept()
+        await websocket.close(code=code, reason=reason)
+        return
+
+    await manager.connect(websocket, room_code, player_id, protocol, encoding, WS_APP_COMPRESSION and compress == "deflate")
     print(f"[WebSocket] 接続完了: room={room_code}, player_id={player_id}")
 
     # 初回接続時のみ過去のチャットメッセージを送信
-    if load_history and room_code in chat_messages:
-        for msg in chat_messages[room_code]:
-            await websocket.send_json(msg)
+    # プロトコルv2以上のクライアントには1つの batch フレームで送る（大きくなるので圧縮の対象になる）
+    if load_history and chat_messages.get(room_code):
+        history = chat_messages[room_code]
+        if protocol >= 2:
+            await manager.send_personal(websocket, {"type": "batch", "events": history})
+        else:
+            for msg in history:
+                await manager.send_personal(websocket, msg)
         print(f"[WebSocket] {len(chat_messages[room_code])}件の過去メッセージを送信")
 
     # 接続時に他のプレイヤーに通知
@@ -1333,131 +2425,369 @@ async def websocket_endpoint(
         await manager.broadcast(room_code, message)
         print(f"[WebSocket] player_online ブロードキャスト: player={player_id}")
 
+    # この接続の受信制限
+    limiter = InboundLimiter(WS_RATE_LIMITS, WS_VIOLATION_RATE, WS_VIOLATION_BURST)
+
     print(f"[WebSocket] メッセージ受信ループ開始: room={room_code}, player_id={player_id}")
     try:
         while True:
-            print(f"[WebSocket] receive_text()呼び出し待機中...")
             data = await websocket.receive_text()
-            print(f"[WebSocket] メッセージ受信成功: {data}")
+
+            # 大きすぎるフレームは解析せずに切断する
+            if ws_frame_size(data) > WS_MAX_FRAME_BYTES:
+                ws_violations.inc(category="frame", reason="size")
+                ws_abuse_disconnects.inc(reason="size")
+                print(f"[WebSocket] フレームが大きすぎるため切断: room={room_code}, player_id={player_id}, > {WS_MAX_FRAME_BYTES}バイト")
+                await websocket.close(code=1009, reason="Frame too large")
+                raise WebSocketDisconnect(code=1009)
 
             # メッセージをパースしてブロードキャスト
             try:
                 message = json.loads(data)
+                if not isinstance(message, dict):
+                    await record_ws_violation(websocket, limiter, room_code, player_id, "other", "malformed")
+                    continue
                 message_type = message.get("type")
-                print(f"[WebSocket] メッセージタイプ: {message_type}")
-
-                # チャットメッセージの場合は保存してブロードキャスト
-                if message_type == "chat":
-                    print(f"[WebSocket] チャットメッセージをブロードキャスト: {message}")
-
-                    # メッセージをストレージに保存
-                    if room_code not in chat_messages:
-                        chat_messages[room_code] = []
-                    chat_messages[room_code].append(message)
-                    print(f"[WebSocket] チャットメッセージを保存: {len(chat_messages[room_code])}件")
-
-                    # ブロードキャスト
-                    await manager.broadcast(room_code, message)
-                    print(f"[WebSocket] ブロードキャスト完了")
-                if message_type == "chat":
-                    # チャットメッセージは既に上で処理済み
-                    pass
-                elif message_type == "ping":
-                    # pingメッセージを受信したらpongを返す
-                    print(f"[WebSocket] Ping受信: room={room_code}, player_id={player_id}")
-                    await websocket.send_text(json.dumps({"type": "pong"}))
-                else:
-                    print(f"[WebSocket] その他のメッセージタイプ: {message_type}")
+
+                # 種類ごとの受信レートを超えたメッセージは処理せずに捨てる（コマンドには 429 の ack を返す）
+                category = message_category(message_type, WS_COMMANDS)
+                if not limiter.allow(category):
+                    if category == "command":
+                        await manager.send_personal(websocket, {
+                            "type": "ack", "request_id": message.get("request_id"), "ok": False, "status": 429, "error": "Too many messages"
+                        })
+                    await record_ws_violation(websocket, limiter, room_code, player_id, category, "rate")
+                    continue
+
+                with slow_requests.span(f"WS {message_type}", room_code), tracer.trace(
+                    f"WS {message_type}", room_code=room_code, player_id=player_id, request_id=message.get("request_id")
+                ):
+                    # チャットメッセージの場合は検証して保存・ブロードキャスト
+                    if message_type == "chat":
+                        try:
+                            chat = ChatMessageRequest.model_validate(message)
+                        except ValidationError:
+                            await record_ws_violation(websocket, limiter, room_code, player_id, category, "schema")
+                            continue
+                        await run_room_command(room_code, chat_command, player_id, chat)
+                    elif message_type == "ping":
+                        # pingメッセージを受信したらpongを返す
+                        await manager.send_personal(websocket, {"type": "pong"})
+                    elif message_type == "drag_preview":
+                        # ドラッグ中の位置（次のティックでまとめて配信）
+                        queue_drag_preview(room_code, player_id, message)
+                    elif message_type in WS_COMMANDS:
+                        # ゲームコマンド（REST APIと同じロジックで処理）
+                        await handle_ws_command(websocket, room_code, player_id, message)
+                    else:
+                        print(f"[WebSocket] その他のメッセージタイプ: {message_type}")
+            except WebSocketDisconnect:
+                raise
             except json.JSONDecodeError as e:
-                print(f"[WebSocket] JSON解析エラー: {data}, error: {e}")
+                print(f"[WebSocket] JSON解析エラー: {data[:200]!r}, error: {e}")
+                await record_ws_violation(websocket, limiter, room_code, player_id, "other", "malformed")
             except Exception as e:
                 print(f"[WebSocket] メッセージ処理エラー: {e}")
     except WebSocketDisconnect:
         print(f"[WebSocket] 切断: room={room_code}, player_id={player_id}")
 
-        # ロビーフェーズでオフラインになった場合、プレイヤーを自動削除
-        if player_id and room_code in rooms:
-            # ルームのロックを取得（ない場合は作成）
-            if room_code not in room_locks:
-                room_locks[room_code] = asyncio.Lock()
-
-            # ロックを取得してからプレイヤー削除処理を実行
-            async with room_locks[room_code]:
-                # ロック取得後に再度ルームの存在確認（削除済みの可能性があるため）
-                if room_code not in rooms:
-                    manager.disconnect(websocket, room_code)
-                    return
-
-                room = rooms[room_code]
-
-                # ロビーフェーズの場合のみ自動削除
-                if room["phase"] == "lobby":
-                    room_players = players.get(room_code, [])
-                    player = next((p for p in room_players if p["player_id"] == player_id), None)
-
-                    if player:
-                        player_slot = player["player_slot"]
-                        player_name = player["player_name"]
-                        was_host = player.get("is_host") == 1
-
-                        print(f"[WebSocket] ロビー中にオフライン。プレイヤーを削除: {player_name} (slot={player_slot})")
-
-                        # プレイヤーを削除
-                        players[room_code] = [p for p in room_players if p["player_id"] != player_id]
-
-                        # トークンも削除
-                        if player_id in player_tokens:
-                            del player_tokens[player_id]
-
-                        # ホストが離脱した場合、次のプレイヤーをホストに昇格
-                        if was_host and len(players[room_code]) > 0:
-                            players[room_code][0]["is_host"] = 1
-                            new_host_name = players[room_code][0]["player_name"]
-                            print(f"[WebSocket] 新しいホスト: {new_host_name}")
-
-                            # ホスト変更を通知
-                            await manager.broadcast(room_code, {
-                                "type": "host_changed",
-                                "new_host_slot": players[room_code][0]["player_slot"],
-                                "new_host_name": new_host_name
-                            })
-
-                        # プレイヤー削除を通知
-                        await manager.broadcast(room_code, {
-                            "type": "player_removed",
-                            "player_id": player_id,
-                            "player_slot": player_slot,
-                            "player_name": player_name,
-                            "reason": "offline_in_lobby"
-                        })
-
-                        # ルームが空になったら削除
-                        if len(players[room_code]) == 0:
-                            print(f"[WebSocket] ルームが空になったため削除: {room_code}")
-                            if room_code in rooms:
-                                del rooms[room_code]
-                            if room_code in players:
-                                del players[room_code]
-                            if room_code in cards:
-                                del cards[room_code]
-                            if room_code in votes:
-                                del votes[room_code]
-                            if room_code in chat_messages:
-                                del chat_messages[room_code]
-                            if room_code in room_locks:
-                                del room_locks[room_code]
-                else:
-                    # ゲーム中の場合はオフライン通知のみ
-                    await manager.broadcast(room_code, {
-                        "type": "player_offline",
-                        "player_id": player_id
-                    })
+        # ロビーフェーズでオフラインになった場合、プレイヤーを自動削除（ルームのアクターで直列に処理）
+        # ドレイン中の切断は次のプロセスへの再接続なので削除しない
+        if player_id and room_code in rooms and not admission.draining:
+            await run_room_command(room_code, player_disconnected_command, player_id)
 
         manager.disconnect(websocket, room_code)
     except Exception as e:
         print(f"[WebSocket] エラー: {e}")
         manager.disconnect(websocket, room_code)
 
+def ws_frame_size(data: str) -> int:
+    """
+    WS_MAX_FRAME_BYTES と比べる受信フレームのバイト数（UTF-8）
+
+    文字数だけで上限を超える・超えないことが決まる場合はエンコードせずに文字数を返す（1文字は1〜4バイト）
+    """
+    if len(data) > WS_MAX_FRAME_BYTES or len(data) * 4 <= WS_MAX_FRAME_BYTES:
+        return len(data)
+    return len(data.encode("utf-8"))
+
+async def record_ws_violation(websocket: WebSocket, limiter: InboundLimiter, room_code: str, player_id: Optional[str], category: str, reason: str):
+    """受信メッセージの違反を数え、許容量を使い切った接続は切断する（WebSocketDisconnect を送出する）"""
+    ws_violations.inc(category=category, reason=reason)
+    if limiter.violation():
+        return
+    ws_abuse_disconnects.inc(reason="violations")
+    print(f"[WebSocket] 違反が多すぎるため切断: room={room_code}, player_id={player_id}, last={category}/{reason}")
+    await websocket.close(code=1008, reason="Too many invalid messages")
+    raise WebSocketDisconnect(code=1008)
+
+def chat_command(room_code: str, player_id: Optional[str], req: ChatMessageRequest) -> Tuple[None, List[dict]]:
+    """
+    チャットメッセージを保存してブロードキャストする
+
+    送信者の名前・スロットはルームのプレイヤー情報から、時刻はサーバーの時刻から付ける（ルームのプレイヤー以外の送信は捨てる）
+    """
+    player = next((p for p in players.get(room_code, []) if p["player_id"] == player_id), None) if player_id else None
+    if player is None:
+        return None, []
+    message = {
+        "type": "chat",
+        "player_id": player_id,
+        "player_name": player["player_name"],
+        "player_slot": player["player_slot"],
+        "message": req.message,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+    }
+    history = chat_messages.setdefault(room_code, [])
+    history.append(message)
+    if len(history) > CHAT_HISTORY_LIMIT:
+        del history[:len(history) - CHAT_HISTORY_LIMIT]
+    return None, [message]
+
+def player_disconnected_command(room_code: str, player_id: str) -> Tuple[None, List[dict]]:
+    """WebSocket切断時の処理（ロビーでは削除、ゲーム中はオフライン通知のみ）"""
+    # 実行時に再度ルームの存在確認（削除済みの可能性があるため）
+    if room_code not in rooms:
+        return None, []
+
+    room = rooms[room_code]
+
+    # ゲーム中の場合はオフライン通知のみ
+    if room["phase"] != "lobby":
+        return None, [{
+            "type": "player_offline",
+            "player_id": player_id
+        }]
+
+    room_players = players.get(room_code, [])
+    player = next((p for p in room_players if p["player_id"] == player_id), None)
+    if not player:
+        return None, []
+
+    player_slot = player["player_slot"]
+    player_name = player["player_name"]
+    was_host = player.get("is_host") == 1
+
+    print(f"[WebSocket] ロビー中にオフライン。プレイヤーを削除: {player_name} (slot={player_slot})")
+
+    # プレイヤーを削除
+    players[room_code] = [p for p in room_players if p["player_id"] != player_id]
+
+    events = []
+
+    # ホストが離脱した場合、次のプレイヤーをホストに昇格
+    if was_host and len(players[room_code]) > 0:
+        players[room_code][0]["is_host"] = 1
+        new_host_name = players[room_code][0]["player_name"]
+        print(f"[WebSocket] 新しいホスト: {new_host_name}")
+
+        # ホスト変更を通知
+        events.append({
+            "type": "host_changed",
+            "new_host_slot": players[room_code][0]["player_slot"],
+            "new_host_name": new_host_name
+        })
+
+    # プレイヤー削除を通知
+    events.append({
+        "type": "player_removed",
+        "player_id": player_id,
+        "player_slot": player_slot,
+        "player_name": player_name,
+        "reason": "offline_in_lobby"
+    })
+
+    # ルームが空になったら削除
+    if len(players[room_code]) == 0:
+        print(f"[WebSocket] ルームが空になったため削除: {room_code}")
+        drop_room(room_code)
+
+    return None, events
+
+def queue_drag_preview(room_code: str, player_id: Optional[str], message: dict):
+    """
+    ドラッグ中のカード位置を受け付ける
+
+    (プレイヤー, カード) ごとに最新の位置だけを保持し、実際の配信は drag_preview_ticker が行う。
+    cards には書き込まない（確定は place_card で行う）。
+    """
+    if not player_id or room_code not in rooms:
+        return
+    if rooms[room_code]["phase"] != "placement":
+        return
+
+    player = next((p for p in players.get(room_code, []) if p["player_id"] == player_id), None)
+    if not player:
+        return
+
+    try:
+        preview = PlaceCardRequest.model_validate(message.get("payload") or {})
+        card_ref = card_catalog.ref(preview.card_id)
+    except (ValidationError, UnknownCard):
+        return
+
+    drag_previews.setdefault(room_code, {})[(player["player_slot"], card_ref)] = {
+        "player_slot": player["player_slot"],
+        "card_id": preview.card_id,
+        "quadrant": preview.quadrant,
+        "offsets": preview.offsets
+    }
+
+async def drag_preview_ticker():
+    """
+    一定間隔で溜まったドラッグプレビューをルームごとにまとめて配信
+
+    クライアントの送信頻度に関わらず、配信レートはティック間隔で上限が決まる
+    """
+    while True:
+        await asyncio.sleep(DRAG_PREVIEW_TICK_MS / 1000)
+        if not drag_previews:
+            continue
+
+        pending = list(drag_previews.items())
+        drag_previews.clear()
+        for room_code, previews in pending:
+            if not previews:
+                continue
+            await manager.broadcast(room_code, {
+                "type": "drag_preview",
+                "previews": list(previews.values())
+            }, ephemeral=True)
+
+async def drain_server() -> dict:
+    """
+    ドレインを開始する: 新しいルーム・参加・接続を断り、接続中の全クライアントに再接続を案内する
+
+    クライアントごとに再接続までの時間をずらし、次のプロセスへの再接続が一度に集中しないようにする
+    """
+    if admission.draining:
+        return {"draining": True, "notified": 0}
+    admission.start_draining((DRAIN_RECONNECT_MS + DRAIN_RECONNECT_JITTER_MS) / 1000)
+    notified = 0
+    for room_code, connections in list(manager.active_connections.items()):
+        for websocket in list(connections):
+            reconnect_in_ms = DRAIN_RECONNECT_MS + random.randint(0, DRAIN_RECONNECT_JITTER_MS)
+            try:
+                await manager.send_personal(websocket, {"type": "server_restarting", "reconnect_in_ms": reconnect_in_ms})
+                notified += 1
+            except Exception:
+                pass
+    print(f"[DRAIN] ドレイン開始: {notified}接続に再接続を案内（{DRAIN_RECONNECT_MS}〜{DRAIN_RECONNECT_MS + DRAIN_RECONNECT_JITTER_MS}ms後）")
+    return {"draining": True, "notified": notified}
+
+def install_drain_signal_handlers() -> Callable[[], None]:
+    """
+    終了シグナル（SIGTERM / SIGINT）で、ドレインを済ませてから元のハンドラ（uvicorn の終了処理）を呼ぶようにする
+
+    uvicorn は終了シグナルを受けると先に接続を閉じてから lifespan の終了処理に進むので、
+    lifespan の中でドレインしてもクライアントに server_restarting は届かず、ロビーのプレイヤーも切断で削除されてしまう。
+    ドレイン済み（2回目のシグナル・管理APIでドレインした後）は元のハンドラをすぐに呼ぶ。
+    シグナルはメインスレッドでしか扱えないので、それ以外（TestClient など）では何もしない。元に戻す関数を返す
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return lambda: None
+    loop = asyncio.get_running_loop()
+    previous = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    previous = {sig: handler for sig, handler in previous.items() if callable(handler)}
+    drain_tasks = set()
+
+    async def drain_then_exit(sig: int):
+        try:
+            await asyncio.wait_for(drain_server(), DRAIN_TIMEOUT)
+        except Exception as e:
+            print(f"[DRAIN] ドレインに失敗: {e!r}", file=sys.stderr)
+        finally:
+            previous[sig](sig, None)
+
+    def start_drain(sig: int):
+        task = loop.create_task(drain_then_exit(sig))
+        drain_tasks.add(task)
+        task.add_done_callback(drain_tasks.discard)
+
+    def on_signal(sig, frame):
+        if admission.draining or drain_tasks:
+            previous[sig](sig, frame)
+        else:
+            loop.call_soon_threadsafe(start_drain, sig)
+
+    for sig in previous:
+        signal.signal(sig, on_signal)
+
+    def restore():
+        for sig, handler in previous.items():
+            if signal.getsignal(sig) is on_signal:
+                signal.signal(sig, handler)
+
+    return restore
+
+async def wait_for_room_actors(timeout: float):
+    """全ルームのキューに溜まったコマンドが終わるまで待つ（最大 timeout 秒）"""
+    deadline = time.monotonic() + timeout
+    while room_actors and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if room_actors:
+        print(f"[DRAIN] {len(room_actors)}ルームのコマンドが終わらないまま状態を書き出します", file=sys.stderr)
+
+def export_state() -> dict:
+    """
+    引き継ぐゲーム状態（手札・結果などのキャッシュは含めない。次のプロセスで再計算される）
+
+    カードIDはプロセスごとに振り直されるので、配置済みカードと結果の手札はカード名で保存する
+    """
+    return {
+        "rooms": {
+            room_code: {k: v for k, v in room.items() if k != "last_all_hands"}
+            for room_code, room in rooms.items()
+        },
+        "players": players,
+        "cards": {room_code: serialize_cards(room_code) for room_code in cards},
+        "last_all_hands": {
+            room_code: {slot: serialize_hand(hand) for slot, hand in json.loads(room["last_all_hands"]).items()}
+            for room_code, room in rooms.items() if room.get("last_all_hands")
+        },
+        "votes": votes,
+        "chat_messages": chat_messages,
+        "event_seq": event_seq,
+    }
+
+def import_card_ref(room_code: str, card_id: str) -> Optional[int]:
+    """引き継いだカード名をこのプロセスのカードIDに変換（最新のカタログにない場合は None）"""
+    try:
+        return card_catalog.ref(card_id)
+    except UnknownCard:
+        print(f"[HANDOFF] Dropping unknown card {card_id!r} in room {room_code}", file=sys.stderr)
+        return None
+
+def import_state(state: dict) -> int:
+    """export_state で書き出した状態を読み込み、読み込んだルーム数を返す"""
+    for room_code, room in state["rooms"].items():
+        rooms[room_code] = room
+        players[room_code] = state["players"].get(room_code, [])
+        votes[room_code] = state["votes"].get(room_code, [])
+        if room_code in state["chat_messages"]:
+            chat_messages[room_code] = state["chat_messages"][room_code]
+        if room_code in state["event_seq"]:
+            event_seq[room_code] = state["event_seq"][room_code]
+        room_cards = []
+        for card in state["cards"].get(room_code, []):
+            card_ref = import_card_ref(room_code, card["card_id"])
+            if card_ref is not None:
+                room_cards.append({("card_ref" if k == "card_id" else k): (card_ref if k == "card_id" else v) for k, v in card.items()})
+        cards[room_code] = room_cards
+        if room_code in state["last_all_hands"]:
+            room["last_all_hands"] = json.dumps({
+                slot: [ref for ref in (import_card_ref(room_code, name) for name in hand) if ref is not None]
+                for slot, hand in state["last_all_hands"][room_code].items()
+            })
+        # 前のプロセスのカタログは引き継がないので、ラウンドのカタログは最新版に付け替える（手札は最新版で再生成される）
+        if room.get("catalog_version"):
+            room["catalog_version"] = card_catalog.version
+        # フェーズの期限を再登録（既に過ぎていればタイマーの開始直後に次のフェーズに進む）
+        if room.get("phase_deadline") and room["phase"] in PHASE_TIMEOUT_NEXT:
+            phase_timers.schedule(room_code, room["phase_deadline"], (room["phase"], room["active_round"]))
+        refresh_room_summary(room_code)
+    return len(state["rooms"])
+
 async def periodic_cleanup():
     """24時間ごとに古いルームをクリーンアップ"""
     while True:
@@ -1466,36 +2796,21 @@ async def periodic_cleanup():
         print("[CLEANUP] Periodic cleanup completed")
 
 # 静的ファイル配信（本番環境用）
-# 開発環境では存在しないので、存在する場合のみマウント
+# 開発環境では存在しないので、存在する場合のみ有効化
+# どのルートにも一致しなかったリクエストを StaticSite が受け取り、静的ファイルまたは index.html（SPAルーティング用）を返す
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
-    from fastapi.responses import FileResponse
-
-    # 静的ファイルを配信
-    app.mount("/assets", StaticFiles(directory=str(static_dir / "assets")), name="assets")
-
-    # SPAのindex.htmlを直接配信
-    @app.get("/", response_class=FileResponse)
-    async def serve_root():
-        return FileResponse(static_dir / "index.html")
-
-    # 404エラーハンドラー: API以外の全てのパスでindex.htmlを返す（SPAルーティング用）
-    @app.exception_handler(404)
-    async def custom_404_handler(request, exc):
-        # API/WSリクエストの場合は通常の404を返す
-        if request.url.path.startswith("/api/") or request.url.path.startswith("/ws/"):
-            raise exc
-
-        # それ以外（SPAルート）の場合はindex.htmlを返す
-        index_path = static_dir / "index.html"
-        if index_path.is_file():
-            return FileResponse(index_path)
-
-        raise exc
-
-    print(f"[STATIC] Serving static files from {static_dir}")
+    static_site = StaticSite(static_dir, fallback=app.router.default)
+    app.router.default = static_site
+    print(f"[STATIC] Serving {len(static_site.files)} static files from {static_dir} (in memory)")
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # アプリ側で圧縮するフレームを二重に圧縮しないよう、トランスポート層のpermessage-deflateは環境変数で切り替え
+    ws_per_message_deflate = os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() == "true"
+    # WS_MAX_FRAME_BYTES を大きく超えるフレームはトランスポート層で拒否する（アプリ側の確認は受信後）
+    uvicorn.run(
+        app, host="0.0.0.0", port=port, ws_per_message_deflate=ws_per_message_deflate,
+        ws_max_size=WS_TRANSPORT_MAX_BYTES
+    )
@@ -0,0 +1,167 @@
+"""
+プロセス内のメトリクス（Prometheus のテキスト形式で出力する）
+
+メトリクスは全てイベントループ上で更新する前提で、ロックは取らない
+"""
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """値を set するか、出力時に呼ぶ関数（ラベルなし）を渡す"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+        self.fn = fn
+
+    def set(self, value: float, **labels: str):
+        self.values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.fn is not None:
+            return [f"{self.name} {_format_value(self.fn())}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Histogram(Metric):
+    """累積バケットのヒストグラム（ラベルなし）"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> dict:
+        """デバッグ用の辞書（バケットごとの件数は累積しない）"""
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+    def samples(self) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + [math.inf], self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(self.sum)}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """メトリクスの登録と出力（同じ名前で登録し直すと既存のものを返す）"""
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric):
+                raise ValueError(f"Metric {metric.name} is already registered as {existing.kind}")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (), fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames, fn))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float]) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# プロセス全体で共有するレジストリ
+registry = MetricsRegistry()
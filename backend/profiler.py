@@ -0,0 +1,162 @@
+"""
+サンプリングプロファイラ
+
+- profile_process: 指定時間、一定間隔で全スレッド（またはイベントループのスレッド）のスタックを採取し、
+  flamegraph.pl / speedscope でそのまま読める collapsed 形式（"外側;...;内側 件数"）にまとめる
+- SlowRequestRecorder: HTTPリクエスト・WebSocketメッセージの処理中だけイベントループのスタックを採取し、
+  閾値より長くかかった処理のプロファイルを route・room_code 付きで保持する
+どちらもサンプリング用のスレッドで動き、イベントループの処理には割り込まない
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from types import FrameType
+from typing import Dict, Iterator, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# collapsed 形式に含める最大フレーム数
+MAX_STACK_DEPTH = 64
+
+
+def collapse_stack(frame: Optional[FrameType]) -> str:
+    """フレームから外側へのスタックを "file:function;..." （外側が先頭）の1行にする"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+def format_collapsed(samples: Counter) -> str:
+    """collapsed 形式のテキスト（件数の多い順）"""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+def profile_process(duration: float, interval: float, thread_id: Optional[int] = None) -> Counter:
+    """
+    duration 秒間、interval 秒ごとにスタックを採取する（呼び出したスレッドで実行する。イベントループ上で呼ばないこと）
+
+    thread_id を指定した場合はそのスレッドだけ、指定しない場合は自分以外の全スレッドを対象にする
+    """
+    own_id = threading.get_ident()
+    samples: Counter = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        frames = sys._current_frames()
+        for ident, frame in frames.items():
+            if ident == own_id or (thread_id is not None and ident != thread_id):
+                continue
+            samples[collapse_stack(frame)] += 1
+        # フレームへの参照を次のサンプルまで残さない
+        frames = frame = None
+        time.sleep(interval)
+    return samples
+
+
+class SlowRequestRecorder:
+    """
+    処理中の span（HTTPリクエスト・WebSocketメッセージ）がある間だけイベントループのスタックを採取し、
+    threshold 秒以上かかった span のプロファイルを直近 max_profiles 件保持する
+
+    サンプルは span の実行中にループが処理していた全てのもの（ルームのアクターなど別タスクの処理も含む）
+    """
+    def __init__(self, threshold: float, interval: float, max_profiles: int):
+        self.threshold = threshold
+        self.interval = interval
+        self.enabled = threshold > 0
+        self.profiles: deque = deque(maxlen=max_profiles)
+        self._active: Dict[int, Counter] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._loop_thread_id: Optional[int] = None
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def span(self, route: str, room_code: Optional[str] = None):
+        """処理を計測するコンテキストマネージャ（無効の場合は何もしない）"""
+        if not self.enabled:
+            return nullcontext()
+        return self._span(route, room_code)
+
+    @contextmanager
+    def _span(self, route: str, room_code: Optional[str]) -> Iterator[dict]:
+        self._ensure_sampler()
+        tags = {"route": route, "room_code": room_code}
+        samples: Counter = Counter()
+        with self._lock:
+            span_id = self._next_id
+            self._next_id += 1
+            self._active[span_id] = samples
+        self._wakeup.set()
+        started = time.perf_counter()
+        try:
+            yield tags
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                del self._active[span_id]
+            if elapsed >= self.threshold:
+                self._record(tags, elapsed, samples)
+
+    def _record(self, tags: dict, elapsed: float, samples: Counter):
+        self.profiles.append({
+            "at": datetime.now().isoformat(),
+            "route": tags["route"],
+            "room_code": tags["room_code"],
+            "duration_ms": round(elapsed * 1000, 1),
+            "samples": sum(samples.values()),
+            "collapsed": format_collapsed(samples),
+        })
+        print(f"[PROFILE] Slow {tags['route']} (room={tags['room_code']}): {elapsed * 1000:.1f}ms", file=sys.stderr)
+
+    def _ensure_sampler(self):
+        # span はイベントループ上で開始されるので、最初の span のスレッドをループのスレッドとする
+        if self._thread is None:
+            self._loop_thread_id = threading.get_ident()
+            self._thread = threading.Thread(target=self._sample_loop, name="slow-request-sampler", daemon=True)
+            self._thread.start()
+
+    def _sample_loop(self):
+        while True:
+            # 処理中の span がない間は待機する
+            self._wakeup.wait()
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+                    continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stack = collapse_stack(frame)
+                del frame
+                with self._lock:
+                    for samples in self._active.values():
+                        samples[stack] += 1
+            time.sleep(self.interval)
+
+
+class SlowRequestMiddleware:
+    """HTTPリクエストごとに span を作るASGIミドルウェア（route はメソッドとパス、room_code はパスパラメータ）"""
+    def __init__(self, app: ASGIApp, recorder: SlowRequestRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with self.recorder.span(f"{scope['method']} {scope['path']}") as tags:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # ルーティング後は scope に一致したルートとパスパラメータが入っている
+                route = scope.get("route")
+                if route is not None and hasattr(route, "path"):
+                    tags["route"] = f"{scope['method']} {route.path}"
+                tags["room_code"] = scope.get("path_params", {}).get("room_code")
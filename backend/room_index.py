@@ -0,0 +1,133 @@
+"""管理API用のルーム一覧（ルームごとの集計値を変更時に更新し、一覧取得時には再計算しない）"""
+import bisect
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class RoomSummary:
+    room_code: str
+    phase: str
+    active_round: int
+    players_count: int
+    cards_count: int
+    votes_count: int
+    chat_count: int
+    created_at: str
+    last_activity_at: str
+    last_activity_ts: float
+
+    @property
+    def size(self) -> int:
+        """ルームが保持しているレコード数（プレイヤー・配置済みカード・投票・チャット）"""
+        return self.players_count + self.cards_count + self.votes_count + self.chat_count
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "room_code": self.room_code,
+            "phase": self.phase,
+            "active_round": self.active_round,
+            "players_count": self.players_count,
+            "cards_count": self.cards_count,
+            "votes_count": self.votes_count,
+            "chat_count": self.chat_count,
+            "size": self.size,
+            "created_at": self.created_at,
+            "last_activity_at": self.last_activity_at,
+            "idle_seconds": max(0, int(now - self.last_activity_ts)),
+        }
+
+
+@dataclass
+class RoomFilter:
+    """一覧の絞り込み条件（None の条件は使わない）"""
+    phase: Optional[str] = None
+    min_idle_seconds: Optional[float] = None
+    max_idle_seconds: Optional[float] = None
+    min_players: Optional[int] = None
+    max_players: Optional[int] = None
+    min_size: Optional[int] = None
+
+    def matches(self, summary: RoomSummary, now: float) -> bool:
+        if self.phase is not None and summary.phase != self.phase:
+            return False
+        idle = now - summary.last_activity_ts
+        if self.min_idle_seconds is not None and idle < self.min_idle_seconds:
+            return False
+        if self.max_idle_seconds is not None and idle > self.max_idle_seconds:
+            return False
+        if self.min_players is not None and summary.players_count < self.min_players:
+            return False
+        if self.max_players is not None and summary.players_count > self.max_players:
+            return False
+        if self.min_size is not None and summary.size < self.min_size:
+            return False
+        return True
+
+
+class RoomIndex:
+    """
+    ルームコード順に並べたルームの集計値
+
+    - 集計値はルームの変更後（アクターのバッチ適用後・作成時）に update で差し替える
+    - 一覧はルームコードをカーソルにしたページ単位で返す（ページの間にルームが増減しても重複・欠落しない）
+    """
+    def __init__(self):
+        self.summaries: Dict[str, RoomSummary] = {}
+        self.codes: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    def update(self, summary: RoomSummary):
+        if summary.room_code not in self.summaries:
+            bisect.insort(self.codes, summary.room_code)
+        self.summaries[summary.room_code] = summary
+
+    def remove(self, room_code: str):
+        if self.summaries.pop(room_code, None) is None:
+            return
+        index = bisect.bisect_left(self.codes, room_code)
+        if index < len(self.codes) and self.codes[index] == room_code:
+            del self.codes[index]
+
+    def scan(self, after: Optional[str]) -> Iterator[RoomSummary]:
+        """
+        after より後のルームをルームコード順に返す
+
+        残りをスライスでコピーせずに添字で辿る（ページごとの費用が一覧全体の件数に比例しない）
+        """
+        index = bisect.bisect_right(self.codes, after) if after else 0
+        while index < len(self.codes):
+            room_code = self.codes[index]
+            index += 1
+            summary = self.summaries.get(room_code)
+            if summary is not None:
+                yield summary
+
+    def page(
+        self,
+        after: Optional[str],
+        limit: int,
+        room_filter: RoomFilter,
+        now: float,
+        scan_limit: int
+    ) -> Tuple[List[RoomSummary], Optional[str]]:
+        """
+        条件に一致するルームを最大 limit 件返す
+
+        1回に調べるルームは scan_limit 件まで（条件に一致するルームが少なくてもイベントループを長く止めない）。
+        続きがある場合は次のカーソル（最後に調べたルームコード）を返す
+        """
+        items: List[RoomSummary] = []
+        last_code = None
+        for scanned, summary in enumerate(self.scan(after), start=1):
+            last_code = summary.room_code
+            if room_filter.matches(summary, now):
+                items.append(summary)
+            if len(items) >= limit or scanned >= scan_limit:
+                break
+        else:
+            return items, None
+        has_more = bisect.bisect_right(self.codes, last_code) < len(self.codes)
+        return items, last_code if has_more else None
@@ -0,0 +1,148 @@
+"""
+フロントエンドのビルド成果物（backend/static）の配信
+
+起動時に全ファイルをメモリに読み込み、リクエストごとのファイルアクセスをなくす。
+ビルド時に作成した .gz / .br があれば Accept-Encoding に応じてそのまま返す。
+
+使い方（ビルド時の事前圧縮）:
+    python static_site.py static
+"""
+import gzip
+import hashlib
+import mimetypes
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from codec import etag_matches, negotiate_encoding, variant_etag
+
+try:
+    import brotli
+except ImportError:  # brotliは任意依存
+    brotli = None
+
+# ファイル名にハッシュが含まれる（内容が変わればURLも変わる）ディレクトリ
+IMMUTABLE_PREFIX = "/assets/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# index.html などハッシュを含まないファイルは毎回ETagで再検証させる
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# 事前圧縮するファイルの拡張子と、圧縮版の拡張子
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".wasm"}
+ENCODING_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+# SPAのルーティングに渡さないパス（APIとWebSocketは通常の404にする）
+RESERVED_PREFIXES = ("/api/", "/ws/")
+
+
+@dataclass
+class StaticFile:
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def response(self, request_headers: Dict[str, str], head: bool) -> Response:
+        """圧縮版ごとに ETag を変える（304 にも Vary を付け、キャッシュが別のエンコーディングを返さないようにする）"""
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""), self.encoded)
+        headers = {"ETag": variant_etag(self.etag, encoding), "Cache-Control": self.cache_control}
+        if self.encoded:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(request_headers.get("if-none-match"), headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        body = self.body
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            body = self.encoded[encoding]
+        if head:
+            headers["Content-Length"] = str(len(body))
+            return Response(b"", media_type=self.media_type, headers=headers)
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+def load_static_file(path: Path, url_path: str) -> StaticFile:
+    """ファイルと、隣にある圧縮版（.gz / .br）を読み込む"""
+    body = path.read_bytes()
+    encoded = {}
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        variant = path.with_name(path.name + suffix)
+        if variant.is_file():
+            encoded[encoding] = variant.read_bytes()
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+        media_type += "; charset=utf-8"
+    return StaticFile(
+        body=body,
+        media_type=media_type,
+        etag=f'"{hashlib.sha1(body).hexdigest()}"',
+        cache_control=IMMUTABLE_CACHE_CONTROL if url_path.startswith(IMMUTABLE_PREFIX) else REVALIDATE_CACHE_CONTROL,
+        encoded=encoded,
+    )
+
+
+class StaticSite:
+    """
+    静的ファイルとSPAのフォールバックを配信するASGIアプリ
+
+    ルーターの default（どのルートにも一致しなかったリクエスト）として使う:
+    - 静的ファイルに一致するパス: メモリ上のファイルを返す
+    - それ以外のGET/HEAD（SPAのルート）: index.html を返す
+    - /api/・/ws/ や GET/HEAD 以外: 元の default（404）に渡す
+    """
+    def __init__(self, directory: Path, fallback: ASGIApp):
+        self.fallback = fallback
+        self.files: Dict[str, StaticFile] = {}
+        for path in sorted(directory.rglob("*")):
+            if not path.is_file() or path.suffix in ENCODING_SUFFIXES.values():
+                continue
+            url_path = "/" + path.relative_to(directory).as_posix()
+            self.files[url_path] = load_static_file(path, url_path)
+        self.index = self.files.get("/index.html")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        path = scope.get("path", "")
+        method = scope.get("method")
+        if scope["type"] != "http" or method not in ("GET", "HEAD") or path.startswith(RESERVED_PREFIXES):
+            await self.fallback(scope, receive, send)
+            return
+
+        static_file = self.files.get(path) or self.index
+        if static_file is None:
+            await self.fallback(scope, receive, send)
+            return
+
+        request_headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        await static_file.response(request_headers, method == "HEAD")(scope, receive, send)
+
+
+def precompress_directory(directory: Path) -> int:
+    """ビルド成果物の圧縮可能なファイルに .gz（brotli があれば .br も）を作成する"""
+    count = 0
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        body = path.read_bytes()
+        variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=11)
+        for encoding, data in variants.items():
+            variant = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+            # 小さくならない場合は作らない（元のファイルをそのまま返す。前回のビルドの圧縮版も消す）
+            if len(data) < len(body):
+                variant.write_bytes(data)
+                count += 1
+            elif variant.exists():
+                variant.unlink()
+    return count
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "static"
+    written = precompress_directory(target)
+    print(f"[STATIC] {written} compressed files written in {target}" + ("" if brotli else " (brotli not installed: gzip only)"))
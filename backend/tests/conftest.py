@@ -0,0 +1,39 @@
+"""テスト共通のフィクスチャ（アプリは1プロセスで共有するので、テストごとに別のルームコードを使う）"""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    # lifespan を動かし、バックグラウンドのタスク（次ラウンドの事前計算など）がリクエストをまたいで動くようにする
+    with TestClient(main.app) as test_client:
+        yield test_client
+    # 終了時の処理でドレイン中になるので、次のテストのために戻す
+    main.admission.draining_retry_after = None
+
+
+@pytest.fixture
+def token_auth(monkeypatch):
+    """トークン認証（ホストチェックを含む）を有効にする"""
+    monkeypatch.setattr(main, "REQUIRE_TOKEN_AUTH", True)
+
+
+def auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_lobby(client: TestClient, room_code: str, guests: int = 1) -> dict:
+    """ホスト（host）とゲスト（guest1, guest2, ...）のいるルームを作り、{player_id: token} を返す"""
+    tokens = {
+        "host": client.post("/api/rooms/create", json={
+            "room_code": room_code, "player_id": "host", "player_name": "Host",
+        }).json()["token"],
+    }
+    for i in range(1, guests + 1):
+        player_id = f"guest{i}"
+        tokens[player_id] = client.post("/api/rooms/join", json={
+            "room_code": room_code, "player_id": player_id, "player_name": f"Guest {i}",
+        }).json()["token"]
+    return tokens
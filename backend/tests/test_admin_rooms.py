@@ -0,0 +1,76 @@
+"""管理APIのルーム一覧とデバッグ用のルーム一覧（管理者トークンとページング）"""
+import pytest
+
+import main
+from conftest import auth, create_lobby
+from room_index import RoomFilter, RoomIndex, RoomSummary
+
+ADMIN = "test-admin-token"
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", ADMIN)
+
+
+def walk(client, path: str, limit: int, prefix: str) -> list:
+    codes, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        body = client.get(path, params=params, headers=auth(ADMIN)).json()
+        codes += [room["room_code"] for room in body["rooms"] if room["room_code"].startswith(prefix)]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return codes
+
+
+def test_debug_rooms_requires_admin_token(client, admin_token):
+    assert client.get("/api/debug/rooms").status_code == 401
+    assert client.get("/api/debug/rooms", headers=auth("wrong")).status_code == 401
+
+
+def test_debug_rooms_is_disabled_without_admin_token(client):
+    assert client.get("/api/debug/rooms").status_code == 404
+
+
+def test_debug_rooms_pages_with_players(client, admin_token):
+    for i in range(5):
+        create_lobby(client, f"DBG{i}")
+    assert walk(client, "/api/debug/rooms", 2, "DBG") == [f"DBG{i}" for i in range(5)]
+
+    body = client.get("/api/debug/rooms", params={"cursor": "DBG3", "limit": 1}, headers=auth(ADMIN)).json()
+    assert [room["room_code"] for room in body["rooms"]] == ["DBG4"]
+    assert [player["player_id"] for player in body["rooms"][0]["players"]] == ["host", "guest1"]
+
+
+def test_admin_rooms_pages_match_debug_rooms(client, admin_token):
+    for i in range(3):
+        create_lobby(client, f"ADM{i}")
+    assert walk(client, "/api/admin/rooms", 1, "ADM") == ["ADM0", "ADM1", "ADM2"]
+
+
+def summary(room_code: str, players_count: int = 1) -> RoomSummary:
+    return RoomSummary(room_code, "lobby", 0, players_count, 0, 0, 0, "", "", 0.0)
+
+
+def test_room_index_page_survives_changes_between_pages():
+    index = RoomIndex()
+    for code in ("A", "C", "E"):
+        index.update(summary(code))
+    items, cursor = index.page(None, 2, RoomFilter(), 0, 100)
+    assert [s.room_code for s in items] == ["A", "C"] and cursor == "C"
+
+    # ページの間にルームが増減しても、重複・欠落しない
+    index.update(summary("B"))
+    index.update(summary("D"))
+    index.remove("E")
+    items, cursor = index.page(cursor, 2, RoomFilter(), 0, 100)
+    assert [s.room_code for s in items] == ["D"] and cursor is None
+
+
+def test_room_index_scan_limit_returns_cursor():
+    index = RoomIndex()
+    for i in range(10):
+        index.update(summary(f"R{i}", players_count=1 if i == 9 else 0))
+    items, cursor = index.page(None, 5, RoomFilter(min_players=1), 0, 4)
+    assert items == [] and cursor == "R3"
@@ -0,0 +1,111 @@
+"""アドミッション制御（トークンバケット・ロビー向けの残量・ドレイン中の拒否）"""
+import pytest
+
+import admission
+from admission import MAX_RETRY_AFTER, AdmissionController, TokenBucket, close_reason, retry_after_header
+from metrics import Counter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(admission.time, "monotonic", fake)
+    return fake
+
+
+def make_controller(**overrides) -> AdmissionController:
+    options = dict(
+        max_rooms=2, max_connections=10, connect_rate=1.0, connect_burst=10.0, lobby_share=0.5,
+        retry_after=2.0, retry_jitter=0.0, rejected_counter=Counter("rejected", "", ("kind", "reason")),
+    )
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_token_bucket_refills_up_to_burst(clock):
+    bucket = TokenBucket(rate=2.0, burst=3.0)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    assert bucket.wait_time() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_acquire()
+    clock.now += 60
+    assert bucket.available() == 3.0
+
+
+def test_token_bucket_keeps_reserve(clock):
+    bucket = TokenBucket(rate=1.0, burst=5.0)
+    assert [bucket.try_acquire(reserve=3.0) for _ in range(3)] == [True, True, False]
+    assert bucket.try_acquire()
+    assert bucket.wait_time(reserve=3.0) == pytest.approx(2.0)
+
+
+def test_rooms_limit(clock):
+    controller = make_controller()
+    assert controller.admit_room(room_count=1, connection_count=0) is None
+    assert controller.admit_room(room_count=2, connection_count=0) == 2.0
+    assert controller.rejected_counter.get(kind="room", reason="rooms") == 1
+
+
+def test_lobbies_only_use_their_share_of_connections(clock):
+    controller = make_controller(connect_rate=0)
+    # 新しいロビーは上限の半分まで、進行中のゲームは上限まで
+    assert controller.admit_room(room_count=0, connection_count=5) is not None
+    assert controller.admit_join(connection_count=5, in_progress=False) is not None
+    assert controller.admit_join(connection_count=9, in_progress=True) is None
+    assert controller.admit_connection(connection_count=5, in_progress=False) is not None
+    assert controller.admit_connection(connection_count=9, in_progress=True) is None
+    assert controller.admit_connection(connection_count=10, in_progress=True) is not None
+    # 既存の接続の置き換えは接続数を増やさない
+    assert controller.admit_connection(connection_count=10, in_progress=True, replaces=True) is None
+    assert controller.rejected_counter.get(kind="connection", reason="connections") == 2
+
+
+def test_connect_rate_reserves_tokens_for_games_in_progress(clock):
+    controller = make_controller(max_connections=0)
+    # バースト 10 のうち 5 はロビー向けに使えない
+    lobby = [controller.admit_connection(0, in_progress=False) for _ in range(6)]
+    assert lobby[:5] == [None] * 5 and lobby[5] is not None
+    game = [controller.admit_connection(0, in_progress=True) for _ in range(6)]
+    assert game[:5] == [None] * 5 and game[5] is not None
+    assert controller.rejected_counter.get(kind="connection", reason="rate") == 2
+
+
+def test_rate_rejection_waits_for_the_bucket(clock):
+    controller = make_controller(max_connections=0, connect_rate=0.1, connect_burst=1.0, lobby_share=1.0)
+    assert controller.admit_connection(0, in_progress=True) is None
+    assert controller.admit_connection(0, in_progress=True) == pytest.approx(10.0)
+
+
+def test_draining_rejects_everything(clock):
+    controller = make_controller(max_rooms=0, max_connections=0, connect_rate=0)
+    assert not controller.enabled
+    controller.start_draining(5.0)
+    assert controller.admit_room(0, 0) == 5.0
+    assert controller.admit_join(0, in_progress=True) == 5.0
+    assert controller.admit_connection(0, in_progress=True, replaces=True) == 5.0
+    for kind in ("room", "join", "connection"):
+        assert controller.rejected_counter.get(kind=kind, reason="draining") == 1
+
+
+def test_retry_after_jitter_is_bounded(clock):
+    controller = make_controller(retry_after=10.0, retry_jitter=0.5)
+    values = [controller.admit_room(room_count=2, connection_count=0) for _ in range(50)]
+    assert all(10.0 <= value <= 15.0 for value in values)
+    controller.start_draining(1000.0)
+    assert controller.admit_room(0, 0) == MAX_RETRY_AFTER
+
+
+def test_retry_after_header_and_close_reason():
+    assert retry_after_header(0.2) == "1"
+    assert retry_after_header(2.0) == "2"
+    assert retry_after_header(2.1) == "3"
+    assert close_reason(2.25) == (1013, "retry_after=2.2")
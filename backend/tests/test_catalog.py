@@ -0,0 +1,87 @@
+"""カードカタログの再読み込み（IDの引き継ぎ・バージョン）"""
+import json
+import shutil
+
+import pytest
+
+import catalog
+import main
+from catalog import CardCatalog, CatalogError, load_catalog
+
+AXES = [{"id": f"a{i}", "positive": "+", "negative": "-", "themes": ["food", "daily"]} for i in range(3)]
+
+
+def test_base_keeps_ids_and_deleted_names():
+    v1 = CardCatalog({"food": ["apple", "bread"], "daily": ["bread", "clock"]}, AXES)
+    assert [v1.ref(name) for name in ("apple", "bread", "clock")] == [0, 1, 2]
+    assert v1.themes["daily"] == (1, 2)
+
+    v2 = CardCatalog({"food": ["bread", "donut"], "daily": ["clock"]}, AXES, base=v1)
+    assert (v2.ref("bread"), v2.ref("clock"), v2.ref("donut")) == (1, 2, 3)
+    # 削除されたカードの ID も同じ名前に戻せるが、プールには含まれない
+    assert v2.name(0) == "apple"
+    assert v2.all_refs == (1, 2, 3) and len(v2) == 3
+    with pytest.raises(catalog.UnknownCard):
+        CardCatalog({"food": ["bread"]}, AXES).ref("apple")
+
+
+def test_version_depends_only_on_content():
+    v1 = CardCatalog({"food": ["apple", "bread"]}, AXES)
+    v2 = CardCatalog({"food": ["bread", "donut"]}, AXES, base=v1)
+    fresh = CardCatalog({"food": ["bread", "donut"]}, AXES)
+    assert v2.ids != fresh.ids
+    assert v2.version == fresh.version and v2.manifest() == fresh.manifest()
+    assert v1.version != v2.version
+    assert CardCatalog({"food": ["apple", "bread"]}, AXES[:2]).version != v1.version
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """定義ファイルのコピーを読み込むようにし、差し替えたカタログはテスト後に戻す"""
+    for name in (catalog.CARDS_FILE, catalog.AXIS_LABELS_FILE):
+        shutil.copy(catalog.DATA_DIR / name, tmp_path / name)
+    monkeypatch.setattr(main, "load_catalog", lambda base=None: load_catalog(tmp_path, base=base))
+    monkeypatch.setattr(main, "card_catalog", main.card_catalog)
+    monkeypatch.setattr(main, "rendered_catalog", main.rendered_catalog)
+    monkeypatch.setattr(main, "catalogs", dict(main.catalogs))
+    monkeypatch.setattr(main, "rendered_catalogs", dict(main.rendered_catalogs))
+    return tmp_path
+
+
+def edit_cards(data_dir, edit):
+    path = data_dir / catalog.CARDS_FILE
+    cards = json.loads(path.read_text(encoding="utf-8"))
+    edit(cards)
+    path.write_text(json.dumps(cards, ensure_ascii=False), encoding="utf-8")
+
+
+def test_reload_keeps_ids_of_existing_cards(data_dir):
+    previous = main.card_catalog
+    assert main.reload_catalog()["changed"] is False
+
+    removed = next(iter(previous.themes.values()))[0]
+    removed_name = previous.name(removed)
+
+    def edit(cards):
+        for theme in cards:
+            cards[theme] = [name for name in cards[theme] if name != removed_name]
+        cards["food"].append("新しいカード")
+
+    edit_cards(data_dir, edit)
+    result = main.reload_catalog()
+    current = main.card_catalog
+    assert result["changed"] and result["previous_version"] == previous.version
+    assert all(current.ref(name) == ref for name, ref in previous.ids.items())
+    assert current.ref("新しいカード") == len(previous.names)
+    assert removed not in current.all_refs and current.name(removed) == removed_name
+    # 再読み込みしたプロセスと新しく起動したプロセスで同じバージョン
+    assert current.version == load_catalog(data_dir).version
+    assert main.rendered_catalogs[current.version]["version"] == current.version
+
+
+def test_invalid_reload_keeps_current_catalog(data_dir):
+    previous = main.card_catalog
+    edit_cards(data_dir, lambda cards: cards.update(food=[]))
+    with pytest.raises(CatalogError):
+        main.reload_catalog()
+    assert main.card_catalog is previous
@@ -0,0 +1,95 @@
+"""圧縮形式のネゴシエーション・エンコーディングごとのETag・WebSocketフレームの圧縮"""
+import os
+import zlib
+
+import pytest
+
+from codec import (
+    CONTENT_ENCODINGS, FRAME_DEFLATE, FRAME_RAW, compress_frame, encode_frame, etag_matches, negotiate_encoding,
+    shorten_keys, variant_etag,
+)
+
+AVAILABLE = {encoding: b"" for encoding in CONTENT_ENCODINGS}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0.5, identity", "gzip"),
+    ("GZIP", "gzip"),
+    ("*", "gzip"),
+    ("", None),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("gzip;q=0, *", None),
+    ("*;q=0", None),
+    ("gzip;q=abc", None),
+    ("deflate", None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding, {"gzip": b""}) == expected
+
+
+def test_negotiate_encoding_skips_missing_variants():
+    assert negotiate_encoding("gzip, br", {}) is None
+
+
+@pytest.mark.skipif("br" not in CONTENT_ENCODINGS, reason="brotli is not installed")
+def test_negotiate_encoding_prefers_higher_q_then_server_order():
+    assert negotiate_encoding("gzip, br", AVAILABLE) == "br"
+    assert negotiate_encoding("gzip;q=1, br;q=0.5", AVAILABLE) == "gzip"
+
+
+def test_variant_etag():
+    assert variant_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert variant_etag('"abc"', None) == '"abc"'
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('"abc-gzip"', True),
+    ('W/"abc-gzip"', True),
+    ('"other", "abc-gzip"', True),
+    ("*", True),
+    ('"abc"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, '"abc-gzip"') is expected
+
+
+def test_results_etag_differs_per_encoding(client):
+    version = client.get("/api/catalog").json()["version"]
+    path = f"/api/catalog/{version}.json"
+    gzipped = client.get(path, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+
+    # 別のエンコーディングのETagでは304にしない（圧縮されていない本文を返す）
+    response = client.get(path, headers={"Accept-Encoding": "identity", "If-None-Match": gzipped.headers["etag"]})
+    assert response.status_code == 200 and "content-encoding" not in response.headers
+    response = client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+    assert response.status_code == 304
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_compress_frame_threshold():
+    small = encode_frame({"type": "pong"})
+    assert compress_frame(small, 1024, 6) == small
+    assert compress_frame(b"\x81\xa1t\xa4pong", 1024, 6) == FRAME_RAW + b"\x81\xa1t\xa4pong"
+
+    large = encode_frame({"type": "chat", "message": "あ" * 1000})
+    compressed = compress_frame(large, 1024, 6)
+    assert compressed[:1] == FRAME_DEFLATE
+    assert zlib.decompress(compressed[1:], -15).decode("utf-8") == large
+
+
+def test_compress_frame_keeps_incompressible_frames():
+    frame = os.urandom(512)
+    assert compress_frame(frame, 16, 6) == FRAME_RAW + frame
+
+
+def test_compact_encoding_shortens_nested_keys():
+    message = {"type": "events", "events": [{"type": "card_placed", "player_id": "p1"}]}
+    assert shorten_keys(message) == {"t": "events", "e": [{"t": "card_placed", "pi": "p1"}]}
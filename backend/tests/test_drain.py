@@ -0,0 +1,102 @@
+"""
+終了シグナルによるドレインと状態の引き継ぎ（本番と同じ uvicorn main:app で起動して確認する）
+"""
+import asyncio
+import gzip
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import websockets
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def post_json(base: str, path: str, body: dict) -> dict:
+    request = urllib.request.Request(
+        f"{base}{path}", data=json.dumps(body).encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def wait_until_ready(base: str, server: subprocess.Popen):
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise AssertionError(f"server exited early:\n{server.stdout.read()}")
+        try:
+            with urllib.request.urlopen(f"{base}/api/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise AssertionError("server did not start")
+
+
+async def receive_until(ws, message_type: str) -> dict:
+    while True:
+        message = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+        if message.get("type") == message_type:
+            return message
+
+
+async def connect_and_terminate(ws_base: str, lobby: dict, server: subprocess.Popen) -> list:
+    connections = [
+        await websockets.connect(f"{ws_base}/ws/{lobby['room_code']}?player_id={player_id}&token={token}")
+        for player_id, token in lobby["tokens"].items()
+    ]
+    # 接続の登録（プレイヤー一覧の配信）が終わるまで待つ
+    await asyncio.sleep(0.5)
+    server.send_signal(signal.SIGTERM)
+    notices = [await receive_until(ws, "server_restarting") for ws in connections]
+    for ws in connections:
+        await ws.close()
+    return notices
+
+
+def test_sigterm_drains_and_keeps_lobby_players(tmp_path):
+    snapshot_path = tmp_path / "state.json.gz"
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "STATE_SNAPSHOT_PATH": str(snapshot_path),
+        "CATALOG_WATCH_INTERVAL": "0",
+        "PYTHONUNBUFFERED": "1",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    try:
+        wait_until_ready(base, server)
+        room_code = "DRAIN1"
+        tokens = {
+            "p1": post_json(base, "/api/rooms/create", {"room_code": room_code, "player_id": "p1", "player_name": "Alice"})["token"],
+            "p2": post_json(base, "/api/rooms/join", {"room_code": room_code, "player_id": "p2", "player_name": "Bob"})["token"],
+        }
+
+        notices = asyncio.run(connect_and_terminate(f"ws://127.0.0.1:{port}", {"room_code": room_code, "tokens": tokens}, server))
+        assert all(notice["reconnect_in_ms"] > 0 for notice in notices)
+        assert server.wait(timeout=20) is not None
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+    with gzip.open(snapshot_path, "rb") as f:
+        state = json.loads(f.read())["state"]
+    assert room_code in state["rooms"]
+    assert sorted(player["player_id"] for player in state["players"][room_code]) == ["p1", "p2"]
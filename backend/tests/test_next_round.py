@@ -0,0 +1,55 @@
+"""次ラウンドの開始と、結果フェーズ中に事前計算した計画"""
+import json
+import time
+
+import main
+from conftest import auth, create_lobby
+
+
+def move_to_results(client, room_code: str, host_token: str):
+    response = client.post(
+        f"/api/rooms/{room_code}/phase?player_id=host", json={"phase": "results"}, headers=auth(host_token)
+    )
+    assert response.status_code == 200
+    # 事前計算が終わるまで待つ
+    deadline = time.monotonic() + 5
+    while not main.next_round_plans[room_code]["task"].done():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_rejected_request_keeps_precomputed_plan(client, token_auth):
+    tokens = create_lobby(client, "NEXT1")
+    move_to_results(client, "NEXT1", tokens["host"])
+    plan_seed = main.next_round_plans["NEXT1"]["task"].result()["seed"]
+
+    # ホスト以外からの要求は断られ、計画はそのまま残る
+    response = client.post("/api/rooms/NEXT1/next_round?player_id=guest1", headers=auth(tokens["guest1"]))
+    assert response.status_code == 403
+    assert "NEXT1" in main.next_round_plans
+
+    # ホストの要求では事前計算した計画が使われる
+    response = client.post("/api/rooms/NEXT1/next_round?player_id=host", headers=auth(tokens["host"]))
+    assert response.status_code == 200
+    assert response.json()["round_seed"] == str(plan_seed)
+    assert "NEXT1" not in main.next_round_plans
+
+
+def test_next_round_requires_results_phase(client, token_auth):
+    tokens = create_lobby(client, "NEXT2")
+    response = client.post("/api/rooms/NEXT2/next_round?player_id=host", headers=auth(tokens["host"]))
+    assert response.status_code == 400
+    assert main.rooms["NEXT2"]["active_round"] == 0
+
+
+def test_plan_is_discarded_when_players_change(client, token_auth):
+    tokens = create_lobby(client, "NEXT3", guests=2)
+    move_to_results(client, "NEXT3", tokens["host"])
+
+    # 結果フェーズ中にプレイヤーが抜けた場合は計画を使わずに計算し直す
+    response = client.post("/api/rooms/NEXT3/leave?player_id=guest2", headers=auth(tokens["guest2"]))
+    assert response.status_code == 200
+    response = client.post("/api/rooms/NEXT3/next_round?player_id=host", headers=auth(tokens["host"]))
+    assert response.status_code == 200
+    assert "NEXT3" not in main.next_round_plans
+    assert json.loads(main.rooms["NEXT3"]["round_player_slots"]) == [0, 1]
@@ -0,0 +1,44 @@
+"""静的ファイルの配信（圧縮版ごとのETagと条件付きリクエスト）"""
+import gzip
+
+from starlette.applications import Starlette
+from starlette.testclient import TestClient
+
+from static_site import StaticSite
+
+
+def make_client(tmp_path) -> TestClient:
+    (tmp_path / "index.html").write_text("<html>" + "x" * 2000 + "</html>")
+    (tmp_path / "index.html.gz").write_bytes(gzip.compress((tmp_path / "index.html").read_bytes()))
+    app = Starlette()
+    app.router.default = StaticSite(tmp_path, fallback=app.router.default)
+    return TestClient(app)
+
+
+def test_each_encoding_has_its_own_etag(tmp_path):
+    client = make_client(tmp_path)
+    identity = client.get("/index.html", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/index.html", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert identity.headers["etag"] != gzipped.headers["etag"]
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+
+
+def test_if_none_match_is_per_encoding(tmp_path):
+    client = make_client(tmp_path)
+    gzip_etag = client.get("/index.html", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+
+    not_modified = client.get("/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": f'"other", W/{gzip_etag}'})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["vary"] == "Accept-Encoding"
+
+    # gzip 版のETagで identity を要求した場合は本体を返す
+    identity = client.get("/index.html", headers={"Accept-Encoding": "identity", "If-None-Match": gzip_etag})
+    assert identity.status_code == 200
+    assert identity.content.startswith(b"<html>")
+
+
+def test_if_none_match_wildcard(tmp_path):
+    client = make_client(tmp_path)
+    assert client.get("/", headers={"If-None-Match": "*"}).status_code == 304
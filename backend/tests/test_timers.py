@@ -0,0 +1,75 @@
+"""ルームの期限を1つのタスクで管理するタイマー"""
+import asyncio
+import time
+
+from timers import DeadlineScheduler
+
+
+def test_pop_expired_in_deadline_order():
+    scheduler = DeadlineScheduler()
+    scheduler.schedule("b", 20, "B")
+    scheduler.schedule("a", 10, "A")
+    scheduler.schedule("c", 30, "C")
+    assert scheduler.pop_expired(5) == []
+    assert scheduler.pop_expired(25) == [("a", "A"), ("b", "B")]
+    assert len(scheduler) == 1 and scheduler.deadline("c") == 30
+
+
+def test_reschedule_and_cancel():
+    scheduler = DeadlineScheduler()
+    scheduler.schedule("a", 10, "first")
+    scheduler.schedule("a", 50, "second")
+    scheduler.schedule("b", 10)
+    scheduler.cancel("b")
+    scheduler.cancel("missing")
+    # 置き換え・取り消された期限は取り出さない
+    assert scheduler.pop_expired(20) == []
+    assert scheduler.deadline("a") == 50 and scheduler.deadline("b") is None
+    assert scheduler.pop_expired(50) == [("a", "second")]
+    assert len(scheduler) == 0
+
+
+def test_heap_is_compacted_after_many_reschedules():
+    scheduler = DeadlineScheduler()
+    for i in range(1000):
+        scheduler.schedule("a", i)
+    assert len(scheduler._heap) < 100
+    assert scheduler.pop_expired(1000) == [("a", None)]
+
+
+def test_run_calls_handler_and_wakes_for_earlier_deadline():
+    scheduler = DeadlineScheduler()
+    expired = []
+
+    async def on_expired(key, data):
+        expired.append((key, data))
+
+    async def scenario():
+        scheduler.schedule("late", time.time() + 60)
+        task = asyncio.create_task(scheduler.run(on_expired))
+        await asyncio.sleep(0.01)
+        # 待機中より近い期限を登録すると起きて処理する
+        scheduler.schedule("soon", time.time() + 0.05, "data")
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert expired == [("soon", "data")]
+    assert scheduler.deadline("late") is not None
+
+
+def test_failed_handler_is_logged_and_released(capsys):
+    scheduler = DeadlineScheduler()
+
+    async def on_expired(key, data):
+        raise RuntimeError(f"boom {key}")
+
+    async def scenario():
+        scheduler.schedule("a", time.time())
+        task = asyncio.create_task(scheduler.run(on_expired))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert scheduler._handlers == set()
+    assert "boom a" in capsys.readouterr().err
@@ -0,0 +1,81 @@
+"""署名付きプレイヤートークン（改ざん・有効期限・鍵のローテーション）"""
+import pytest
+
+from tokens import InvalidToken, TokenSigner, _b64decode, _b64encode, parse_signing_keys
+
+NOW = 1_700_000_000
+
+
+def make_signer(spec: str = "k2:new-secret,k1:old-secret", ttl: int = 3600) -> TokenSigner:
+    return TokenSigner(parse_signing_keys(spec), ttl)
+
+
+def test_issue_and_verify():
+    signer = make_signer()
+    claims = signer.verify(signer.issue("p1", "ROOM", now=NOW), now=NOW)
+    assert (claims.player_id, claims.room_code, claims.expires_at) == ("p1", "ROOM", NOW + 3600)
+    assert signer.issue("p1", "ROOM", now=NOW).split(".")[1] == "k2"
+
+
+def test_tampered_payload_is_rejected():
+    signer = make_signer()
+    version, kid, payload, signature = signer.issue("p1", "ROOM", now=NOW).split(".")
+    forged = _b64encode(_b64decode(payload).replace(b'"p1"', b'"p2"'))
+    with pytest.raises(InvalidToken, match="Invalid signature"):
+        signer.verify(".".join([version, kid, forged, signature]), now=NOW)
+
+
+def test_tampered_signature_is_rejected():
+    signer = make_signer()
+    token = signer.issue("p1", "ROOM", now=NOW)
+    flipped = token[:-1] + ("A" if token[-1] != "A" else "B")
+    with pytest.raises(InvalidToken):
+        signer.verify(flipped, now=NOW)
+
+
+def test_signature_from_another_secret_is_rejected():
+    token = make_signer("k2:attacker-secret").issue("p1", "ROOM", now=NOW)
+    with pytest.raises(InvalidToken, match="Invalid signature"):
+        make_signer().verify(token, now=NOW)
+
+
+@pytest.mark.parametrize("token", ["", "v1.k2.abc", "v2.k2.abc.def", "v1.k2.!!!.def"])
+def test_malformed_token_is_rejected(token):
+    with pytest.raises(InvalidToken):
+        make_signer().verify(token, now=NOW)
+
+
+def test_expired_token_is_rejected():
+    signer = make_signer(ttl=60)
+    token = signer.issue("p1", "ROOM", now=NOW)
+    assert signer.verify(token, now=NOW + 60).player_id == "p1"
+    with pytest.raises(InvalidToken, match="Token expired"):
+        signer.verify(token, now=NOW + 61)
+
+
+def test_rotation_accepts_tokens_signed_with_older_key():
+    old_token = make_signer("k1:old-secret").issue("p1", "ROOM", now=NOW)
+    rotated = make_signer("k2:new-secret,k1:old-secret")
+    assert rotated.verify(old_token, now=NOW).player_id == "p1"
+    assert rotated.issue("p1", "ROOM", now=NOW).split(".")[1] == "k2"
+
+
+def test_retired_key_is_rejected():
+    old_token = make_signer("k1:old-secret").issue("p1", "ROOM", now=NOW)
+    with pytest.raises(InvalidToken, match="Unknown signing key"):
+        make_signer("k2:new-secret").verify(old_token, now=NOW)
+
+
+@pytest.mark.parametrize("spec", ["nocolon", ":secret", "kid:", "k.1:secret"])
+def test_invalid_signing_key_spec(spec):
+    with pytest.raises(ValueError):
+        parse_signing_keys(spec)
+
+
+def test_token_for_another_room_or_player_is_rejected():
+    import main
+
+    token = main.generate_token("p1", "ROOM1")
+    assert main.check_token(token, "p1", "ROOM1") == ""
+    assert "not valid for this room" in main.check_token(token, "p1", "ROOM2")
+    assert main.check_token(token, "p2", "ROOM1").startswith("Invalid token")
@@ -0,0 +1,36 @@
+"""トレースの記録と書き出し"""
+import asyncio
+import json
+
+from tracing import Tracer
+
+
+def test_export_is_batched_off_the_request_path(tmp_path):
+    export_path = tmp_path / "traces.ndjson"
+    tracer = Tracer(sample_rate=1.0, max_traces=10, export_path=str(export_path))
+
+    async def scenario():
+        task = asyncio.create_task(tracer.run(interval=0.05))
+        for i in range(3):
+            with tracer.trace("request", index=i):
+                with tracer.span("child"):
+                    pass
+        # トレースの完了時にはファイルに書き込まない
+        assert not export_path.exists()
+        await asyncio.sleep(0.2)
+        task.cancel()
+
+    asyncio.run(scenario())
+    lines = export_path.read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["request"] * 3
+    assert len(tracer.traces) == 3
+
+
+def test_flush_export_writes_pending_traces(tmp_path):
+    export_path = tmp_path / "traces.ndjson"
+    tracer = Tracer(sample_rate=1.0, max_traces=10, export_path=str(export_path))
+    with tracer.trace("request"):
+        pass
+    tracer.flush_export()
+    tracer.flush_export()
+    assert len(export_path.read_text().splitlines()) == 1
@@ -0,0 +1,53 @@
+"""トラフィックの記録（匿名化・セッション・途中で切れたファイルの読み込み）"""
+import gzip
+import shutil
+
+from traffic import Anonymizer, TrafficRecorder, read_recording, split_sessions
+
+
+def record(path, entries):
+    recorder = TrafficRecorder(str(path))
+    for entry in entries:
+        recorder.write(entry)
+    return recorder
+
+
+def test_sessions_are_kept_apart(tmp_path):
+    path = tmp_path / "rec.ndjson.gz"
+    record(path, [{"t": 5, "kind": "http", "room": "A"}, {"t": 10, "kind": "http", "room": "A"}]).close()
+    # 再起動後の記録は同じファイルに追記され、時刻は 0 から始まる
+    record(path, [{"t": 1, "kind": "http", "room": "B"}]).close()
+
+    sessions = split_sessions(read_recording(str(path)))
+    assert [[(e["t"], e["room"]) for e in session] for session in sessions] == [[(5, "A"), (10, "A")], [(1, "B")]]
+
+
+def test_recording_without_session_headers_is_one_session(tmp_path):
+    path = tmp_path / "old.ndjson.gz"
+    with gzip.open(path, "wb") as f:
+        f.write(b'{"t": 2, "kind": "http"}\n{"t": 1, "kind": "http"}\n')
+    assert [[e["t"] for e in session] for session in split_sessions(read_recording(str(path)))] == [[1, 2]]
+
+
+def test_unclosed_recording_is_readable_up_to_last_flush(tmp_path):
+    path = tmp_path / "rec.ndjson.gz"
+    recorder = record(path, [{"t": i, "kind": "http"} for i in range(24)])
+    recorder.flush()
+    recorder.write({"t": 99, "kind": "http"})
+    # close せずにプロセスが終了した状態のファイル
+    crashed = tmp_path / "crashed.ndjson.gz"
+    shutil.copy(path, crashed)
+    entries = read_recording(str(crashed))
+    assert [e["t"] for e in entries if e["kind"] == "http"] == list(range(24))
+    recorder.close()
+
+
+def test_anonymizer_hides_secrets_and_identities():
+    anonymizer = Anonymizer(salt=b"fixed")
+    body = anonymizer.obj({"player_id": "p1", "player_name": "Alice", "message": "hello", "token": "secret"})
+    assert "token" not in body
+    assert body["player_id"].startswith("p-") and body["player_id"] != "p1"
+    assert body["player_name"].startswith("n-")
+    assert body["message"] == "*****"
+    assert anonymizer.obj({"player_id": "p1"})["player_id"] == body["player_id"]
+    assert "token" not in anonymizer.query("player_id=p1&token=secret")
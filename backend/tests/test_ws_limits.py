@@ -0,0 +1,82 @@
+"""WebSocketの受信制限（種類ごとのレート・違反の上限・フレームサイズ）"""
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from ws_limits import DEFAULT_RATE_LIMITS, InboundLimiter, message_category, parse_rate_limits
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    """バケットを補充させない"""
+    monkeypatch.setattr("admission.time.monotonic", lambda: 1000.0)
+
+
+def test_parse_rate_limits_overrides_defaults():
+    defaults = parse_rate_limits("")
+    assert defaults["chat"] == (1.0, 5.0)
+    assert len(defaults) == len(DEFAULT_RATE_LIMITS.split(","))
+
+    limits = parse_rate_limits(" chat = 2/10 , custom=3/4,")
+    assert limits["chat"] == (2.0, 10.0)
+    assert limits["custom"] == (3.0, 4.0)
+    assert limits["ping"] == defaults["ping"]
+
+
+@pytest.mark.parametrize("spec", ["chat", "chat=1", "chat=a/b"])
+def test_parse_rate_limits_rejects_invalid_spec(spec):
+    with pytest.raises(ValueError, match="Invalid rate limit"):
+        parse_rate_limits(spec)
+
+
+def test_message_category():
+    commands = {"place_card", "vote"}
+    assert message_category("chat", commands) == "chat"
+    assert message_category("vote", commands) == "command"
+    assert message_category("anything", commands) == "other"
+    assert message_category(["chat"], commands) == "other"
+    assert message_category({"type": "vote"}, commands) == "other"
+    assert message_category(None, commands) == "other"
+
+
+def test_limiter_per_category(frozen_clock):
+    limiter = InboundLimiter(parse_rate_limits("chat=1/2,ping=0/0"), 1, 3)
+    assert [limiter.allow("chat") for _ in range(3)] == [True, True, False]
+    # 他の種類のバケットは使わない・毎秒の件数が 0 の種類は制限しない
+    assert limiter.allow("command")
+    assert all(limiter.allow("ping") for _ in range(100))
+    assert limiter.allow("unknown")
+
+
+def test_limiter_violations_run_out(frozen_clock):
+    limiter = InboundLimiter({}, 1, 3)
+    assert [limiter.violation() for _ in range(4)] == [True, True, True, False]
+
+
+def close_code(websocket) -> int:
+    with pytest.raises(WebSocketDisconnect) as info:
+        while True:
+            websocket.receive_text()
+    return info.value.code
+
+
+def test_oversized_frame_disconnects(client, monkeypatch):
+    monkeypatch.setattr(main, "WS_MAX_FRAME_BYTES", 1024)
+    create_room(client, "WSL1")
+    with client.websocket_connect("/ws/WSL1?player_id=host&load_history=false") as websocket:
+        websocket.send_text('{"type":"chat","message":"' + "x" * 2000 + '"}')
+        assert close_code(websocket) == 1009
+
+
+def test_repeated_violations_disconnect(client, monkeypatch):
+    monkeypatch.setattr(main, "WS_VIOLATION_BURST", 3)
+    create_room(client, "WSL2")
+    with client.websocket_connect("/ws/WSL2?player_id=host&load_history=false") as websocket:
+        for _ in range(4):
+            websocket.send_text("[]")
+        assert close_code(websocket) == 1008
+
+
+def create_room(client, room_code: str):
+    response = client.post("/api/rooms/create", json={"room_code": room_code, "player_id": "host", "player_name": "Host"})
+    assert response.status_code == 200
@@ -0,0 +1,97 @@
+"""
+多数のルームの期限を1つのタスクで管理するタイマー
+
+期限はヒープ（最小の期限が先頭）で保持し、1つのタスクが最も近い期限まで sleep する。
+- schedule: O(log n)。同じキーを再登録すると前の期限は無効になる
+- cancel: O(1)。ヒープからは取り除かず、取り出した時点で無効なものを読み飛ばす（無効な要素が増えすぎたら作り直す）
+ルームごとに sleep するコルーチンを持たないため、数万ルームでもタスクは1つだけ
+"""
+import asyncio
+import heapq
+import itertools
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+# 無効な要素がこの倍率を超えたらヒープを作り直す
+COMPACT_RATIO = 2
+
+
+class DeadlineScheduler:
+    def __init__(self):
+        # (期限, 登録番号, キー)
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        # キー -> (期限, 登録番号, データ)。ヒープの要素は登録番号が一致する場合のみ有効
+        self._entries: Dict[Hashable, Tuple[float, int, Any]] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        # 実行中の on_expired のタスク（イベントループは弱参照しか持たないので、終わるまでここで保持する）
+        self._handlers: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, key: Hashable, deadline: float, data: Any = None):
+        """key の期限を deadline（time.time() の秒）に設定する（既存の期限は置き換える）"""
+        number = next(self._counter)
+        self._entries[key] = (deadline, number, data)
+        heapq.heappush(self._heap, (deadline, number, key))
+        # 最も近い期限が変わった場合は待機中のタスクを起こす
+        if self._heap[0][1] == number and self._wakeup is not None:
+            self._wakeup.set()
+        if len(self._heap) > COMPACT_RATIO * len(self._entries) + 64:
+            self._compact()
+
+    def cancel(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def _compact(self):
+        self._heap = [(deadline, number, key) for key, (deadline, number, _) in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def pop_expired(self, now: float) -> List[Tuple[Hashable, Any]]:
+        """期限が過ぎた (キー, データ) を期限順に取り出す"""
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, number, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != number:
+                continue  # 取り消し・再登録された期限
+            del self._entries[key]
+            expired.append((key, entry[2]))
+        return expired
+
+    def _next_delay(self, now: float) -> Optional[float]:
+        while self._heap:
+            _, number, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != number:
+                heapq.heappop(self._heap)
+                continue
+            return max(0.0, self._heap[0][0] - now)
+        return None
+
+    async def run(self, on_expired: Callable[[Hashable, Any], Awaitable[None]]):
+        """期限が来たキーごとに on_expired を別タスクで呼び出し続ける"""
+        self._wakeup = asyncio.Event()
+        while True:
+            delay = self._next_delay(time.time())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                continue  # より近い期限が登録された
+            except asyncio.TimeoutError:
+                pass
+            for key, data in self.pop_expired(time.time()):
+                task = asyncio.create_task(on_expired(key, data))
+                self._handlers.add(task)
+                task.add_done_callback(self._handler_done)
+
+    def _handler_done(self, task: asyncio.Task):
+        self._handlers.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[TIMER] Deadline handler failed: {task.exception()!r}", file=sys.stderr)
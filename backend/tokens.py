@@ -0,0 +1,112 @@
+"""HMAC署名付きプレイヤートークン"""
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+TOKEN_VERSION = "v1"
+
+
+class InvalidToken(Exception):
+    """トークンの形式・署名・有効期限・対象が不正"""
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    player_id: str
+    room_code: str
+    expires_at: int
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def parse_signing_keys(spec: str) -> Dict[str, bytes]:
+    """
+    "kid:secret,kid:secret" 形式の署名鍵リストを解析
+
+    先頭の鍵で署名し、全ての鍵で検証する（鍵のローテーション用）
+    """
+    keys: Dict[str, bytes] = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        kid, sep, secret = entry.partition(":")
+        if not sep or not kid or not secret or "." in kid:
+            raise ValueError(f"Invalid signing key entry: {entry!r} (expected kid:secret)")
+        keys[kid] = secret.encode("utf-8")
+    return keys
+
+
+class TokenSigner:
+    """
+    プレイヤートークンの発行・検証
+
+    形式: v1.{kid}.{payload}.{signature}
+    - payload: {"p": player_id, "r": room_code, "e": 有効期限(UNIX秒)} のbase64url
+    - signature: "v1.{kid}.{payload}" の HMAC-SHA256 のbase64url
+    検証は共有ストレージを参照しないため、複数ワーカー・再起動後でも同じトークンが使える
+    ホストかどうかはホストの交代で変わるので含めない（ホストの確認はルームのプレイヤー情報で行う）
+    """
+    def __init__(self, keys: Dict[str, bytes], ttl_seconds: int):
+        if not keys:
+            raise ValueError("At least one signing key is required")
+        self.keys = keys
+        self.active_kid = next(iter(keys))
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def ephemeral(cls, ttl_seconds: int) -> "TokenSigner":
+        """プロセス起動ごとにランダムな鍵を使う（単一ワーカーの開発環境用）"""
+        return cls({"dev": secrets.token_bytes(32)}, ttl_seconds)
+
+    def _sign(self, kid: str, signing_input: str) -> bytes:
+        return hmac.new(self.keys[kid], signing_input.encode("ascii"), hashlib.sha256).digest()
+
+    def issue(self, player_id: str, room_code: str, now: Optional[float] = None) -> str:
+        """トークンを発行"""
+        expires_at = int(now if now is not None else time.time()) + self.ttl_seconds
+        payload = json.dumps(
+            {"p": player_id, "r": room_code, "e": expires_at},
+            ensure_ascii=False, separators=(",", ":")
+        )
+        signing_input = f"{TOKEN_VERSION}.{self.active_kid}.{_b64encode(payload.encode('utf-8'))}"
+        return f"{signing_input}.{_b64encode(self._sign(self.active_kid, signing_input))}"
+
+    def verify(self, token: str, now: Optional[float] = None) -> TokenClaims:
+        """署名と有効期限を検証してクレームを返す（不正な場合は InvalidToken）"""
+        parts = token.split(".")
+        if len(parts) != 4 or parts[0] != TOKEN_VERSION:
+            raise InvalidToken("Malformed token")
+        version, kid, payload, signature = parts
+        if kid not in self.keys:
+            raise InvalidToken("Unknown signing key")
+
+        try:
+            expected = self._sign(kid, f"{version}.{kid}.{payload}")
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise InvalidToken("Invalid signature")
+            claims = json.loads(_b64decode(payload))
+            result = TokenClaims(
+                player_id=str(claims["p"]),
+                room_code=str(claims["r"]),
+                expires_at=int(claims["e"]),
+            )
+        except InvalidToken:
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidToken("Malformed token") from e
+
+        if result.expires_at < (now if now is not None else time.time()):
+            raise InvalidToken("Token expired")
+        return result
@@ -0,0 +1,236 @@
+"""
+リクエストからブロードキャストまでのトレース
+
+- Tracer.trace: ルートspan（HTTPリクエスト・WebSocketメッセージ）を開始する。sample_rate の割合だけ記録する
+- Tracer.span: 現在のトレースの子spanを作る（記録中のトレースがなければ何もしない）
+- 現在のspanは contextvar で受け渡す。ルームのアクターのように別タスクで処理する場合は
+  current_spans で取り出したものを activate で有効にする
+- 複数のトレースのspanを同時に有効にできる（まとめて適用したコマンドのブロードキャストは、それぞれのトレースに記録される）
+完了したトレースはメモリ上のリングバッファに保持し、export_path があれば1行1トレースのJSONで追記する
+（ファイルへの書き込みはリクエストの処理中には行わず、run のタスクがまとめて別スレッドで書き出す）
+"""
+import asyncio
+import random
+import secrets
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from codec import dumps
+
+# タイムラインのテキスト表示の幅（文字数）
+TIMELINE_WIDTH = 40
+# 書き出し待ちのトレースの上限（書き出しが追いつかない場合は古いものから捨てる）
+EXPORT_MAX_PENDING = 10000
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attrs", "start", "end")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = secrets.token_hex(4)
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        trace.spans.append(self)
+
+    def child(self, name: str, attrs: Dict[str, Any]) -> "Span":
+        return Span(self.trace, name, self.span_id, attrs)
+
+    def finish(self):
+        self.end = time.perf_counter()
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started_at = datetime.now().isoformat()
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> dict:
+        """ルートspanからの相対時刻（ミリ秒）で表したトレース"""
+        root = self.spans[0]
+        attrs: Dict[str, Any] = {}
+        for span in self.spans:
+            for key in ("room_code", "request_id", "player_id"):
+                if span.attrs.get(key) is not None:
+                    attrs.setdefault(key, span.attrs[key])
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": self.started_at,
+            "duration_ms": round(((root.end or root.start) - root.start) * 1000, 3),
+            **attrs,
+            "spans": [{
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "name": span.name,
+                "offset_ms": round((span.start - root.start) * 1000, 3),
+                "duration_ms": round(((span.end or span.start) - span.start) * 1000, 3),
+                **({"attrs": span.attrs} if span.attrs else {}),
+            } for span in self.spans],
+        }
+
+
+# 現在有効なspan（記録中のトレースがなければ空）
+_current: ContextVar[Tuple[Span, ...]] = ContextVar("trace_spans", default=())
+
+
+def current_spans() -> Tuple[Span, ...]:
+    """別タスクに引き継ぐための現在のspan"""
+    return _current.get()
+
+
+class Tracer:
+    def __init__(self, sample_rate: float, max_traces: int, export_path: str = ""):
+        self.sample_rate = sample_rate
+        self.enabled = sample_rate > 0
+        self.traces: deque = deque(maxlen=max_traces)
+        self.export_path = export_path
+        self.pending_export: deque = deque(maxlen=EXPORT_MAX_PENDING)
+
+    def trace(self, name: str, **attrs: Any):
+        """ルートspanを開始する（サンプリングされなかった場合は何もしない）"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return nullcontext()
+        return self._trace(name, attrs)
+
+    @contextmanager
+    def _trace(self, name: str, attrs: Dict[str, Any]) -> Iterator[Span]:
+        root = Span(Trace(secrets.token_hex(8)), name, None, attrs)
+        token = _current.set((root,))
+        try:
+            yield root
+        finally:
+            _current.reset(token)
+            root.finish()
+            self._complete(root.trace)
+
+    def span(self, name: str, **attrs: Any):
+        """有効な全てのトレースに子spanを作る（記録中のトレースがなければ何もしない）"""
+        parents = _current.get()
+        if not parents:
+            return nullcontext()
+        return self._span(parents, name, attrs)
+
+    @contextmanager
+    def _span(self, parents: Tuple[Span, ...], name: str, attrs: Dict[str, Any]) -> Iterator[Tuple[Span, ...]]:
+        children = tuple(parent.child(name, attrs) for parent in parents)
+        token = _current.set(children)
+        try:
+            yield children
+        finally:
+            _current.reset(token)
+            for child in children:
+                child.finish()
+
+    def activate(self, spans: Tuple[Span, ...]):
+        """別タスクから引き継いだspanを有効にする"""
+        if not spans:
+            return nullcontext()
+        return self._activate(spans)
+
+    @contextmanager
+    def _activate(self, spans: Tuple[Span, ...]) -> Iterator[None]:
+        token = _current.set(spans)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def _complete(self, trace: Trace):
+        record = trace.to_dict()
+        self.traces.append(record)
+        if self.export_path:
+            self.pending_export.append(record)
+
+    def _write_export(self, records: List[dict]):
+        try:
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write("".join(dumps(record) + "\n" for record in records))
+        except OSError as e:
+            print(f"[TRACE] Export failed ({len(records)} traces): {e}", file=sys.stderr)
+
+    def _take_pending(self) -> List[dict]:
+        records = list(self.pending_export)
+        self.pending_export.clear()
+        return records
+
+    async def run(self, interval: float = 1.0):
+        """interval 秒ごとに書き出し待ちのトレースを別スレッドでまとめて書き出す"""
+        while True:
+            await asyncio.sleep(interval)
+            records = self._take_pending()
+            if records:
+                await asyncio.to_thread(self._write_export, records)
+
+    def flush_export(self):
+        """書き出し待ちのトレースを書き出す（終了時用）"""
+        records = self._take_pending()
+        if records:
+            self._write_export(records)
+
+    def find(self, trace_id: str) -> Optional[dict]:
+        return next((record for record in self.traces if record["trace_id"] == trace_id), None)
+
+
+def render_timeline(record: dict) -> str:
+    """トレースを1行1spanのタイムライン（子spanは字下げ、バーは開始時刻と所要時間）で表示する"""
+    total = record["duration_ms"] or 1
+    depth: Dict[Optional[str], int] = {None: -1}
+    lines = [f"{record['name']}  trace={record['trace_id']}  {record['duration_ms']:.3f}ms"]
+    for span in record["spans"]:
+        level = depth[span["span_id"]] = depth.get(span["parent_id"], -1) + 1
+        start = min(int(span["offset_ms"] / total * TIMELINE_WIDTH), TIMELINE_WIDTH - 1)
+        width = max(1, int(span["duration_ms"] / total * TIMELINE_WIDTH))
+        bar = (" " * start + "#" * width)[:TIMELINE_WIDTH].ljust(TIMELINE_WIDTH)
+        attrs = " ".join(f"{k}={v}" for k, v in span.get("attrs", {}).items())
+        lines.append(f"|{bar}| {span['offset_ms']:>9.3f} +{span['duration_ms']:>9.3f}ms  {'  ' * level}{span['name']} {attrs}".rstrip())
+    return "\n".join(lines) + "\n"
+
+
+class TracingMiddleware:
+    """
+    HTTPリクエストのルートspanを作るASGIミドルウェア
+
+    X-Request-ID ヘッダーがあればトレースの request_id にし、記録したリクエストには X-Trace-Id を返す
+    """
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = Headers(scope=scope).get("x-request-id")
+        with self.tracer.trace(f"{scope['method']} {scope['path']}", request_id=request_id) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_trace_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Trace-Id"] = root.trace.trace_id
+                    root.attrs["status"] = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                # ルーティング後は scope に一致したルートとパスパラメータが入っている
+                route = scope.get("route")
+                if route is not None and hasattr(route, "path"):
+                    root.name = f"{scope['method']} {route.path}"
+                root.attrs["room_code"] = scope.get("path_params", {}).get("room_code")
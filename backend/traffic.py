@@ -0,0 +1,509 @@
+"""
+実トラフィックの記録と再生
+
+記録（TRAFFIC_RECORD_PATH を設定して起動）:
+    ルームのREST呼び出しとWebSocketの受信フレームを、時刻付きで gzip 圧縮した NDJSON に記録する。
+    player_id・プレイヤー名は記録ごとのソルトでハッシュ化し、チャット本文は同じ長さの伏せ字にし、トークンは記録しない
+
+再生:
+    python traffic.py replay recording.ndjson.gz [--target http://127.0.0.1:8000] [--speed 10] [--room-prefix R1-] [--session 2]
+    python traffic.py info recording.ndjson.gz
+
+同じファイルにはプロセスの起動ごとに記録（セッション）が追記される。時刻はセッションごとに 0 から始まるので、
+再生はセッションごとに分けて順番に行う（--session で1つだけ選べる）
+
+再生は記録時と同じ間隔（speed 倍速）でリクエストを送り、ルートごとのレイテンシと、
+記録時とステータスコードが異なったリクエスト（乖離）を報告する。トークンは再生先が発行したものを使う
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import secrets
+import sys
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from codec import dumps
+
+# 記録するパス（管理API・メトリクスなどは記録しない）
+RECORDED_PREFIXES = ("/api/rooms", "/api/auth", "/ws/")
+# 記録しないクエリパラメータ・ボディのキー
+SECRET_KEYS = {"token"}
+# 記録ファイルを書き出す間隔（エントリ数・秒のどちらかに達したら）
+FLUSH_ENTRIES = 100
+FLUSH_INTERVAL = 1.0
+
+
+class Anonymizer:
+    """player_id・プレイヤー名を記録ごとのソルトで置き換える（同じ記録の中では同じ値になる）"""
+    def __init__(self, salt: Optional[bytes] = None):
+        self.salt = salt or secrets.token_bytes(16)
+
+    def _hash(self, prefix: str, value: str) -> str:
+        return prefix + hmac.new(self.salt, value.encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+
+    def value(self, key: str, value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        if key == "player_id":
+            return self._hash("p-", value)
+        if key in ("player_name", "new_host_name"):
+            return self._hash("n-", value)
+        if key == "message":
+            return "*" * len(value)
+        return value
+
+    def obj(self, obj: Any) -> Any:
+        if isinstance(obj, dict):
+            return {
+                key: self.obj(value) if isinstance(value, (dict, list)) else self.value(key, value)
+                for key, value in obj.items() if key not in SECRET_KEYS
+            }
+        if isinstance(obj, list):
+            return [self.obj(value) for value in obj]
+        return obj
+
+    def query(self, query_string: str) -> str:
+        return urlencode([
+            (key, self.value(key, value)) for key, value in parse_qsl(query_string, keep_blank_values=True)
+            if key not in SECRET_KEYS
+        ])
+
+    def body(self, body: bytes) -> Any:
+        """JSONボディを匿名化する（JSONでない場合は記録しない）"""
+        if not body:
+            return None
+        try:
+            return self.obj(json.loads(body))
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+
+def room_from_path(path: str) -> Optional[str]:
+    parts = path.strip("/").split("/")
+    if parts[:2] == ["api", "rooms"] and len(parts) > 2 and parts[2] not in ("create", "join"):
+        return parts[2]
+    if parts[0] == "ws" and len(parts) > 1:
+        return parts[1]
+    return None
+
+
+class TrafficRecorder:
+    """
+    記録ファイル（gzip 圧縮の NDJSON）への書き込み
+
+    1行1エントリ: {"t": 記録開始からのミリ秒, "kind": ..., "room": ルームコード, ...}
+    - session: started_at（記録開始時刻、UNIX秒）。記録の開始ごとに最初に書く
+    - http: method, path, query, body, status
+    - ws_open / ws_in / ws_close: conn（接続ごとの連番）, path, query, text（受信フレーム）
+
+    flush_entries 件または flush_interval 秒ごとに圧縮途中のデータを書き出す（run を実行している場合は書き込みがなくても）。
+    プロセスが close せずに終了しても、最後に書き出した時点までは read_recording で読める
+    """
+    def __init__(self, path: str, flush_entries: int = FLUSH_ENTRIES, flush_interval: float = FLUSH_INTERVAL):
+        self.path = path
+        self.file = gzip.open(path, "ab")
+        self.anonymizer = Anonymizer()
+        self.started = time.perf_counter()
+        self.next_conn = 0
+        self.count = 0
+        self.flush_entries = flush_entries
+        self.flush_interval = flush_interval
+        self.unflushed = 0
+        self.flushed_at = time.monotonic()
+        self.write({"t": 0, "kind": "session", "started_at": time.time()})
+
+    def now(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+    def write(self, entry: dict):
+        self.file.write(dumps(entry).encode("utf-8") + b"\n")
+        self.count += 1
+        self.unflushed += 1
+        if self.unflushed >= self.flush_entries or time.monotonic() - self.flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.unflushed = 0
+        self.flushed_at = time.monotonic()
+
+    async def run(self):
+        """書き込みが途切れても flush_interval 秒以内に書き出す"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.unflushed:
+                self.flush()
+
+    def close(self):
+        self.file.close()
+        print(f"[TRAFFIC] {self.count} entries recorded to {self.path}", file=sys.stderr)
+
+
+class TrafficRecordingMiddleware:
+    """ルームのREST呼び出しとWebSocketの受信フレームを記録するASGIミドルウェア"""
+    def __init__(self, app: ASGIApp, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or not scope["path"].startswith(RECORDED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "http":
+            await self._record_http(scope, receive, send)
+        else:
+            await self._record_websocket(scope, receive, send)
+
+    async def _record_http(self, scope: Scope, receive: Receive, send: Send):
+        recorder = self.recorder
+        started = recorder.now()
+        chunks: List[bytes] = []
+        status = 0
+
+        async def receive_body() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_status)
+        finally:
+            body = recorder.anonymizer.body(b"".join(chunks))
+            room = room_from_path(scope["path"]) or (body.get("room_code") if isinstance(body, dict) else None)
+            recorder.write({
+                "t": started,
+                "kind": "http",
+                "room": room,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": recorder.anonymizer.query(scope.get("query_string", b"").decode("latin-1")),
+                "body": body,
+                "status": status,
+                "ms": round(recorder.now() - started, 3),
+            })
+
+    async def _record_websocket(self, scope: Scope, receive: Receive, send: Send):
+        recorder = self.recorder
+        conn = recorder.next_conn
+        recorder.next_conn += 1
+        room = room_from_path(scope["path"])
+        base = {"room": room, "conn": conn}
+
+        async def receive_frames() -> Message:
+            message = await receive()
+            if message["type"] == "websocket.receive" and message.get("text") is not None:
+                recorder.write({
+                    "t": recorder.now(), "kind": "ws_in", **base,
+                    "text": dumps(recorder.anonymizer.body(message["text"].encode("utf-8"))),
+                })
+            elif message["type"] == "websocket.disconnect":
+                recorder.write({"t": recorder.now(), "kind": "ws_close", **base})
+            return message
+
+        async def send_accept(message: Message) -> None:
+            if message["type"] == "websocket.accept":
+                recorder.write({
+                    "t": recorder.now(), "kind": "ws_open", **base,
+                    "path": scope["path"],
+                    "query": recorder.anonymizer.query(scope.get("query_string", b"").decode("latin-1")),
+                })
+            await send(message)
+
+        await self.app(scope, receive_frames, send_accept)
+
+
+def _decompress_recording(path: str) -> bytes:
+    """
+    記録ファイル（追記で複数の gzip メンバーになっている場合もある）を展開する
+
+    末尾が欠けている・壊れている場合は、そこまでに展開できたデータを返す
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    chunks: List[bytes] = []
+    while data:
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        try:
+            for offset in range(0, len(data), 1 << 16):
+                block = data[offset:offset + (1 << 16)]
+                before = decompressor.copy()
+                try:
+                    chunks.append(decompressor.decompress(block))
+                except zlib.error:
+                    # 壊れた箇所の手前までを1バイトずつ展開し直す
+                    for i in range(len(block)):
+                        chunks.append(before.decompress(block[i:i + 1]))
+                    raise
+                if decompressor.eof:
+                    break
+        except zlib.error as e:
+            print(f"[TRAFFIC] Recording {path} is corrupted, reading up to the break: {e}", file=sys.stderr)
+            break
+        if not decompressor.eof:
+            print(f"[TRAFFIC] Recording {path} is truncated, reading up to the break", file=sys.stderr)
+            break
+        data = decompressor.unused_data
+    return b"".join(chunks)
+
+
+def read_recording(path: str) -> List[dict]:
+    """
+    記録を読み込む
+
+    記録中のプロセスが close せずに終了したファイル（末尾が欠けている）も、最後に書き出された所まで読める。
+    途中で切れた最後の行は捨てる
+    """
+    entries = []
+    for line in _decompress_recording(path).split(b"\n"):
+        if not line.strip():
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break
+    return entries
+
+
+def split_sessions(entries: List[dict]) -> List[List[dict]]:
+    """
+    記録をセッション（記録の開始ごと）に分け、それぞれを時刻順に並べる
+
+    セッションの区切り（kind=session）は含めない。区切りより前のエントリ（区切りを書く前の形式の記録）は1つのセッションにする
+    """
+    sessions: List[List[dict]] = [[]]
+    for entry in entries:
+        if entry["kind"] == "session":
+            sessions.append([])
+        else:
+            sessions[-1].append(entry)
+    return [sorted(session, key=lambda entry: entry["t"]) for session in sessions if session]
+
+
+def route_of(entry: dict) -> str:
+    """レイテンシ集計用のルート（ルームコードを {room_code} に置き換える）"""
+    if entry["kind"] != "http":
+        return entry["kind"]
+    path = entry["path"]
+    room = room_from_path(path)
+    if room:
+        path = path.replace(f"/{room}", "/{room_code}", 1)
+    return f"{entry['method']} {path}"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class Replayer:
+    """記録を再生先のサーバーに送る"""
+    def __init__(self, target: str, speed: float, room_prefix: str):
+        import httpx
+
+        self.target = target.rstrip("/")
+        self.ws_target = "ws" + self.target[len("http"):] if self.target.startswith("http") else self.target
+        self.speed = speed
+        self.room_prefix = room_prefix
+        self.client = httpx.AsyncClient(base_url=self.target, timeout=30)
+        self.tokens: Dict[str, str] = {}  # 匿名化済み player_id -> 再生先が発行したトークン
+        self.connections: Dict[int, Any] = {}
+        self.readers: List[asyncio.Task] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.schedule_lag: List[float] = []
+        self.divergences: List[dict] = []
+        self.errors = 0
+
+    def _room(self, value: Optional[str]) -> Optional[str]:
+        return self.room_prefix + value if value and self.room_prefix else value
+
+    def _path(self, entry: dict) -> str:
+        room = room_from_path(entry["path"])
+        if room and self.room_prefix:
+            return entry["path"].replace(f"/{room}", f"/{self._room(room)}", 1)
+        return entry["path"]
+
+    def _query(self, query: str, with_token: bool = False) -> str:
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        token = self.tokens.get(params.get("player_id", ""))
+        if with_token and token:
+            params["token"] = token
+        return urlencode(params)
+
+    async def run(self, entries: List[dict]) -> float:
+        """
+        記録を再生して経過時間（秒）を返す
+
+        ルームごとの順序は保ったまま、ルーム同士は並行に再生する（遅いリクエストが他のルームを遅らせない）
+        """
+        # 記録の最初のエントリを再生開始時刻にする
+        origin = entries[0]["t"] if entries else 0
+        by_room: Dict[Optional[str], List[dict]] = defaultdict(list)
+        for entry in entries:
+            by_room[entry.get("room")].append({**entry, "t": entry["t"] - origin})
+        started = time.perf_counter()
+        await asyncio.gather(*(self._run_room(room_entries, started) for room_entries in by_room.values()))
+        elapsed = time.perf_counter() - started
+        # 接続の番号はセッションごとに振り直されるので、次のセッションに持ち越さない
+        for ws in self.connections.values():
+            await ws.close()
+        for reader in self.readers:
+            reader.cancel()
+        self.connections.clear()
+        self.readers.clear()
+        return elapsed
+
+    async def run_sessions(self, sessions: List[List[dict]]) -> float:
+        """セッションを順番に再生して経過時間の合計（秒）を返す"""
+        elapsed = 0.0
+        try:
+            for session in sessions:
+                elapsed += await self.run(session)
+        finally:
+            await self.client.aclose()
+        return elapsed
+
+    async def _run_room(self, entries: List[dict], started: float):
+        for entry in entries:
+            delay = entry["t"] / 1000 / self.speed - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.schedule_lag.append(-delay * 1000)
+            try:
+                await self._send(entry)
+            except Exception as e:
+                self.errors += 1
+                print(f"[REPLAY] {entry['kind']} failed: {e}", file=sys.stderr)
+
+    async def _send(self, entry: dict):
+        kind = entry["kind"]
+        if kind == "http":
+            await self._send_http(entry)
+        elif kind == "ws_open":
+            await self._open_ws(entry)
+        elif kind == "ws_in" and entry["conn"] in self.connections:
+            await self.connections[entry["conn"]].send(entry["text"])
+        elif kind == "ws_close" and entry["conn"] in self.connections:
+            await self.connections.pop(entry["conn"]).close()
+
+    async def _send_http(self, entry: dict):
+        body = entry.get("body")
+        if isinstance(body, dict) and "room_code" in body:
+            body = {**body, "room_code": self._room(body["room_code"])}
+        params = dict(parse_qsl(entry["query"], keep_blank_values=True))
+        headers = {}
+        token = self.tokens.get(params.get("player_id", ""))
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        request_started = time.perf_counter()
+        response = await self.client.request(
+            entry["method"], self._path(entry), params=params, json=body, headers=headers
+        )
+        self.latencies[route_of(entry)].append((time.perf_counter() - request_started) * 1000)
+
+        if response.status_code != entry["status"]:
+            self.divergences.append({
+                "route": route_of(entry), "room": entry.get("room"),
+                "recorded": entry["status"], "replayed": response.status_code,
+            })
+        # ルーム作成・参加で発行されたトークンを以降のリクエストで使う
+        if response.status_code == 200 and isinstance(body, dict) and body.get("player_id"):
+            token = response.json().get("token")
+            if token:
+                self.tokens[body["player_id"]] = token
+
+    async def _open_ws(self, entry: dict):
+        import websockets
+
+        path = self._path(entry)
+        url = f"{self.ws_target}{path}?{self._query(entry['query'], with_token=True)}"
+        opened = time.perf_counter()
+        ws = await websockets.connect(url)
+        self.latencies["ws_open"].append((time.perf_counter() - opened) * 1000)
+        self.connections[entry["conn"]] = ws
+        # 受信したフレームは読み捨てる（送信側のバッファが詰まらないように）
+        self.readers.append(asyncio.create_task(self._drain(ws)))
+
+    @staticmethod
+    async def _drain(ws):
+        try:
+            async for _ in ws:
+                pass
+        except Exception:
+            pass
+
+    def report(self, elapsed: float, entries: List[dict]):
+        print(f"entries={len(entries)} speed={self.speed}x elapsed={elapsed:.2f}s errors={self.errors}")
+        if self.schedule_lag:
+            print(f"behind schedule: {len(self.schedule_lag)} entries, max {max(self.schedule_lag):.1f}ms")
+        print(f"{'route':<48} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for route, values in sorted(self.latencies.items()):
+            print(f"{route:<48} {len(values):>6} {percentile(values, 0.5):>8.2f} {percentile(values, 0.95):>8.2f} "
+                  f"{percentile(values, 0.99):>8.2f} {max(values):>8.2f}")
+        print(f"divergences (status differs from recording): {len(self.divergences)}")
+        by_route: Dict[str, int] = defaultdict(int)
+        for divergence in self.divergences:
+            by_route[f"{divergence['route']} {divergence['recorded']} -> {divergence['replayed']}"] += 1
+        for key, count in sorted(by_route.items(), key=lambda item: -item[1]):
+            print(f"  {key}: {count}")
+
+
+def print_info(sessions: List[List[dict]]):
+    entries = [entry for session in sessions for entry in session]
+    rooms = {entry["room"] for entry in entries if entry.get("room")}
+    kinds: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        kinds[route_of(entry)] += 1
+    print(f"sessions={len(sessions)} entries={len(entries)} rooms={len(rooms)}")
+    for number, session in enumerate(sessions, start=1):
+        print(f"  session {number}: entries={len(session)} duration={session[-1]['t'] / 1000:.1f}s")
+    for route, count in sorted(kinds.items(), key=lambda item: -item[1]):
+        print(f"  {route:<48} {count:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Axis Wolf traffic recording tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay = subparsers.add_parser("replay", help="記録を再生先のサーバーに送る")
+    replay.add_argument("recording")
+    replay.add_argument("--target", default="http://127.0.0.1:8000")
+    replay.add_argument("--speed", type=float, default=1.0)
+    replay.add_argument("--room-prefix", default="", help="ルームコードの先頭に付ける文字列（同じサーバーで繰り返し再生する場合）")
+    replay.add_argument("--session", type=int, help="再生するセッションの番号（1から。info で確認できる。省略時は全て順番に）")
+    info = subparsers.add_parser("info", help="記録の概要を表示する")
+    info.add_argument("recording")
+    args = parser.parse_args()
+
+    sessions = split_sessions(read_recording(args.recording))
+    if args.command == "info":
+        print_info(sessions)
+        return
+
+    if args.session is not None:
+        if not 1 <= args.session <= len(sessions):
+            parser.error(f"--session must be between 1 and {len(sessions)}")
+        sessions = [sessions[args.session - 1]]
+    replayer = Replayer(args.target, args.speed, args.room_prefix)
+    elapsed = asyncio.run(replayer.run_sessions(sessions))
+    replayer.report(elapsed, [entry for session in sessions for entry in session])
+
+
+if __name__ == "__main__":
+    main()
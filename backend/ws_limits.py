@@ -0,0 +1,61 @@
+"""
+WebSocketの受信メッセージの制限（接続ごと）
+
+- メッセージの種類（chat / ping / drag_preview / command / other）ごとのトークンバケットで受信レートを制限する
+- 違反（レート超過・スキーマ不正など）も接続ごとのバケットで数え、使い切った接続は切断する
+  （一時的な超過は捨てるだけだが、送り続けるクライアントはルームの処理に影響する前に切り離す）
+フレームサイズの上限はメッセージの解析前に呼び出し側で確認する
+"""
+from typing import Dict, Iterable, Tuple
+
+from admission import TokenBucket
+
+# 種類ごとのデフォルトの制限: 毎秒の件数 / バースト
+DEFAULT_RATE_LIMITS = "chat=1/5,ping=1/5,drag_preview=30/30,command=10/20,other=5/10"
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    "chat=1/5,ping=1/5" 形式の設定を {種類: (毎秒の件数, バースト)} にする
+
+    指定されなかった種類はデフォルトの値を使う。毎秒の件数が 0 の種類は制限しない
+    """
+    limits = {}
+    for source in (DEFAULT_RATE_LIMITS, spec):
+        for item in filter(None, (part.strip() for part in source.split(","))):
+            try:
+                category, value = item.split("=", 1)
+                rate, burst = value.split("/", 1)
+                limits[category.strip()] = (float(rate), float(burst))
+            except ValueError:
+                raise ValueError(f"Invalid rate limit {item!r} (expected type=rate/burst)")
+    return limits
+
+
+def message_category(message_type: object, commands: Iterable[str]) -> str:
+    """メトリクスのラベルと制限に使う種類（任意の type をそのままラベルにしない）"""
+    if not isinstance(message_type, str):
+        return "other"  # JSON の配列・オブジェクトはハッシュできないので集合の検索に使わない
+    if message_type in ("chat", "ping", "drag_preview"):
+        return message_type
+    if message_type in commands:
+        return "command"
+    return "other"
+
+
+class InboundLimiter:
+    """1つの接続の受信制限"""
+    def __init__(self, limits: Dict[str, Tuple[float, float]], violation_rate: float, violation_burst: float):
+        self.buckets = {
+            category: TokenBucket(rate, burst)
+            for category, (rate, burst) in limits.items() if rate > 0
+        }
+        self.violations = TokenBucket(violation_rate, violation_burst)
+
+    def allow(self, category: str) -> bool:
+        bucket = self.buckets.get(category)
+        return bucket is None or bucket.try_acquire()
+
+    def violation(self) -> bool:
+        """違反を1回数え、許容量を使い切った（切断すべき）場合は False を返す"""
+        return self.violations.try_acquire()
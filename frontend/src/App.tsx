@@ -1,11 +1,14 @@
+import { lazy, Suspense } from 'react';
 import { BrowserRouter as Router, Routes, Route } from 'react-router-dom';
 import Home from './pages/Home';
-import Game from './pages/Game';
 import OnlineHome from './pages/OnlineHome';
 import OnlineGame from './pages/OnlineGame';
 import Debug from './pages/Debug';
 import { GameProvider } from './contexts/GameContext';
 
+// オフライン版はカード・軸データを同梱しているため、初期バンドルに含めず遅延読み込みする
+const Game = lazy(() => import('./pages/Game'));
+
 function App() {
   const basename = import.meta.env.BASE_URL;
 
@@ -14,7 +17,7 @@ function App() {
       <Router basename={basename}>
         <Routes>
           <Route path="/" element={<Home />} />
-          <Route path="/game" element={<Game />} />
+          <Route path="/game" element={<Suspense fallback={null}><Game /></Suspense>} />
           <Route path="/online" element={<OnlineHome />} />
           <Route path="/online/:roomCode" element={<OnlineGame />} />
           <Route path="/debug" element={<Debug />} />
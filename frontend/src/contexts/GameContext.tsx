@@ -1,7 +1,7 @@
 /* eslint-disable react-refresh/only-export-components */
 import { createContext, useContext, useState, useEffect, useRef } from 'react';
 import type { ReactNode } from 'react';
-import { api, type Room, type Player, type PlacedCard, type Vote } from '../lib/api';
+import { api, type Room, type Player, type PlacedCard, type Vote, type RoundResults } from '../lib/api';
 import type { AxisPayload } from '../types';
 
 interface GameContextType {
@@ -50,6 +50,8 @@ export function GameProvider({ children }: { children: ReactNode }) {
 
   // WebSocket初回接続フラグ（セッション全体で1回のみtrue）
   const isFirstConnection = useRef(true);
+  // phase_changed に同梱されて届いたラウンド結果（取得リクエストを省略するため保持）
+  const pushedResults = useRef<{ round: number; results: RoundResults } | null>(null);
 
   const isHost = players.find(p => p.player_slot === playerSlot)?.is_host === 1;
 
@@ -80,41 +82,20 @@ export function GameProvider({ children }: { children: ReactNode }) {
             console.log('[GameContext] 再接続データを取得中...');
 
             // リロード時は直接joinRoomを呼ぶ（既存プレイヤーとして認識される）
-            const { player_slot, token } = await api.joinRoom(savedRoomCode, savedPlayerId, savedPlayerName);
-            const { room: newRoom, players: newPlayers } = await api.getRoom(savedRoomCode);
+            const { token } = await api.joinRoom(savedRoomCode, savedPlayerId, savedPlayerName);
 
             // 新しいトークンを保存（既存プレイヤーでも更新される可能性がある）
+            // スナップショットの取得にはこのトークンを使う
             if (token) {
               localStorage.setItem('online_player_token', token);
             }
 
-            // 配置済みカードを復元（プレイ中の場合）
-            let existingCards: typeof placedCards = [];
-            if (newRoom.phase === 'placement' || newRoom.phase === 'voting' || newRoom.phase === 'results') {
-              try {
-                const cardsData = await api.getCards(savedRoomCode);
-                console.log('[GameContext] getCards response:', cardsData);
-                existingCards = cardsData.cards || [];
-                console.log(`[GameContext] ${existingCards.length}枚の配置済みカードを復元します`);
-              } catch (error) {
-                console.error('[GameContext] カード取得エラー:', error);
-                existingCards = [];
-              }
-            }
-
-            // 投票を復元（投票/結果フェーズの場合）
-            let existingVotes: typeof votes = [];
-            if (newRoom.phase === 'voting' || newRoom.phase === 'results') {
-              try {
-                const votesData = await api.getVotes(savedRoomCode);
-                console.log('[GameContext] getVotes response:', votesData);
-                existingVotes = votesData.votes || [];
-                console.log(`[GameContext] ${existingVotes.length}件の投票を復元します`);
-              } catch (error) {
-                console.error('[GameContext] 投票取得エラー:', error);
-                existingVotes = [];
-              }
-            }
+            // ルーム・プレイヤー・配置済みカード・投票を1回のリクエストでまとめて取得
+            const snapshot = await api.getSnapshot(savedRoomCode, savedPlayerId);
+            const { room: newRoom, players: newPlayers, player_slot } = snapshot;
+            const existingCards = snapshot.cards;
+            const existingVotes = snapshot.votes;
+            console.log(`[GameContext] ${existingCards.length}枚の配置済みカード・${existingVotes.length}件の投票を復元します`);
 
             // すべてのデータが揃ってから状態を一度に更新
             // これによりWebSocket effectは完全なデータで開始される
@@ -144,6 +125,8 @@ export function GameProvider({ children }: { children: ReactNode }) {
     let reconnectAttempts = 0;
     const maxReconnectAttempts = 5;
     const reconnectDelay = 2000; // 2秒
+    // サーバーの再起動前に案内された再接続までの時間（server_restarting で受け取る）
+    let restartReconnectDelay: number | null = null;
     let pingInterval: NodeJS.Timeout | null = null;
     let syncInterval: NodeJS.Timeout | null = null;
 
@@ -161,24 +144,13 @@ export function GameProvider({ children }: { children: ReactNode }) {
         if (!isFirstConnection.current) {
           console.log('[GameContext] WebSocket再接続のため最新データを取得中...');
           try {
-            // 最新のルーム情報とプレイヤーリストを取得
-            const { room: latestRoom, players: latestPlayers } = await api.getRoom(room.room_code);
-            setRoom(latestRoom);
-            setPlayers(latestPlayers);
-
-            // 配置済みカードを再取得（プレイ中の場合）
-            if (latestRoom.phase === 'placement' || latestRoom.phase === 'voting' || latestRoom.phase === 'results') {
-              const { cards: latestCards } = await api.getCards(room.room_code);
-              setPlacedCards(latestCards);
-              console.log(`[GameContext] ${latestCards.length}枚の配置済みカードを再取得しました`);
-            }
-
-            // 投票を再取得（投票/結果フェーズの場合）
-            if (latestRoom.phase === 'voting' || latestRoom.phase === 'results') {
-              const { votes: latestVotes } = await api.getVotes(room.room_code);
-              setVotes(latestVotes);
-              console.log(`[GameContext] ${latestVotes.length}件の投票を再取得しました`);
-            }
+            // 最新のルーム情報・プレイヤーリスト・配置済みカード・投票を1回のリクエストでまとめて取得
+            const snapshot = await api.getSnapshot(room.room_code, playerId);
+            setRoom(snapshot.room);
+            setPlayers(snapshot.players);
+            setPlacedCards(snapshot.cards);
+            setVotes(snapshot.votes);
+            console.log(`[GameContext] ${snapshot.cards.length}枚の配置済みカード・${snapshot.votes.length}件の投票を再取得しました`);
 
             console.log('[GameContext] 再接続後のデータ同期が完了しました');
           } catch (err) {
@@ -214,151 +186,167 @@ export function GameProvider({ children }: { children: ReactNode }) {
       };
 
       websocket.onmessage = (event) => {
-        const message = JSON.parse(event.data);
-        console.log('📨 [GameContext/WS] Received message:', message.type, message);
-
-        switch (message.type) {
-          case 'chat':
-            // チャットメッセージをカスタムイベントとして再発火
-            window.dispatchEvent(new CustomEvent('chat-message', { detail: message }));
-            break;
-
-          case 'player_joined':
-            api.getRoom(room.room_code).then(({ players: newPlayers }) => {
-              setPlayers(newPlayers);
-            });
-            break;
-
-          case 'player_left':
-            console.log('[GameContext] プレイヤーが退出しました:', message.player_name);
-            api.getRoom(room.room_code).then(({ players: newPlayers }) => {
-              setPlayers(newPlayers);
-            });
-            break;
-
-          case 'player_online':
-            // オンライン状態が変更されたらルーム情報を再取得
-            api.getRoom(room.room_code).then(({ players: newPlayers }) => {
-              setPlayers(newPlayers);
-            });
-            break;
-
-          case 'player_offline':
-            // オンライン状態が変更されたらルーム情報を再取得
-            api.getRoom(room.room_code).then(({ players: newPlayers }) => {
-              setPlayers(newPlayers);
-            });
-            break;
-
-          case 'player_removed':
-            // ロビーでオフラインになったプレイヤーが削除された
-            console.log('[GameContext] プレイヤーが削除されました:', message.player_name, 'reason:', message.reason);
-            api.getRoom(room.room_code).then(({ players: newPlayers }) => {
-              setPlayers(newPlayers);
-            });
-            break;
-
-          case 'host_changed':
-            // ホストが変更された
-            console.log('[GameContext] ホストが変更されました:', message.new_host_name);
-            api.getRoom(room.room_code).then(({ players: newPlayers }) => {
-              setPlayers(newPlayers);
-            });
-            break;
-
-          case 'phase_changed':
-            // フェーズが変更されたら、サーバーから最新のルーム情報を取得
-            // (軸データやシード値が更新されている可能性があるため)
-            api.getRoom(room.room_code).then(async ({ room: updatedRoom }) => {
-              setRoom(updatedRoom);
-
-              // ロビーに戻ったらカードと投票をクリア
-              if (updatedRoom.phase === 'lobby') {
-                setPlacedCards([]);
-                setVotes([]);
-                console.log('[GameContext/Phase] ロビーへ移行: カードと投票をクリア');
+        const data = JSON.parse(event.data);
+        // プロトコルv2では1回の状態変更で発生したイベントが batch にまとめて届く
+        const messages = data.type === 'batch' ? data.events : [data];
+
+        for (const message of messages) {
+          console.log('📨 [GameContext/WS] Received message:', message.type, message);
+
+          switch (message.type) {
+            case 'chat':
+              // チャットメッセージをカスタムイベントとして再発火
+              window.dispatchEvent(new CustomEvent('chat-message', { detail: message }));
+              break;
+
+            case 'player_joined':
+              api.getRoom(room.room_code).then(({ players: newPlayers }) => {
+                setPlayers(newPlayers);
+              });
+              break;
+
+            case 'player_left':
+              console.log('[GameContext] プレイヤーが退出しました:', message.player_name);
+              api.getRoom(room.room_code).then(({ players: newPlayers }) => {
+                setPlayers(newPlayers);
+              });
+              break;
+
+            case 'player_online':
+              // オンライン状態が変更されたらルーム情報を再取得
+              api.getRoom(room.room_code).then(({ players: newPlayers }) => {
+                setPlayers(newPlayers);
+              });
+              break;
+
+            case 'player_offline':
+              // オンライン状態が変更されたらルーム情報を再取得
+              api.getRoom(room.room_code).then(({ players: newPlayers }) => {
+                setPlayers(newPlayers);
+              });
+              break;
+
+            case 'player_removed':
+              // ロビーでオフラインになったプレイヤーが削除された
+              console.log('[GameContext] プレイヤーが削除されました:', message.player_name, 'reason:', message.reason);
+              api.getRoom(room.room_code).then(({ players: newPlayers }) => {
+                setPlayers(newPlayers);
+              });
+              break;
+
+            case 'host_changed':
+              // ホストが変更された
+              console.log('[GameContext] ホストが変更されました:', message.new_host_name);
+              api.getRoom(room.room_code).then(({ players: newPlayers }) => {
+                setPlayers(newPlayers);
+              });
+              break;
+
+            case 'phase_changed':
+              // 結果フェーズでは結果が同梱されている
+              if (message.results) {
+                pushedResults.current = { round: message.round, results: message.results };
               }
 
-              // placementフェーズに入ったらカードと投票をクリア（新規ゲーム開始）
-              if (updatedRoom.phase === 'placement') {
-                setPlacedCards([]);
-                setVotes([]);
-                console.log('[GameContext/Phase] placementフェーズへ移行: カードと投票をクリア');
-              }
+              // フェーズが変更されたら、サーバーから最新のルーム情報を取得
+              // (軸データやシード値が更新されている可能性があるため)
+              api.getRoom(room.room_code).then(async ({ room: updatedRoom }) => {
+                setRoom(updatedRoom);
 
-              // 投票フェーズに入ったら投票をクリアし、カードを再同期（パケットロス対策）
-              if (updatedRoom.phase === 'voting') {
-                setVotes([]);
+                // ロビーに戻ったらカードと投票をクリア
+                if (updatedRoom.phase === 'lobby') {
+                  setPlacedCards([]);
+                  setVotes([]);
+                  console.log('[GameContext/Phase] ロビーへ移行: カードと投票をクリア');
+                }
 
-                try {
-                  const { cards: latestCards } = await api.getCards(room.room_code);
-                  setPlacedCards(latestCards);
-                  console.log(`[GameContext/Phase] 投票フェーズへ移行: ${latestCards.length}枚のカードを再同期`);
-                } catch (err) {
-                  console.error('[GameContext/Phase] カード再同期エラー:', err);
+                // placementフェーズに入ったらカードと投票をクリア（新規ゲーム開始）
+                if (updatedRoom.phase === 'placement') {
+                  setPlacedCards([]);
+                  setVotes([]);
+                  console.log('[GameContext/Phase] placementフェーズへ移行: カードと投票をクリア');
                 }
-              }
-            });
-            break;
-
-          case 'card_placed':
-            setPlacedCards(prev => [
-              ...prev.filter(c => !(c.player_slot === message.player_slot && c.card_id === message.card_id)),
-              {
-                room_code: room.room_code,
-                round: room.active_round,
-                player_slot: message.player_slot,
-                card_id: message.card_id,
-                quadrant: message.quadrant,
-                offsets: message.offsets,
-                locked: 0,
-                placed_at: new Date().toISOString(),
-              },
-            ]);
-            break;
-
-          case 'vote_submitted':
-            // 投票が送信されたら投票状況を更新
-            setVotes(prev => {
-              // 既存の同じvoter_slotの投票を削除
-              const filtered = prev.filter(v => v.voter_slot !== message.voter_slot);
-              // 新しい投票を追加
-              return [
-                ...filtered,
+
+                // 投票フェーズに入ったら投票をクリアし、カードを再同期（パケットロス対策）
+                if (updatedRoom.phase === 'voting') {
+                  setVotes([]);
+
+                  try {
+                    const { cards: latestCards } = await api.getCards(room.room_code);
+                    setPlacedCards(latestCards);
+                    console.log(`[GameContext/Phase] 投票フェーズへ移行: ${latestCards.length}枚のカードを再同期`);
+                  } catch (err) {
+                    console.error('[GameContext/Phase] カード再同期エラー:', err);
+                  }
+                }
+              });
+              break;
+
+            case 'card_placed':
+              setPlacedCards(prev => [
+                ...prev.filter(c => !(c.player_slot === message.player_slot && c.card_id === message.card_id)),
                 {
                   room_code: room.room_code,
                   round: room.active_round,
-                  voter_slot: message.voter_slot,
-                  target_slot: message.target_slot,
-                  submitted_at: new Date().toISOString(),
+                  player_slot: message.player_slot,
+                  card_id: message.card_id,
+                  quadrant: message.quadrant,
+                  offsets: message.offsets,
+                  locked: 0,
+                  placed_at: new Date().toISOString(),
                 },
-              ];
-            });
-            break;
-
-          case 'themes_updated':
-            // テーマが更新されたらルーム情報を再取得
-            api.getRoom(room.room_code).then(({ room: newRoom }) => {
-              setRoom(newRoom);
-            });
-            break;
-
-          case 'game_settings_updated':
-            // ゲーム設定が更新されたらルーム情報を再取得
-            api.getRoom(room.room_code).then(({ room: newRoom }) => {
-              setRoom(newRoom);
-            });
-            break;
-
-          case 'round_started':
-            // 新しいラウンドが始まったらルーム情報を再取得
-            api.getRoom(room.room_code).then(({ room: newRoom }) => {
-              setRoom(newRoom);
-            });
-            // カードと投票をクリア
-            setPlacedCards([]);
-            setVotes([]);
-            break;
+              ]);
+              break;
+
+            case 'vote_submitted':
+              // 投票が送信されたら投票状況を更新
+              setVotes(prev => {
+                // 既存の同じvoter_slotの投票を削除
+                const filtered = prev.filter(v => v.voter_slot !== message.voter_slot);
+                // 新しい投票を追加
+                return [
+                  ...filtered,
+                  {
+                    room_code: room.room_code,
+                    round: room.active_round,
+                    voter_slot: message.voter_slot,
+                    target_slot: message.target_slot,
+                    submitted_at: new Date().toISOString(),
+                  },
+                ];
+              });
+              break;
+
+            case 'themes_updated':
+              // テーマが更新されたらルーム情報を再取得
+              api.getRoom(room.room_code).then(({ room: newRoom }) => {
+                setRoom(newRoom);
+              });
+              break;
+
+            case 'game_settings_updated':
+              // ゲーム設定が更新されたらルーム情報を再取得
+              api.getRoom(room.room_code).then(({ room: newRoom }) => {
+                setRoom(newRoom);
+              });
+              break;
+
+            case 'round_started':
+              // 新しいラウンドが始まったらルーム情報を再取得
+              api.getRoom(room.room_code).then(({ room: newRoom }) => {
+                setRoom(newRoom);
+              });
+              // カードと投票をクリア
+              setPlacedCards([]);
+              setVotes([]);
+              break;
+
+            case 'server_restarting':
+              // サーバーが再起動する。切断されたら案内された時間の後に再接続する（ゲームの状態は引き継がれる）
+              console.log(`[GameContext] サーバー再起動の案内: ${message.reconnect_in_ms}ms後に再接続します`);
+              restartReconnectDelay = message.reconnect_in_ms;
+              break;
+          }
         }
       };
 
@@ -377,6 +365,27 @@ export function GameProvider({ children }: { children: ReactNode }) {
           syncInterval = null;
         }
 
+        // サーバーの再起動による切断は、案内された時間の後に再接続する（試行回数には数えない）
+        if (restartReconnectDelay !== null) {
+          const delay = restartReconnectDelay;
+          restartReconnectDelay = null;
+          setTimeout(() => {
+            connect();
+          }, delay);
+          return;
+        }
+
+        // サーバーが過負荷で接続を断った場合（コード1013）は、指定された秒数後に再接続する（試行回数には数えない）
+        if (event.code === 1013) {
+          const match = /retry_after=([\d.]+)/.exec(event.reason);
+          const retryDelay = match ? parseFloat(match[1]) * 1000 : reconnectDelay * (1 + Math.random());
+          console.log(`[GameContext] サーバーが混雑しているため${Math.round(retryDelay)}ms後に再接続します`);
+          setTimeout(() => {
+            connect();
+          }, retryDelay);
+          return;
+        }
+
         // 正常なクローズ（コード1000）または意図的なクローズの場合は再接続しない
         if (event.code === 1000 || event.wasClean) {
           console.log('[GameContext] 正常なクローズのため再接続しません');
@@ -529,7 +538,10 @@ export function GameProvider({ children }: { children: ReactNode }) {
 
   const calculateResults = async () => {
     if (!room) throw new Error('No room');
-    const results = await api.calculateResults(room.room_code);
+    const pushed = pushedResults.current;
+    const results = pushed && pushed.round === room.active_round
+      ? pushed.results
+      : await api.getResults(room.room_code, room.active_round);
     // スコアが更新されたのでルーム情報を再取得
     const { room: updatedRoom } = await api.getRoom(room.room_code);
     setRoom(updatedRoom);
@@ -15,6 +15,9 @@ const getApiBase = () => {
   return API_BASE;
 };
 
+// WebSocketプロトコルバージョン（2: 複数イベントを batch フレームで受信可能）
+const WS_PROTOCOL_VERSION = 2;
+
 const getWsBase = () => {
   if (WS_BASE === '') {
     // 本番環境: 同一オリジンのWebSocket
@@ -72,6 +75,9 @@ export interface Room {
   discussion_deadline: string | null;
   hand_size: number; // 配布手札枚数
   required_placement_count: number; // 配置必須枚数
+  placement_time_limit?: number; // 配置フェーズの制限時間（秒、0 = 無制限）
+  voting_time_limit?: number; // 投票フェーズの制限時間（秒、0 = 無制限）
+  phase_deadline?: number | null; // 現在のフェーズの期限（UNIX秒）
   created_at: string;
   updated_at: string;
 }
@@ -109,6 +115,18 @@ export interface Vote {
   submitted_at: string;
 }
 
+export interface RoundResults {
+  wolf_slot: number;
+  top_voted: number[];
+  wolf_caught: boolean;
+  scores: Record<string, number>;
+  total_scores: Record<string, number>;
+  vote_counts: Record<number, number>;
+  all_hands: Record<string, string[]>;
+  wolf_axis: AxisPayload;
+  normal_axis: AxisPayload;
+}
+
 export const api = {
   async verifyToken(playerId: string, token: string) {
     const res = await fetch(`${getApiBase()}/auth/verify?player_id=${playerId}&token=${token}`, {
@@ -155,6 +173,25 @@ export const api = {
     return res.json();
   },
 
+  async getSnapshot(roomCode: string, playerId: string): Promise<{
+    seq: number;
+    room: Room;
+    players: Player[];
+    player_slot: number;
+    cards: PlacedCard[];
+    hand: string[];
+    votes: Vote[];
+    chat: Record<string, unknown>[];
+    results: Record<string, unknown> | null;
+  }> {
+    const res = await fetch(`${getApiBase()}/rooms/${roomCode}/snapshot?player_id=${playerId}`, {
+      headers: getAuthHeaders(),
+    });
+    handleAuthError(res);
+    if (!res.ok) throw new Error('Failed to get snapshot');
+    return res.json();
+  },
+
   async updatePhase(
     roomCode: string,
     phase: string,
@@ -239,17 +276,7 @@ export const api = {
     return res.json();
   },
 
-  async calculateResults(roomCode: string): Promise<{
-    wolf_slot: number;
-    top_voted: number[];
-    wolf_caught: boolean;
-    scores: Record<string, number>;
-    total_scores: Record<string, number>;
-    vote_counts: Record<number, number>;
-    all_hands: Record<string, string[]>;
-    wolf_axis: AxisPayload;
-    normal_axis: AxisPayload;
-  }> {
+  async calculateResults(roomCode: string): Promise<RoundResults> {
     const res = await fetch(`${getApiBase()}/rooms/${roomCode}/calculate_results`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
@@ -258,6 +285,12 @@ export const api = {
     return res.json();
   },
 
+  async getResults(roomCode: string, round: number): Promise<RoundResults> {
+    const res = await fetch(`${getApiBase()}/rooms/${roomCode}/results/${round}`);
+    if (!res.ok) throw new Error('Failed to get results');
+    return res.json();
+  },
+
   async startNextRound(roomCode: string): Promise<{
     success: boolean;
     round: number;
@@ -290,6 +323,7 @@ export const api = {
     }
 
     params.append('load_history', loadHistory.toString());
+    params.append('protocol', WS_PROTOCOL_VERSION.toString());
 
     url += `?${params.toString()}`;
     return new WebSocket(url);
@@ -326,8 +360,14 @@ export const api = {
     return res.json();
   },
 
-  async getDebugRooms() {
-    const res = await fetch(`${getApiBase()}/debug/rooms`);
+  // デバッグ用のルーム一覧（管理者トークンが必要、cursor 以降の1ページ分）
+  async getDebugRooms(adminToken: string, cursor: string | null = null) {
+    const params = new URLSearchParams({ limit: '100' });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`${getApiBase()}/debug/rooms?${params}`, {
+      headers: { Authorization: `Bearer ${adminToken}` },
+    });
+    if (res.status === 401) throw new Error('Invalid admin token');
     if (!res.ok) throw new Error('Failed to fetch debug rooms');
     return res.json();
   },
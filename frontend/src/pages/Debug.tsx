@@ -20,16 +20,31 @@ interface DebugRoom {
   round_seed: string | null;
 }
 
+const ADMIN_TOKEN_STORAGE_KEY = 'debug_admin_token';
+
 export default function Debug() {
+  const [adminToken, setAdminToken] = useState(() => sessionStorage.getItem(ADMIN_TOKEN_STORAGE_KEY) || '');
+  const [tokenInput, setTokenInput] = useState('');
   const [rooms, setRooms] = useState<DebugRoom[]>([]);
+  const [total, setTotal] = useState(0);
+  // 表示中のページのカーソル（先頭ページは null）と、次のページのカーソル
+  const [cursors, setCursors] = useState<Array<string | null>>([null]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const cursor = cursors[cursors.length - 1];
 
   const fetchRooms = async () => {
+    if (!adminToken) {
+      setLoading(false);
+      return;
+    }
     try {
       setError(null);
-      const data = await api.getDebugRooms();
+      const data = await api.getDebugRooms(adminToken, cursor);
       setRooms(data.rooms || []);
+      setTotal(data.total || 0);
+      setNextCursor(data.next_cursor ?? null);
     } catch (err) {
       const errorMsg = err instanceof Error ? err.message : 'Unknown error';
       console.error('Failed to fetch rooms:', err);
@@ -45,7 +60,46 @@ export default function Debug() {
     // 5秒ごとに自動更新
     const interval = setInterval(fetchRooms, 5000);
     return () => clearInterval(interval);
-  }, []);
+  }, [adminToken, cursor]);
+
+  const saveToken = () => {
+    sessionStorage.setItem(ADMIN_TOKEN_STORAGE_KEY, tokenInput);
+    setAdminToken(tokenInput);
+    setCursors([null]);
+    setLoading(true);
+  };
+
+  const clearToken = () => {
+    sessionStorage.removeItem(ADMIN_TOKEN_STORAGE_KEY);
+    setAdminToken('');
+    setRooms([]);
+    setError(null);
+  };
+
+  if (!adminToken) {
+    return (
+      <div className="min-h-screen bg-gray-900 text-white p-8">
+        <div className="max-w-md mx-auto">
+          <h1 className="text-3xl font-bold mb-6">デバッグ: ルーム一覧</h1>
+          <p className="text-gray-400 mb-4">管理者トークン（ADMIN_TOKEN）を入力してください</p>
+          <input
+            type="password"
+            value={tokenInput}
+            onChange={(e) => setTokenInput(e.target.value)}
+            onKeyDown={(e) => e.key === 'Enter' && tokenInput && saveToken()}
+            className="w-full px-3 py-2 mb-4 bg-gray-800 border border-gray-600 rounded"
+          />
+          <button
+            onClick={saveToken}
+            disabled={!tokenInput}
+            className="px-4 py-2 bg-blue-600 hover:bg-blue-700 disabled:opacity-50 rounded transition-colors"
+          >
+            表示
+          </button>
+        </div>
+      </div>
+    );
+  }
 
   if (loading) {
     return (
@@ -72,6 +126,12 @@ export default function Debug() {
             >
               再試行
             </button>
+            <button
+              onClick={clearToken}
+              className="mt-4 ml-2 px-4 py-2 bg-gray-600 hover:bg-gray-700 rounded transition-colors"
+            >
+              トークンを入力し直す
+            </button>
           </div>
         </div>
       </div>
@@ -91,8 +151,22 @@ export default function Debug() {
           </button>
         </div>
 
-        <div className="mb-4 text-gray-400">
-          総ルーム数: {rooms.length} | 自動更新: 5秒ごと
+        <div className="mb-4 flex items-center gap-4 text-gray-400">
+          <span>総ルーム数: {total} | ページ {cursors.length}（{rooms.length}件） | 自動更新: 5秒ごと</span>
+          <button
+            onClick={() => setCursors(cursors.slice(0, -1))}
+            disabled={cursors.length <= 1}
+            className="px-3 py-1 bg-gray-700 hover:bg-gray-600 disabled:opacity-50 rounded text-sm transition-colors"
+          >
+            前のページ
+          </button>
+          <button
+            onClick={() => nextCursor && setCursors([...cursors, nextCursor])}
+            disabled={!nextCursor}
+            className="px-3 py-1 bg-gray-700 hover:bg-gray-600 disabled:opacity-50 rounded text-sm transition-colors"
+          >
+            次のページ
+          </button>
         </div>
 
         {rooms.length === 0 ? (